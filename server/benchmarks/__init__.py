@@ -0,0 +1 @@
+"""로컬 성능 측정 스크립트 모음 (server 디렉토리에서 python -m benchmarks.<이름> 으로 실행)"""
@@ -0,0 +1,181 @@
+"""재료 추출 벤치마크용 캡션 픽스처와 foodData 카탈로그 생성기
+
+expected는 사람이 확인한 foodData 표준 재료명 목록입니다.
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+# 벤치마크용 최소 foodData 카탈로그 (--firestore 없이 실행할 때 사용)
+FIXTURE_FOOD_NAMES = [
+    '닭다리살', '배추', '간장', '국간장', '대파', '마늘', '양파', '설탕', '소금', '고춧가루', '참기름',
+    '우동면', '물', '달걀', '두부', '애호박', '된장', '올리고당', '후추', '돼지고기', '김치', '식용유',
+    '감자', '당근', '카레가루', '우유', '버터', '밀가루', '베이컨', '스파게티면', '파마산치즈', '생크림',
+    '새우', '브로콜리', '올리브오일', '사과', '루꼴라', '피스타치오', '발사믹식초', '꿀', '고추장', '떡',
+    '어묵', '청양고추', '쌀', '표고버섯', '시금치', '깨',
+]
+
+CAPTIONS = [
+    {
+        'id': 'inline-basic',
+        'caption': '재료: 닭다리살 300g, 배추 1/4개, 간장 2큰술',
+        'expected': ['닭다리살', '배추', '간장'],
+    },
+    {
+        'id': 'sectioned-udon',
+        'caption': (
+            '오늘은 닭다리살 배추 우동🍜\n'
+            '[재료] (2인분)\n- 닭다리살 300g\n- 배추 1/4포기\n- 우동면 2개\n- 대파 반 대\n'
+            '양념: 국간장 1T, 다진마늘 1/2큰술, 올리고당 1과 1/2작은술, 후추 약간\n'
+            '만드는 법\n1. 닭다리살을 한입 크기로 썰어주세요.\n2. 배추와 함께 볶아주세요.\n'
+            '#우동 #집밥 #자취요리'
+        ),
+        'expected': ['닭다리살', '배추', '우동면', '대파', '국간장', '마늘', '올리고당', '후추'],
+    },
+    {
+        'id': 'kimchi-stew',
+        'caption': (
+            '■ 주재료\n김치 1/4포기, 돼지고기 200g, 두부 반 모, 대파 1대\n'
+            '■ 양념\n고춧가루 1큰술, 국간장 1큰술, 설탕 1/2작은술, 물 500ml\n'
+            '김치가 맛있게 익었을 때 꼭 해드세요!'
+        ),
+        'expected': ['김치', '돼지고기', '두부', '대파', '고춧가루', '국간장', '설탕', '물'],
+    },
+    {
+        'id': 'doenjang-lines',
+        'caption': '된장찌개 🥘\n재료\n두부 1모\n애호박 ½개\n된장 2~3큰술\n물 500ml\n청양고추 1개',
+        'expected': ['두부', '애호박', '된장', '물', '청양고추'],
+    },
+    {
+        'id': 'carbonara',
+        'caption': (
+            '재료 (1인분): 스파게티면 100g · 베이컨 3줄 · 달걀 2개 · 파마산치즈 30g · 후추 약간 · 소금 한꼬집'
+        ),
+        'expected': ['스파게티면', '베이컨', '달걀', '파마산치즈', '후추', '소금'],
+    },
+    {
+        'id': 'curry',
+        'caption': (
+            '재료:\n감자 2개, 당근 1/2개, 양파 1개\n돼지고기 150g, 카레가루 1봉지, 물 3컵, 식용유 1큰술\n'
+            '1) 재료를 깍둑썰기 해주세요.\n2) 볶다가 물을 붓고 끓여주세요.'
+        ),
+        'expected': ['감자', '당근', '양파', '돼지고기', '카레가루', '물', '식용유'],
+    },
+    {
+        'id': 'tteokbokki',
+        'caption': (
+            '떡볶이 황금레시피\n재료: 떡 300g, 어묵 2장, 대파 1대\n'
+            '소스: 고추장 2큰술, 고춧가루 1큰술, 설탕 1.5큰술, 간장 1큰술, 물 2컵'
+        ),
+        'expected': ['떡', '어묵', '대파', '고추장', '고춧가루', '설탕', '간장', '물'],
+    },
+    {
+        'id': 'salad-english-units',
+        'caption': (
+            '사과 루꼴라 샐러드🍎\n재료 - 사과 1개, 루꼴라 1줌, 피스타치오 2T\n'
+            '드레싱 - 올리브오일 2T, 발사믹식초 1T, 꿀 1t, 소금 약간'
+        ),
+        'expected': ['사과', '루꼴라', '피스타치오', '올리브오일', '발사믹식초', '꿀', '소금'],
+    },
+    {
+        'id': 'prose-only',
+        'caption': (
+            '오늘은 냉장고에 남은 재료들로 간단하게 볶음밥을 만들어봤어요! 밥에 달걀이랑 대파만 있어도 '
+            '충분히 맛있답니다 ㅎㅎ 간장 살짝 둘러주면 끝 #볶음밥 #냉털'
+        ),
+        'expected': ['달걀', '대파', '간장'],
+    },
+    {
+        'id': 'prose-with-numbers',
+        'caption': (
+            '3일 동안 고민하다가 드디어 만든 크림 파스타🍝 생크림이 200ml 정도 남아서 새우 10마리랑 '
+            '브로콜리까지 넣었는데 진짜 대박이에요. 저장해두고 주말에 꼭 해보세요!'
+        ),
+        'expected': ['생크림', '새우', '브로콜리'],
+    },
+    {
+        'id': 'numbered-ingredients',
+        'caption': (
+            '시금치무침\n[재료]\n1. 시금치 1단\n2. 국간장 1작은술\n3. 다진마늘 1/2작은술\n4. 참기름 1큰술\n5. 깨 약간'
+        ),
+        'expected': ['시금치', '국간장', '마늘', '참기름', '깨'],
+    },
+    {
+        'id': 'mushroom-rice',
+        'caption': (
+            '표고버섯 솥밥\n재료: 쌀 2컵, 표고버섯 4개, 물 2컵, 버터 10g\n양념장: 간장 3큰술, 참기름 1큰술, 깨 1작은술'
+        ),
+        'expected': ['쌀', '표고버섯', '물', '버터', '간장', '참기름', '깨'],
+    },
+    {
+        'id': 'noisy-promo',
+        'caption': (
+            '✨✨오늘의 집밥✨✨ 애호박 두부조림 🥒🍲💕\n'
+            '요즘 날씨가 너무 추워서 따뜻한 반찬이 생각나더라구요 ㅠㅠ 퇴근하고 20분이면 뚝딱!\n'
+            '저장해두고 나중에 꼭 만들어보세요 💾\n'
+            '━━━━━━━━━━\n'
+            '📌 재료 (2인분)\n'
+            '🔸 두부 1모\n🔸 애호박 1/2개\n🔸 양파 1/4개\n🔸 대파 1/2대\n'
+            '📌 양념장\n🔸 간장 3큰술\n🔸 고춧가루 1큰술\n🔸 설탕 1/2큰술\n🔸 다진마늘 1큰술\n🔸 물 100ml\n'
+            '━━━━━━━━━━\n'
+            '만드는 법\n1. 두부는 도톰하게 썰어 키친타월로 물기를 빼주세요.\n'
+            '2. 팬에 식용유를 두르고 두부를 노릇하게 구워주세요.\n'
+            '3. 애호박과 양파를 깔고 양념장을 부어 졸여주세요.\n'
+            '━━━━━━━━━━\n'
+            '더 많은 레시피는 프로필 링크에서 확인하세요 👉 @daily_homecook\n'
+            '팔로우하고 매일 새 레시피 받아보세요 🙏\n'
+            '저장해두고 나중에 꼭 만들어보세요 💾\n'
+            '#애호박 #두부조림 #집밥 #반찬 #자취요리 #오늘뭐먹지 #레시피 #요리스타그램 #먹스타그램 '
+            '#homecooking #koreanfood #foodstagram #recipe #instafood'
+        ),
+        'expected': ['두부', '애호박', '양파', '대파', '간장', '고춧가루', '설탕', '마늘', '물'],
+    },
+    {
+        'id': 'story-hashtags-only',
+        'caption': (
+            '주말 브런치 🥞☕️ 남편이 해준 프렌치토스트인데 생각보다 너무 맛있어서 깜짝 놀랐어요 😳 '
+            '식빵 2장에 달걀 2개, 우유 100ml 섞어서 버터에 구웠대요 🧈 위에 꿀 살짝 뿌려주면 완성!\n'
+            '@husband_chef 고마워 ❤️❤️❤️\n'
+            'https://linktr.ee/brunch_diary\n'
+            '#브런치 #프렌치토스트 #주말아침 #홈카페 #brunch #frenchtoast'
+        ),
+        'expected': ['달걀', '우유', '버터', '꿀'],
+    },
+]
+
+
+# 합성 재료명을 만들 때 쓰는 음절 (실제 재료명에 자주 나오는 음절 위주)
+_NAME_SYLLABLES = (
+    '가고구기김깨나냉다닭당대도돼두떡라루마말머멸무미바배버베보볶부브사새생소수시쌀아애양어오올우유'
+    '자잣장전조참채청치카케콩크타토파팽표피하햄호홍후흑'
+)
+_CATEGORIES = ('채소', '육류', '해산물', '양념', '유제품', '곡류', '과일', '가공식품')
+
+
+def synthetic_food_catalog(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    size개 항목의 foodData 문서 목록 (FIXTURE_FOOD_NAMES를 먼저 넣고 나머지는 무작위 합성 이름)
+
+    같은 seed면 같은 카탈로그를 만들므로 카탈로그 크기별 측정 결과를 비교할 수 있습니다.
+    """
+    rng = random.Random(seed)
+    names = list(dict.fromkeys(FIXTURE_FOOD_NAMES))[:size]
+    seen = set(names)
+    while len(names) < size:
+        name = ''.join(rng.choice(_NAME_SYLLABLES) for _ in range(rng.randint(2, 5)))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+
+    updated_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            'id': f'food{i:06d}',
+            'name': name,
+            'category': _CATEGORIES[i % len(_CATEGORIES)],
+            'emojiPath': f'assets/emoji/{i % 64}.png',
+            'shelfLifeMap': {'냉장': 3 + i % 11, '냉동': 30 + i % 60},
+            'updatedAt': updated_at + timedelta(seconds=i),
+        }
+        for i, name in enumerate(names)
+    ]
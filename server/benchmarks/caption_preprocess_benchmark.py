@@ -0,0 +1,102 @@
+"""
+캡션 전처리(Gemini 입력 축소) 벤치마크
+
+픽스처 캡션마다 전처리 전후 추정 토큰 수, 재료 구역 분리 여부, 기대 재료명이 전처리 후 텍스트에
+남아 있는지(누락되면 Gemini가 찾을 수 없음)와 전처리 시간을 출력합니다.
+--llm을 주면 원문과 전처리 결과를 각각 Gemini로 보내 재료 recall과 응답 시간을 비교합니다.
+
+사용법 (server 디렉토리에서):
+    python -m benchmarks.caption_preprocess_benchmark
+    python -m benchmarks.caption_preprocess_benchmark --max-tokens 64      # 토큰 예산으로 잘리는 경우 확인
+    python -m benchmarks.caption_preprocess_benchmark --llm                # GEMINI_API_KEY 필요
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from config import settings
+from benchmarks.caption_fixtures import CAPTIONS, FIXTURE_FOOD_NAMES
+from benchmarks.stats import percentile
+from services.caption_preprocessor import CaptionPreprocessor
+from services.ingredient_matcher import IngredientMatcher
+
+
+def _matched_names(matcher: IngredientMatcher, raw_ingredients: Optional[List[Dict[str, Any]]]) -> Set[str]:
+    return {item['standard_name'] for item in matcher.match_ingredients(raw_ingredients or [])}
+
+
+async def _timed_llm_call(description: str) -> Any:
+    from services.gemini_service import extract_raw_ingredients_with_gemini
+
+    started = time.perf_counter()
+    result = await extract_raw_ingredients_with_gemini(description)
+    return result, (time.perf_counter() - started) * 1000
+
+
+async def run(max_tokens: int, isolate_section: bool, use_llm: bool, repeat: int) -> None:
+    preprocessor = CaptionPreprocessor(max_tokens=max_tokens, isolate_section=isolate_section)
+    matcher = IngredientMatcher(
+        [{'id': str(i), 'name': name, 'category': ''} for i, name in enumerate(FIXTURE_FOOD_NAMES)], version=0
+    )
+
+    print(f"{'fixture':<22} {'before':>7} {'after':>6} {'saved':>6} {'section':>8} {'cut':>4}  누락된 기대 재료명")
+    total_before = total_after = 0
+    times_us: List[float] = []
+    llm_rows = []
+    for fixture in CAPTIONS:
+        caption = fixture['caption']
+        prepared = preprocessor.prepare(caption)
+        for _ in range(repeat):
+            started = time.perf_counter()
+            CaptionPreprocessor(max_tokens=max_tokens, isolate_section=isolate_section).prepare(caption)
+            times_us.append((time.perf_counter() - started) * 1_000_000)
+
+        total_before += prepared.tokens_before
+        total_after += prepared.tokens_after
+        # 기대 재료명은 표준명이므로 "다진마늘"의 "마늘"처럼 부분 문자열로 확인
+        missing = [name for name in fixture['expected'] if name not in prepared.text]
+        saved = 1 - prepared.tokens_after / prepared.tokens_before if prepared.tokens_before else 0.0
+        print(
+            f"{fixture['id']:<22} {prepared.tokens_before:>7} {prepared.tokens_after:>6} {saved:>6.0%} "
+            f"{str(prepared.section_isolated):>8} {'y' if prepared.truncated else '':>4}  {', '.join(missing)}"
+        )
+
+        if use_llm:
+            expected = set(fixture['expected'])
+            (raw_result, raw_ms), (prepared_result, prepared_ms) = await asyncio.gather(
+                _timed_llm_call(caption), _timed_llm_call(prepared.text)
+            )
+            llm_rows.append((
+                fixture['id'],
+                len(_matched_names(matcher, raw_result) & expected) / len(expected),
+                raw_ms,
+                len(_matched_names(matcher, prepared_result) & expected) / len(expected),
+                prepared_ms,
+            ))
+
+    print(
+        f"\n추정 토큰 합계 {total_before} -> {total_after} "
+        f"({1 - total_after / total_before:.0%} 절감), "
+        f"전처리 시간 p50 {percentile(times_us, 50):.0f}us, p99 {percentile(times_us, 99):.0f}us"
+    )
+
+    if llm_rows:
+        print(f"\n{'fixture':<22} {'원문 recall':>11} {'원문 ms':>8} {'전처리 recall':>13} {'전처리 ms':>9}")
+        for fixture_id, raw_recall, raw_ms, prepared_recall, prepared_ms in llm_rows:
+            print(f"{fixture_id:<22} {raw_recall:>11.2f} {raw_ms:>8.0f} {prepared_recall:>13.2f} {prepared_ms:>9.0f}")
+        print("(LLM 응답 캐시에 적중한 호출은 응답 시간이 0에 가깝습니다. LLM_CACHE_ENABLED=false로 실행해 비교하세요.)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-tokens', type=int, default=settings.CAPTION_MAX_TOKENS, help='추정 토큰 예산')
+    parser.add_argument('--no-isolate-section', action='store_true', help='재료 구역만 남기지 않고 잡음만 제거')
+    parser.add_argument('--llm', action='store_true', help='원문/전처리 결과를 Gemini로 보내 recall 비교')
+    parser.add_argument('--repeat', type=int, default=200, help='전처리 시간 측정 반복 횟수')
+    args = parser.parse_args()
+    asyncio.run(run(args.max_tokens, not args.no_isolate_section, args.llm, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
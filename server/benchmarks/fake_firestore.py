@@ -0,0 +1,326 @@
+"""
+부하 테스트용 인메모리 Firestore 대역
+
+firebase_config가 사용하는 범위(collection/document/set/update/batch/select/where/stream/on_snapshot)만
+구현합니다. firebase_config.get_firestore_client를 FakeFirestore 인스턴스를 반환하도록 바꿔 끼워 사용하며,
+write_latency_ms/read_latency_ms로 Firestore 왕복 시간을 흉내 낼 수 있습니다. (스레드 풀에서 호출되므로 time.sleep)
+"""
+import copy
+import random
+import string
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+
+# (문서 경로, 변경 종류, 변경 후 데이터)
+_Event = Tuple[Tuple[str, ...], str, Optional[Dict[str, Any]]]
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    '==': lambda a, b: a == b,
+    '!=': lambda a, b: a != b,
+    '>': lambda a, b: a > b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '<=': lambda a, b: a <= b,
+}
+
+
+def _auto_id() -> str:
+    """Firestore 자동 ID와 같은 20자 영숫자 ID"""
+    return ''.join(random.choices(_AUTO_ID_CHARS, k=20))
+
+
+def _resolve_sentinels(data: Dict[str, Any]) -> Dict[str, Any]:
+    """SERVER_TIMESTAMP를 현재 시각으로 바꾼 복사본"""
+    now = datetime.now(timezone.utc)
+    return {
+        key: now if value is firestore.SERVER_TIMESTAMP else copy.deepcopy(value)
+        for key, value in data.items()
+    }
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]]):
+        self.id = doc_id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data)
+
+
+class FakeDocumentReference:
+    def __init__(self, db: 'FakeFirestore', path: Tuple[str, ...]):
+        self._db = db
+        self._path = path
+
+    @property
+    def id(self) -> str:
+        return self._path[-1]
+
+    @property
+    def path(self) -> str:
+        return '/'.join(self._path)
+
+    def collection(self, name: str) -> 'FakeCollectionReference':
+        return FakeCollectionReference(self._db, self._path + (name,))
+
+    def get(self, timeout: Optional[float] = None) -> FakeDocumentSnapshot:
+        self._db.sleep_read()
+        return FakeDocumentSnapshot(self.id, self._db.read(self._path))
+
+    def set(self, data: Dict[str, Any], merge: bool = False, timeout: Optional[float] = None) -> None:
+        self._db.sleep_write()
+        self._db.write(self._path, _resolve_sentinels(data), merge=merge)
+
+    def update(self, fields: Dict[str, Any], timeout: Optional[float] = None) -> None:
+        self._db.sleep_write()
+        self._db.update(self._path, _resolve_sentinels(fields))
+
+    def delete(self, timeout: Optional[float] = None) -> None:
+        self._db.sleep_write()
+        self._db.delete(self._path)
+
+
+class FakeQuery:
+    def __init__(
+        self,
+        db: 'FakeFirestore',
+        path: Tuple[str, ...],
+        filters: Sequence[Tuple[str, str, Any]] = (),
+        fields: Optional[Sequence[str]] = None,
+    ):
+        self._db = db
+        self._path = path
+        self._filters = tuple(filters)
+        self._fields = tuple(fields) if fields is not None else None
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None,
+              value: Any = None, *, filter: Any = None) -> 'FakeQuery':
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return FakeQuery(self._db, self._path, self._filters + ((field_path, op_string, value),), self._fields)
+
+    def select(self, field_paths: Sequence[str]) -> 'FakeQuery':
+        return FakeQuery(self._db, self._path, self._filters, field_paths)
+
+    def stream(self, timeout: Optional[float] = None) -> Iterator[FakeDocumentSnapshot]:
+        self._db.sleep_read()
+        for doc_id, data in self._db.list(self._path):
+            if not all(self._passes(data, f) for f in self._filters):
+                continue
+            if self._fields is not None:
+                data = {key: data[key] for key in self._fields if key in data}
+            yield FakeDocumentSnapshot(doc_id, data)
+
+    def get(self, timeout: Optional[float] = None) -> List[FakeDocumentSnapshot]:
+        return list(self.stream(timeout))
+
+    @staticmethod
+    def _passes(data: Dict[str, Any], condition: Tuple[str, str, Any]) -> bool:
+        field_path, op_string, value = condition
+        if field_path not in data:
+            return False
+        try:
+            return _OPERATORS[op_string](data[field_path], value)
+        except TypeError:
+            return False
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, db: 'FakeFirestore', path: Tuple[str, ...]):
+        super().__init__(db, path)
+
+    @property
+    def id(self) -> str:
+        return self._path[-1]
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(self._db, self._path + (document_id or _auto_id(),))
+
+    def add(self, data: Dict[str, Any], timeout: Optional[float] = None) -> Tuple[datetime, FakeDocumentReference]:
+        ref = self.document()
+        ref.set(data)
+        return datetime.now(timezone.utc), ref
+
+    def on_snapshot(self, callback: Callable[..., None]) -> 'FakeWatch':
+        return self._db.watch(self._path, callback)
+
+
+class FakeWriteBatch:
+    def __init__(self, db: 'FakeFirestore'):
+        self._db = db
+        self._writes: List[Tuple[str, FakeDocumentReference, Dict[str, Any]]] = []
+
+    def set(self, reference: FakeDocumentReference, data: Dict[str, Any], merge: bool = False) -> None:
+        self._writes.append(('merge' if merge else 'set', reference, data))
+
+    def update(self, reference: FakeDocumentReference, fields: Dict[str, Any]) -> None:
+        self._writes.append(('update', reference, fields))
+
+    def commit(self, timeout: Optional[float] = None) -> List[Any]:
+        self._db.sleep_write()
+        events = []
+        # 실제 WriteBatch처럼 한 번에 반영 (update 대상이 없으면 아무것도 쓰지 않음)
+        with self._db.lock:
+            for kind, reference, data in self._writes:
+                if kind == 'update' and self._db.read(reference._path) is None:
+                    raise NotFound(f"No document to update: {reference.path}")
+            for kind, reference, data in self._writes:
+                if kind == 'update':
+                    events.append(self._db.apply_update(reference._path, _resolve_sentinels(data)))
+                else:
+                    events.append(
+                        self._db.apply_write(reference._path, _resolve_sentinels(data), merge=kind == 'merge')
+                    )
+        self._db.dispatch(events)
+        results = [SimpleNamespace(update_time=datetime.now(timezone.utc)) for _ in self._writes]
+        self._writes = []
+        return results
+
+
+class FakeWatch:
+    def __init__(self, db: 'FakeFirestore', path: Tuple[str, ...], callback: Callable[..., None]):
+        self._db = db
+        self._path = path
+        self._callback = callback
+
+    def unsubscribe(self) -> None:
+        self._db.unwatch(self)
+
+    def notify(self, changes: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+        wrapped = [
+            SimpleNamespace(type=SimpleNamespace(name=kind), document=FakeDocumentSnapshot(doc_id, data))
+            for kind, doc_id, data in changes
+        ]
+        self._callback([], wrapped, datetime.now(timezone.utc))
+
+
+class FakeFirestore:
+    """
+    경로(튜플) -> 문서 데이터 딕셔너리로 저장하는 스레드 안전 인메모리 Firestore
+
+    스냅샷 리스너는 등록 시 기존 문서를 ADDED로 한 번 알리고, 이후 쓰기마다 변경분을 알립니다.
+    실제 Firestore처럼 콜백은 저장소 잠금 밖에서 호출합니다. (콜백이 다른 잠금을 잡아도 교착되지 않도록)
+    """
+
+    def __init__(self, read_latency_ms: float = 0.0, write_latency_ms: float = 0.0):
+        self.read_latency_ms = read_latency_ms
+        self.write_latency_ms = write_latency_ms
+        self.lock = threading.RLock()
+        self._documents: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._watches: List[FakeWatch] = []
+        self.reads = 0
+        self.writes = 0
+
+    # ---------- firestore.Client 호환 ----------
+
+    def collection(self, name: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, (name,))
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch(self)
+
+    # ---------- 저장소 ----------
+
+    def sleep_read(self) -> None:
+        self.reads += 1
+        if self.read_latency_ms > 0:
+            time.sleep(self.read_latency_ms / 1000)
+
+    def sleep_write(self) -> None:
+        self.writes += 1
+        if self.write_latency_ms > 0:
+            time.sleep(self.write_latency_ms / 1000)
+
+    def read(self, path: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            data = self._documents.get(path)
+            return copy.deepcopy(data) if data is not None else None
+
+    def list(self, collection_path: Tuple[str, ...]) -> List[Tuple[str, Dict[str, Any]]]:
+        depth = len(collection_path) + 1
+        with self.lock:
+            return [
+                (path[-1], copy.deepcopy(data))
+                for path, data in self._documents.items()
+                if len(path) == depth and path[:-1] == collection_path
+            ]
+
+    def write(self, path: Tuple[str, ...], data: Dict[str, Any], merge: bool = False) -> None:
+        with self.lock:
+            event = self.apply_write(path, data, merge)
+        self.dispatch([event])
+
+    def update(self, path: Tuple[str, ...], fields: Dict[str, Any]) -> None:
+        with self.lock:
+            event = self.apply_update(path, fields)
+        self.dispatch([event])
+
+    def delete(self, path: Tuple[str, ...]) -> None:
+        with self.lock:
+            if self._documents.pop(path, None) is None:
+                return
+            event = (path, 'REMOVED', None)
+        self.dispatch([event])
+
+    def apply_write(self, path: Tuple[str, ...], data: Dict[str, Any], merge: bool = False) -> '_Event':
+        """잠금을 잡은 상태에서 호출 (리스너 알림은 dispatch로 따로)"""
+        existed = path in self._documents
+        if merge and existed:
+            self._documents[path].update(data)
+        else:
+            self._documents[path] = data
+        return path, 'MODIFIED' if existed else 'ADDED', copy.deepcopy(self._documents[path])
+
+    def apply_update(self, path: Tuple[str, ...], fields: Dict[str, Any]) -> '_Event':
+        """잠금을 잡은 상태에서 호출 (리스너 알림은 dispatch로 따로)"""
+        if path not in self._documents:
+            raise NotFound(f"No document to update: {'/'.join(path)}")
+        self._documents[path].update(fields)
+        return path, 'MODIFIED', copy.deepcopy(self._documents[path])
+
+    def dispatch(self, events: Sequence['_Event']) -> None:
+        with self.lock:
+            watches = list(self._watches)
+        for watch in watches:
+            changes = [(kind, path[-1], data) for path, kind, data in events if path[:-1] == watch._path]
+            if changes:
+                watch.notify(changes)
+
+    def watch(self, collection_path: Tuple[str, ...], callback: Callable[..., None]) -> FakeWatch:
+        watch = FakeWatch(self, collection_path, callback)
+        with self.lock:
+            self._watches.append(watch)
+            initial = [('ADDED', doc_id, data) for doc_id, data in self.list(collection_path)]
+        if initial:
+            watch.notify(initial)
+        return watch
+
+    def unwatch(self, watch: FakeWatch) -> None:
+        with self.lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+
+    # ---------- 부하 테스트 보조 ----------
+
+    def seed_food_data(self, foods: Sequence[Dict[str, Any]]) -> None:
+        """foodData 컬렉션 채우기 (각 항목의 'id'를 문서 ID로 사용)"""
+        with self.lock:
+            for food in foods:
+                data = dict(food)
+                doc_id = str(data.pop('id'))
+                self._documents[('foodData', doc_id)] = data
+
+    def count(self, collection_path: Sequence[str]) -> int:
+        return len(self.list(tuple(collection_path)))
@@ -0,0 +1,332 @@
+"""
+부하 테스트용 OpenGraph.io / Gemini 대역 서버
+
+녹화해 둔 응답을 그대로 돌려주며, upstream별로 지연 시간과 오류(5xx)/429 비율을 설정할 수 있습니다.
+서버는 OPENGRAPH_API_BASE_URL, GEMINI_API_BASE_URL을 이 서버 주소로 바꿔서 사용합니다.
+
+사용법 (server 디렉토리에서):
+    python -m benchmarks.fake_upstreams --port 9100 --gemini-latency-ms 1200 --gemini-429-rate 0.05
+    python -m benchmarks.fake_upstreams --dump-recordings recordings.json   # 기본 녹화 파일을 만들어 수정/교체
+
+녹화 파일 형식 (JSON):
+    {"recipes": [{"id": "...", "description": "Gemini 프롬프트에 들어가는 본문",
+                  "opengraph": <opengraph.io site 응답 본문>, "gemini": <generateContent 응답 본문>}]}
+
+OpenGraph 요청은 대상 URL의 해시로 녹화 항목을 고르고, Gemini 요청은 프롬프트에 들어 있는 본문으로 고릅니다.
+(묶음 프롬프트는 본문별 응답 텍스트를 "r0", "r1"... 키의 JSON 객체로 합쳐서 응답)
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from benchmarks.caption_fixtures import CAPTIONS
+
+_SINGLE_PROMPT_BODY = re.compile(r'"""(.*?)"""', re.DOTALL)
+_BATCH_PROMPT_SECTION = re.compile(r'\[r(\d+)\]\n"""(.*?)"""', re.DOTALL)
+# 스트리밍 응답 한 조각의 글자 수
+_STREAM_CHUNK_CHARS = 48
+
+
+@dataclass
+class FaultProfile:
+    """upstream 하나의 응답 지연과 오류 주입 설정"""
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after_seconds: float = 1.0
+
+    def delay(self) -> float:
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def injected_status(self) -> Optional[int]:
+        """이번 요청에 주입할 오류 상태 코드 (없으면 None)"""
+        roll = random.random()
+        if roll < self.throttle_rate:
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            return 503
+        return None
+
+
+def _gemini_body(text: str) -> Dict[str, Any]:
+    return {
+        'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}, 'finishReason': 'STOP'}],
+        'usageMetadata': {'candidatesTokenCount': max(1, len(text) // 3)},
+    }
+
+
+def _gemini_text(body: Dict[str, Any]) -> str:
+    try:
+        return body['candidates'][0]['content']['parts'][0]['text']
+    except (KeyError, IndexError, TypeError):
+        return '[]'
+
+
+def default_recordings() -> Dict[str, Any]:
+    """캡션 픽스처로 만든 기본 녹화 (expected 재료를 Gemini 응답으로 사용)"""
+    recipes = []
+    for fixture in CAPTIONS:
+        caption = fixture['caption']
+        title = caption.split('\n')[0][:60]
+        image = f"https://picsum.photos/seed/{fixture['id']}/640/640"
+        ingredients = [{'name': name, 'amount': None, 'unit': ''} for name in fixture['expected']]
+        recipes.append({
+            'id': fixture['id'],
+            'description': caption,
+            'opengraph': {
+                'hybridGraph': {'title': title, 'description': caption, 'image': image, 'site_name': 'Instagram'},
+                'openGraph': {'title': title, 'description': caption, 'image': image, 'site_name': 'Instagram'},
+            },
+            'gemini': _gemini_body(json.dumps(ingredients, ensure_ascii=False)),
+        })
+    return {'recipes': recipes}
+
+
+class FakeUpstreams:
+    """녹화 응답과 오류 주입 설정, upstream별 응답 통계"""
+
+    def __init__(
+        self,
+        recordings: Dict[str, Any],
+        opengraph: Optional[FaultProfile] = None,
+        gemini: Optional[FaultProfile] = None,
+    ):
+        self.recipes: List[Dict[str, Any]] = recordings['recipes']
+        if not self.recipes:
+            raise ValueError("녹화 파일에 recipes가 비어 있습니다.")
+        self.profiles = {'opengraph': opengraph or FaultProfile(), 'gemini': gemini or FaultProfile()}
+        self._by_description = {
+            recipe.get('description') or recipe['opengraph'].get('hybridGraph', {}).get('description', ''): recipe
+            for recipe in self.recipes
+        }
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {'opengraph': {}, 'gemini': {}}
+
+    def _count(self, upstream: str, key: str) -> None:
+        with self._lock:
+            self._stats[upstream][key] = self._stats[upstream].get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {name: dict(values) for name, values in self._stats.items()}
+
+    async def _inject(self, upstream: str) -> Optional[Response]:
+        """설정된 지연 후, 오류를 주입할 차례면 오류 응답 반환"""
+        profile = self.profiles[upstream]
+        self._count(upstream, 'requests')
+        await asyncio.sleep(profile.delay())
+        status = profile.injected_status()
+        if status is None:
+            return None
+        self._count(upstream, str(status))
+        headers = {'Retry-After': f"{profile.retry_after_seconds:g}"} if status == 429 else {}
+        return JSONResponse({'error': {'code': status, 'message': 'injected by fake_upstreams'}}, status, headers)
+
+    def _gemini_text_for(self, description: str) -> str:
+        recipe = self._by_description.get(description.strip())
+        return _gemini_text(recipe['gemini']) if recipe else '[]'
+
+    def _answer_prompt(self, prompt: str) -> str:
+        sections = _BATCH_PROMPT_SECTION.findall(prompt)
+        if sections:
+            merged = {}
+            for index, description in sections:
+                try:
+                    merged[f"r{index}"] = json.loads(self._gemini_text_for(description))
+                except json.JSONDecodeError:
+                    merged[f"r{index}"] = []
+            return json.dumps(merged, ensure_ascii=False)
+        match = _SINGLE_PROMPT_BODY.search(prompt)
+        return self._gemini_text_for(match.group(1)) if match else '[]'
+
+    # ---------- 라우트 ----------
+
+    async def opengraph_site(self, request: Request) -> Response:
+        failure = await self._inject('opengraph')
+        if failure is not None:
+            return failure
+        target = request.path_params['target']
+        recipe = self.recipes[zlib.crc32(target.encode()) % len(self.recipes)]
+        self._count('opengraph', '200')
+        return JSONResponse(recipe['opengraph'])
+
+    async def gemini_model(self, request: Request) -> Response:
+        resource = request.path_params['resource']
+        body = await request.json()
+        prompt = ''.join(
+            part.get('text', '') for content in body.get('contents', []) for part in content.get('parts', [])
+        )
+        if resource.endswith(':streamGenerateContent'):
+            return await self._gemini_stream(prompt)
+        failure = await self._inject('gemini')
+        if failure is not None:
+            return failure
+        self._count('gemini', '200')
+        return JSONResponse(_gemini_body(self._answer_prompt(prompt)))
+
+    async def _gemini_stream(self, prompt: str) -> Response:
+        profile = self.profiles['gemini']
+        # 지연 시간의 40%는 첫 조각 전에, 나머지는 조각 사이에 나눠서 기다림
+        total_delay = profile.delay()
+        self._count('gemini', 'requests')
+        await asyncio.sleep(total_delay * 0.4)
+        status = profile.injected_status()
+        if status is not None:
+            self._count('gemini', str(status))
+            headers = {'Retry-After': f"{profile.retry_after_seconds:g}"} if status == 429 else {}
+            return JSONResponse({'error': {'code': status}}, status, headers)
+
+        text = self._answer_prompt(prompt)
+        chunks = [text[i:i + _STREAM_CHUNK_CHARS] for i in range(0, len(text), _STREAM_CHUNK_CHARS)] or ['']
+        gap = total_delay * 0.6 / len(chunks)
+
+        async def _events():
+            for chunk in chunks:
+                yield f"data: {json.dumps(_gemini_body(chunk), ensure_ascii=False)}\r\n\r\n"
+                await asyncio.sleep(gap)
+
+        self._count('gemini', '200')
+        return StreamingResponse(_events(), media_type='text/event-stream')
+
+    async def health(self, request: Request) -> Response:
+        return JSONResponse({'status': 'ok'})
+
+    async def stats_endpoint(self, request: Request) -> Response:
+        return JSONResponse(self.stats())
+
+    def app(self) -> Starlette:
+        return Starlette(routes=[
+            Route('/api/1.1/site/{target:path}', self.opengraph_site),
+            Route('/v1/{resource:path}', self.gemini_model, methods=['POST']),
+            Route('/_fake/health', self.health),
+            Route('/_fake/stats', self.stats_endpoint),
+        ])
+
+
+def load_recordings(path: Optional[str]) -> Dict[str, Any]:
+    if not path:
+        return default_recordings()
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+
+def _profile_args(parser: argparse.ArgumentParser, upstream: str, latency_ms: float) -> None:
+    parser.add_argument(f'--{upstream}-latency-ms', type=float, default=latency_ms, help=f'{upstream} 평균 응답 지연(ms)')
+    parser.add_argument(f'--{upstream}-jitter-ms', type=float, default=latency_ms / 4, help=f'{upstream} 지연 편차(ms, 균등 분포)')
+    parser.add_argument(f'--{upstream}-error-rate', type=float, default=0.0, help=f'{upstream} 503 응답 비율 (0~1)')
+    parser.add_argument(f'--{upstream}-429-rate', type=float, default=0.0, help=f'{upstream} 429 응답 비율 (0~1)')
+
+
+def add_fault_arguments(parser: argparse.ArgumentParser) -> None:
+    """upstream별 지연/오류 주입 인자 추가 (load_test도 같은 인자를 그대로 넘김)"""
+    _profile_args(parser, 'opengraph', 800.0)
+    _profile_args(parser, 'gemini', 1500.0)
+    parser.add_argument('--retry-after', type=float, default=1.0, help='429 응답의 Retry-After(초)')
+    parser.add_argument('--recordings', help='녹화 파일 경로 (없으면 캡션 픽스처로 만든 기본 녹화)')
+
+
+def fault_argv(args: argparse.Namespace) -> List[str]:
+    """add_fault_arguments로 받은 인자를 fake_upstreams 명령줄 인자로 변환"""
+    argv = ['--retry-after', str(args.retry_after)]
+    for upstream in ('opengraph', 'gemini'):
+        for option in ('latency_ms', 'jitter_ms', 'error_rate', '429_rate'):
+            value = getattr(args, f'{upstream}_{option}')
+            argv += [f"--{upstream}-{option.replace('_', '-')}", str(value)]
+    if args.recordings:
+        argv += ['--recordings', args.recordings]
+    return argv
+
+
+def _profile(args: argparse.Namespace, upstream: str) -> FaultProfile:
+    return FaultProfile(
+        latency_ms=getattr(args, f'{upstream}_latency_ms'),
+        jitter_ms=getattr(args, f'{upstream}_jitter_ms'),
+        error_rate=getattr(args, f'{upstream}_error_rate'),
+        throttle_rate=getattr(args, f'{upstream}_429_rate'),
+        retry_after_seconds=args.retry_after,
+    )
+
+
+class FakeUpstreamProcess:
+    """
+    대역 서버를 별도 프로세스로 띄우는 컨텍스트 매니저
+
+    측정 대상 서버와 같은 프로세스에서 돌리면 대역 서버의 CPU 사용이 측정 결과에 섞이므로 분리합니다.
+    """
+
+    def __init__(self, port: int, argv: List[str], host: str = '127.0.0.1', startup_timeout: float = 15.0):
+        self.base_url = f"http://{host}:{port}"
+        self._command = [sys.executable, '-m', 'benchmarks.fake_upstreams', '--host', host, '--port', str(port), *argv]
+        self._startup_timeout = startup_timeout
+        self._process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> 'FakeUpstreamProcess':
+        self._process = subprocess.Popen(self._command, cwd=Path(__file__).resolve().parent.parent)
+        deadline = time.monotonic() + self._startup_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f"fake_upstreams가 시작하지 못했습니다. (exit={self._process.returncode})")
+            try:
+                if httpx.get(f"{self.base_url}/_fake/health", timeout=0.5).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.1)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f"fake_upstreams가 {self._startup_timeout:.0f}초 안에 준비되지 않았습니다.")
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return httpx.get(f"{self.base_url}/_fake/stats", timeout=5).json()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+        self._process = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--dump-recordings', metavar='PATH', help='기본 녹화를 파일로 저장하고 종료')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    if args.dump_recordings:
+        Path(args.dump_recordings).write_text(
+            json.dumps(default_recordings(), ensure_ascii=False, indent=2), encoding='utf-8'
+        )
+        print(f"기본 녹화 저장: {args.dump_recordings}")
+        return
+
+    import uvicorn
+
+    upstreams = FakeUpstreams(load_recordings(args.recordings), _profile(args, 'opengraph'), _profile(args, 'gemini'))
+    print(f"fake upstreams: http://{args.host}:{args.port} (OPENGRAPH_API_BASE_URL, GEMINI_API_BASE_URL로 사용)")
+    uvicorn.run(upstreams.app(), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+/extract 오프라인 부하 테스트
+
+OpenGraph.io와 Gemini는 녹화 응답을 돌려주는 대역 서버(benchmarks.fake_upstreams, 별도 프로세스),
+Firestore는 인메모리 대역(benchmarks.fake_firestore) 또는 에뮬레이터를 사용하므로 유료 API를 호출하지 않습니다.
+정해진 동시성으로 요청을 보내 지연 시간 p50/p95/p99, 초당 처리량, 응답의 단계별 소요 시간(timings),
+upstream 응답/폴백 횟수(/metrics 전후 차이)를 출력합니다.
+
+사용법 (server 디렉토리에서):
+    python -m benchmarks.load_test --requests 500 --concurrency 32
+    python -m benchmarks.load_test --concurrency 1,8,32,64 --gemini-429-rate 0.05 --opengraph-error-rate 0.02
+    python -m benchmarks.load_test --no-local-extract --catalog-size 20000    # 모든 캡션을 Gemini 경로로
+    python -m benchmarks.load_test --endpoint /extract/stream
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python -m benchmarks.load_test --firestore emulator
+
+따로 띄운 서버(멀티 워커 등)를 측정할 때는 대역 서버 주소로 서버를 먼저 띄운 뒤 --target을 줍니다.
+    OPENGRAPH_API_BASE_URL=http://127.0.0.1:9100 GEMINI_API_BASE_URL=http://127.0.0.1:9100 \\
+        OPENGRAPH_API_KEY=bench GEMINI_API_KEY=bench HTML_FETCH_ENABLED=false python main.py
+    python -m benchmarks.load_test --target http://127.0.0.1:8000 --fakes-port 9100
+
+같은 프로세스 모드(기본)는 부하 발생기와 서버가 한 이벤트 루프를 나눠 쓰므로,
+절대 처리량보다는 변경 전후 비교에 사용하세요.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.caption_fixtures import synthetic_food_catalog
+from benchmarks.fake_upstreams import FakeUpstreamProcess, add_fault_arguments, fault_argv
+from benchmarks.stats import format_summary, summarize
+
+# /metrics에서 실행 전후 차이를 볼 카운터
+_COUNTER_NAMES = {
+    'recipe_extraction_fallbacks_total': 'fallback',
+    'recipe_upstream_responses_total': 'upstream',
+    'recipe_caption_tokens_total': 'caption_tokens',
+    'recipe_gemini_parses_total': 'gemini_parse',
+}
+_COUNTER_LINE = re.compile(r'^(' + '|'.join(_COUNTER_NAMES) + r')\{(.*)\} ([0-9.e+]+)$')
+_BENCH_UID = 'bench-user'
+
+
+@dataclass
+class Sample:
+    latency_ms: float
+    status: int
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def _configure_in_process(args: argparse.Namespace, fakes_url: str, workdir: str) -> None:
+    """
+    서비스 모듈을 import하기 전에 설정을 대역 서버/임시 디렉토리로 바꿈
+
+    FoodCatalog 등은 생성자 기본값으로 설정을 읽으므로 반드시 main import 전에 호출해야 합니다.
+    """
+    from config import settings
+
+    settings.OPENGRAPH_API_BASE_URL = fakes_url
+    settings.GEMINI_API_BASE_URL = fakes_url
+    settings.OPENGRAPH_API_KEY = settings.OPENGRAPH_API_KEY or 'bench'
+    settings.GEMINI_API_KEY = settings.GEMINI_API_KEY or 'bench'
+    # 레시피 페이지 직접 조회는 실제 인터넷으로 나가므로 끄고 OpenGraph 대역만 사용
+    settings.HTML_FETCH_ENABLED = False
+    # 같은 캡션이 반복되므로 LLM 응답 캐시를 켜 두면 Gemini 경로를 측정할 수 없음
+    settings.LLM_CACHE_ENABLED = args.llm_cache
+    settings.LOCAL_EXTRACT_ENABLED = not args.no_local_extract
+    settings.SHARED_CACHE_ENABLED = False
+    settings.EXTRACTION_CACHE_BACKEND = 'memory'
+    # 매 실행이 Firestore(대역)에서 카탈로그를 적재하도록 스냅샷 파일은 쓰지 않음
+    settings.FOOD_CATALOG_SNAPSHOT_ENABLED = False
+    settings.LLM_CACHE_PATH = os.path.join(workdir, 'llm_cache.sqlite3')
+    settings.EXTRACTION_CACHE_PATH = os.path.join(workdir, 'extraction_cache.sqlite3')
+    settings.EXTRACTION_JOB_DB_PATH = os.path.join(workdir, 'extraction_jobs.sqlite3')
+
+
+def _install_firestore(args: argparse.Namespace):
+    """firebase_config.get_firestore_client를 대역/에뮬레이터 클라이언트로 교체하고 foodData 채우기"""
+    import firebase_config
+
+    foods = synthetic_food_catalog(args.catalog_size)
+    if args.firestore == 'memory':
+        from benchmarks.fake_firestore import FakeFirestore
+
+        db = FakeFirestore(read_latency_ms=args.firestore_read_ms, write_latency_ms=args.firestore_write_ms)
+        db.seed_food_data(foods)
+    else:
+        if not os.getenv('FIRESTORE_EMULATOR_HOST'):
+            raise SystemExit("--firestore emulator는 FIRESTORE_EMULATOR_HOST 환경 변수가 필요합니다.")
+        from google.cloud import firestore as gcloud_firestore
+
+        # 에뮬레이터 주소가 있으면 익명 인증으로 접속 (서비스 계정 키 불필요)
+        db = gcloud_firestore.Client(project=os.getenv('GOOGLE_CLOUD_PROJECT', 'rotten-recipe-bench'))
+        for start in range(0, len(foods), 500):
+            batch = db.batch()
+            for food in foods[start:start + 500]:
+                data = dict(food)
+                batch.set(db.collection('foodData').document(data.pop('id')), data)
+            batch.commit()
+    firebase_config.get_firestore_client = lambda: db
+    return db
+
+
+@asynccontextmanager
+async def _in_process_client(log_level: str) -> AsyncIterator[httpx.AsyncClient]:
+    """lifespan을 실행한 FastAPI 앱에 ASGI로 직접 요청하는 클라이언트"""
+    from main import app
+
+    # main import 시 INFO로 설정된 로깅을 낮춤 (요청마다 남는 로그가 측정에 섞이지 않도록)
+    logging.getLogger().setLevel(log_level.upper())
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            yield client
+
+
+@asynccontextmanager
+async def _remote_client(target: str) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=target, timeout=None, limits=limits) as client:
+        yield client
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, url: str) -> Sample:
+    body = {'url': url, 'uid': _BENCH_UID}
+    started = time.perf_counter()
+    try:
+        resp = await client.post(endpoint, json=body)
+        latency_ms = (time.perf_counter() - started) * 1000
+    except httpx.HTTPError as e:
+        return Sample((time.perf_counter() - started) * 1000, 0, error=str(e) or type(e).__name__)
+
+    if resp.status_code != 200:
+        return Sample(latency_ms, resp.status_code, error=resp.text[:200])
+    if endpoint == '/extract/stream':
+        # 마지막 done/error 이벤트에 결과와 timings가 들어 있음
+        events = [json.loads(line) for line in resp.text.splitlines() if line.strip()]
+        final = events[-1] if events else {}
+        if final.get('type') != 'done':
+            return Sample(latency_ms, 200, error=str(final.get('error') or 'done 이벤트 없음'))
+        return Sample(latency_ms, 200, final.get('timings') or {})
+    return Sample(latency_ms, 200, resp.json().get('timings') or {})
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    urls: List[str],
+    concurrency: int
+) -> Tuple[List[Sample], float]:
+    """concurrency개 작업자가 urls를 나눠 보내고 (샘플, 전체 소요 시간 초) 반환"""
+    pending = iter(urls)
+    samples: List[Sample] = []
+
+    async def _worker() -> None:
+        for url in pending:
+            samples.append(await _send(client, endpoint, url))
+
+    started = time.perf_counter()
+    await asyncio.gather(*[_worker() for _ in range(concurrency)])
+    return samples, time.perf_counter() - started
+
+
+async def _scrape_counters(client: httpx.AsyncClient) -> Dict[str, float]:
+    resp = await client.get('/metrics')
+    counters = {}
+    for line in resp.text.splitlines():
+        match = _COUNTER_LINE.match(line)
+        if match:
+            name = _COUNTER_NAMES[match.group(1)]
+            labels = ','.join(value for value in re.findall(r'="([^"]*)"', match.group(2)))
+            counters[f"{name} {labels}"] = float(match.group(3))
+    return counters
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 60.0) -> None:
+    """/ready가 200이 될 때까지 대기 (워밍업 중인 서버에 보낸 요청이 측정에 섞이지 않도록)"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            resp = await client.get('/ready')
+            if resp.status_code == 200:
+                print(f"서버 준비 완료: {resp.json().get('ready_after_ms')}ms")
+                return
+        except httpx.HTTPError:
+            pass
+        if time.perf_counter() > deadline:
+            raise SystemExit(f"서버가 {timeout:.0f}초 안에 준비되지 않았습니다. (/ready)")
+        await asyncio.sleep(0.1)
+
+
+def _report(
+    concurrency: int,
+    samples: List[Sample],
+    wall_seconds: float,
+    counters: Dict[str, float],
+    fake_stats: Dict[str, Dict[str, int]]
+) -> Dict[str, Any]:
+    ok = [s for s in samples if s.status == 200 and s.error is None]
+    errors: Dict[str, int] = {}
+    for s in samples:
+        if s.status != 200 or s.error is not None:
+            key = str(s.status) if s.status else 'transport'
+            errors[key] = errors.get(key, 0) + 1
+
+    stage_values: Dict[str, List[float]] = {}
+    for s in ok:
+        for stage, ms in s.timings.items():
+            stage_values.setdefault(stage, []).append(ms)
+
+    print(f"\n=== concurrency={concurrency} requests={len(samples)} ok={len(ok)} errors={errors or 0}")
+    print(f"처리량 {len(samples) / wall_seconds:.1f} req/s (성공 {len(ok) / wall_seconds:.1f} req/s), 소요 {wall_seconds:.1f}s")
+    print(f"{'':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    print(format_summary('latency', [s.latency_ms for s in samples]))
+    for stage in sorted(stage_values, key=lambda name: (name == 'total', name)):
+        print(format_summary(f"  {stage}", stage_values[stage]))
+    for upstream, values in sorted(fake_stats.items()):
+        print(f"대역 {upstream}: " + ', '.join(f"{k}={v}" for k, v in sorted(values.items())))
+    if counters:
+        print("메트릭 변화: " + ', '.join(f"{k}={v:g}" for k, v in sorted(counters.items())))
+
+    return {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'ok': len(ok),
+        'errors': errors,
+        'requests_per_second': len(samples) / wall_seconds,
+        'latency_ms': summarize([s.latency_ms for s in samples]),
+        'stages_ms': {stage: summarize(values) for stage, values in stage_values.items()},
+        'upstream_requests': fake_stats,
+        'counters': counters,
+    }
+
+
+def _diff(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {key: value - before.get(key, 0) for key, value in after.items() if value != before.get(key, 0)}
+
+
+async def run(args: argparse.Namespace, fakes: FakeUpstreamProcess) -> List[Dict[str, Any]]:
+    levels = [int(level) for level in str(args.concurrency).split(',') if level.strip()]
+    # 요청마다 다른 게시물 URL을 써서 추출 캐시/동시 요청 합류 없이 매번 전체 경로를 타도록 함
+    # (--url-pool을 주면 그 개수의 URL을 돌려 써서 캐시 적중 상황을 측정)
+    counter = itertools.count()
+
+    def _next_urls(count: int) -> List[str]:
+        numbers = [next(counter) for _ in range(count)]
+        if args.url_pool:
+            numbers = [n % args.url_pool for n in numbers]
+        return [f"https://www.instagram.com/p/bench{n:07d}/" for n in numbers]
+
+    client_context = _remote_client(args.target) if args.target else _in_process_client(args.log_level)
+    results = []
+    async with client_context as client:
+        await _wait_ready(client)
+        if args.warmup:
+            await _drive(client, args.endpoint, _next_urls(args.warmup), min(args.warmup, max(levels)))
+        for concurrency in levels:
+            counters_before = await _scrape_counters(client)
+            fake_before = fakes.stats()
+            samples, wall_seconds = await _drive(client, args.endpoint, _next_urls(args.requests), concurrency)
+            counters = _diff(counters_before, await _scrape_counters(client))
+            fake_after = fakes.stats()
+            fake_stats = {name: _diff(fake_before.get(name, {}), values) for name, values in fake_after.items()}
+            results.append(_report(concurrency, samples, wall_seconds, counters, fake_stats))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=200, help='동시성 단계마다 보낼 요청 수')
+    parser.add_argument('--concurrency', default='16', help='동시 요청 수 (쉼표로 여러 단계 지정, 예: 1,8,32)')
+    parser.add_argument('--warmup', type=int, default=5, help='측정 전에 보낼 요청 수 (카탈로그 적재 등)')
+    parser.add_argument('--endpoint', choices=('/extract', '/extract/stream'), default='/extract')
+    parser.add_argument('--url-pool', type=int, default=0, help='돌려 쓸 게시물 URL 수 (0이면 요청마다 새 URL)')
+    parser.add_argument('--target', help='따로 띄운 서버 주소 (없으면 같은 프로세스에서 앱 실행)')
+    parser.add_argument('--fakes-port', type=int, default=9100, help='대역 서버 포트')
+    parser.add_argument('--firestore', choices=('memory', 'emulator'), default='memory')
+    parser.add_argument('--firestore-read-ms', type=float, default=0.0, help='인메모리 Firestore 읽기 지연(ms)')
+    parser.add_argument('--firestore-write-ms', type=float, default=30.0, help='인메모리 Firestore 쓰기 지연(ms)')
+    parser.add_argument('--catalog-size', type=int, default=2000, help='foodData 항목 수')
+    parser.add_argument('--no-local-extract', action='store_true', help='규칙 기반 추출을 끄고 모두 Gemini 경로로')
+    parser.add_argument('--llm-cache', action='store_true', help='Gemini 응답 캐시 사용 (기본은 끔)')
+    parser.add_argument('--json', metavar='PATH', help='결과를 JSON 파일로도 저장')
+    parser.add_argument('--log-level', default='WARNING', help='서버 로그 수준 (기본 WARNING)')
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='recipe-bench-') as workdir, \
+            FakeUpstreamProcess(args.fakes_port, fault_argv(args)) as fakes:
+        if not args.target:
+            _configure_in_process(args, fakes.base_url, workdir)
+            _install_firestore(args)
+        results = asyncio.run(run(args, fakes))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
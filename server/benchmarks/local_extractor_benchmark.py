@@ -0,0 +1,135 @@
+"""
+규칙 기반 재료 추출기와 Gemini 경로 비교 벤치마크
+
+사용법 (server 디렉토리에서):
+    python -m benchmarks.local_extractor_benchmark              # 규칙 기반 추출만 측정
+    python -m benchmarks.local_extractor_benchmark --llm        # Gemini 경로도 호출해 비교 (GEMINI_API_KEY 필요)
+    python -m benchmarks.local_extractor_benchmark --firestore  # 픽스처 대신 실제 foodData 카탈로그 사용
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from config import settings
+from benchmarks.caption_fixtures import CAPTIONS, FIXTURE_FOOD_NAMES
+from benchmarks.stats import percentile
+from services.ingredient_matcher import IngredientMatcher
+from services.local_extractor import LocalIngredientExtractor
+
+
+def _build_matcher(use_firestore: bool) -> IngredientMatcher:
+    if use_firestore:
+        from services.food_catalog import get_food_catalog
+        from services.ingredient_matcher import get_ingredient_matcher
+        return get_ingredient_matcher(get_food_catalog())
+    foods = [{'id': str(i), 'name': name, 'category': ''} for i, name in enumerate(FIXTURE_FOOD_NAMES)]
+    return IngredientMatcher(foods, version=0)
+
+
+def _matched_names(matcher: IngredientMatcher, raw_ingredients: Optional[List[Dict[str, Any]]]) -> Set[str]:
+    return {item['standard_name'] for item in matcher.match_ingredients(raw_ingredients or [])}
+
+
+def _recall(found: Set[str], expected: Set[str]) -> float:
+    return len(found & expected) / len(expected) if expected else 1.0
+
+
+def _precision(found: Set[str], expected: Set[str]) -> float:
+    return len(found & expected) / len(found) if found else 1.0
+
+
+async def _call_llm(description: str) -> Optional[List[Dict[str, Any]]]:
+    from services.gemini_service import extract_raw_ingredients_with_gemini
+    return await extract_raw_ingredients_with_gemini(description)
+
+
+async def run(use_llm: bool, use_firestore: bool, repeat: int) -> None:
+    matcher = _build_matcher(use_firestore)
+    extractor = LocalIngredientExtractor(
+        min_confidence=settings.LOCAL_EXTRACT_MIN_CONFIDENCE,
+        match_cutoff=settings.LOCAL_EXTRACT_MATCH_CUTOFF,
+    )
+
+    rows = []
+    local_times: List[float] = []
+    llm_times: List[float] = []
+    for fixture in CAPTIONS:
+        caption = fixture['caption']
+        expected = set(fixture['expected'])
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            analysis = extractor.analyze(caption, matcher)
+        local_ms = (time.perf_counter() - started) * 1000 / repeat
+        local_times.append(local_ms)
+
+        served = analysis.confidence >= settings.LOCAL_EXTRACT_MIN_CONFIDENCE
+        local_names = _matched_names(matcher, analysis.ingredients)
+        row = {
+            'id': fixture['id'],
+            'confidence': analysis.confidence,
+            'served': served,
+            'local_ms': local_ms,
+            'local_recall': _recall(local_names, expected),
+            'local_precision': _precision(local_names, expected),
+        }
+
+        if use_llm:
+            started = time.perf_counter()
+            llm_raw = await _call_llm(caption)
+            llm_ms = (time.perf_counter() - started) * 1000
+            llm_times.append(llm_ms)
+            llm_names = _matched_names(matcher, llm_raw)
+            row.update({
+                'llm_ms': llm_ms,
+                'llm_recall': _recall(llm_names, expected),
+                'agreement': _recall(local_names, llm_names) if llm_names else None,
+            })
+        rows.append(row)
+
+    header = f"{'caption':<22} {'conf':>5} {'local':>6} {'local_ms':>9} {'recall':>7} {'prec':>6}"
+    if use_llm:
+        header += f" {'llm_ms':>9} {'llm_rec':>8} {'agree':>6}"
+    print(header)
+    for row in rows:
+        line = (
+            f"{row['id']:<22} {row['confidence']:>5.2f} {'yes' if row['served'] else 'no':>6} "
+            f"{row['local_ms']:>9.3f} {row['local_recall']:>7.2f} {row['local_precision']:>6.2f}"
+        )
+        if use_llm:
+            agreement = '-' if row['agreement'] is None else f"{row['agreement']:.2f}"
+            line += f" {row['llm_ms']:>9.1f} {row['llm_recall']:>8.2f} {agreement:>6}"
+        print(line)
+
+    served_rows = [row for row in rows if row['served']]
+    print()
+    print(f"로컬 처리: {len(served_rows)}/{len(rows)}개 캡션 (신뢰도 기준 {settings.LOCAL_EXTRACT_MIN_CONFIDENCE})")
+    if served_rows:
+        print(
+            f"로컬 처리 캡션 평균 recall={statistics.mean(r['local_recall'] for r in served_rows):.2f}, "
+            f"precision={statistics.mean(r['local_precision'] for r in served_rows):.2f}"
+        )
+    print(f"규칙 기반 추출 p50={percentile(local_times, 50):.3f}ms, p95={percentile(local_times, 95):.3f}ms")
+    if llm_times:
+        print(f"Gemini 경로 p50={percentile(llm_times, 50):.1f}ms, p95={percentile(llm_times, 95):.1f}ms")
+        saved_ms = sum(row['llm_ms'] - row['local_ms'] for row in served_rows)
+        print(f"로컬 처리로 절약된 Gemini 대기 시간 합계: {saved_ms:.0f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--llm', action='store_true', help='Gemini 경로도 호출해 지연 시간과 결과를 비교')
+    parser.add_argument('--firestore', action='store_true', help='실제 foodData 카탈로그 사용')
+    parser.add_argument('--repeat', type=int, default=200, help='규칙 기반 추출 반복 측정 횟수')
+    args = parser.parse_args()
+
+    if args.llm:
+        # 응답 캐시에 적중하면 Gemini 지연 시간을 측정할 수 없으므로 비활성화
+        settings.LLM_CACHE_ENABLED = False
+    asyncio.run(run(args.llm, args.firestore, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
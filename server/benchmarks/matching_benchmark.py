@@ -0,0 +1,117 @@
+"""
+재료 매칭(foodData 카탈로그 매칭 인덱스) 마이크로 벤치마크
+
+extract_recipe의 match 단계(스트리밍/배치 경로 포함)가 하는 일(matcher.match_ingredients)을
+카탈로그 크기별로 측정합니다. 인덱스 빌드 시간(딕셔너리 목록 / 압축 카탈로그), 재료 목록 하나당 매칭 시간,
+재료명 종류(정확히 일치 / 변형 / 카탈로그에 없음)별 조회 시간을 출력합니다.
+
+사용법 (server 디렉토리에서):
+    python -m benchmarks.matching_benchmark                          # 100, 1k, 10k, 100k
+    python -m benchmarks.matching_benchmark --sizes 1000,50000 --repeat 50
+    python -m benchmarks.matching_benchmark --baseline               # difflib.get_close_matches와 시간/결과 비교
+"""
+import argparse
+import difflib
+import pickle
+import time
+from typing import Callable, Dict, List
+
+from benchmarks.caption_fixtures import CAPTIONS, synthetic_food_catalog
+from benchmarks.stats import format_summary
+from services.catalog_snapshot import CompactCatalog
+from services.ingredient_matcher import DEFAULT_CUTOFF, IngredientMatcher
+
+# 변형 재료명: Gemini가 텍스트에 나온 그대로 돌려주는 수식어 붙은 이름
+_VARIANT_PREFIXES = ('다진 ', '국산 ', '손질된 ', '냉동 ')
+# 카탈로그에 없는 재료명
+_MISSING_NAMES = ('트러플오일', '스테비아', '할라피뇨', '사워크림', '리코타', '타임', '로즈마리', '와사비')
+
+
+def _raw_ingredient_lists() -> List[List[Dict[str, object]]]:
+    """캡션 픽스처마다 Gemini 응답 형태의 원본 재료 목록 (정확한 이름, 변형, 없는 이름 섞음)"""
+    lists = []
+    for i, fixture in enumerate(CAPTIONS):
+        names = list(fixture['expected'])
+        names += [_VARIANT_PREFIXES[j % len(_VARIANT_PREFIXES)] + name for j, name in enumerate(names[:3])]
+        names.append(_MISSING_NAMES[i % len(_MISSING_NAMES)])
+        lists.append([{'name': name, 'amount': 1, 'unit': '개'} for name in names])
+    return lists
+
+
+def _time_ms(func: Callable[[], object], repeat: int = 1) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def _name_kinds(lists: List[List[Dict[str, object]]]) -> Dict[str, List[str]]:
+    exact, variant, missing = [], [], []
+    for items in lists:
+        for item in items:
+            name = str(item['name'])
+            if name in _MISSING_NAMES:
+                missing.append(name)
+            elif name.startswith(_VARIANT_PREFIXES):
+                variant.append(name)
+            else:
+                exact.append(name)
+    return {'exact': exact, 'variant': variant, 'missing': missing}
+
+
+def run(sizes: List[int], repeat: int, baseline: bool) -> None:
+    lists = _raw_ingredient_lists()
+    kinds = _name_kinds(lists)
+    print(f"재료 목록 {len(lists)}개, 재료명 {sum(len(items) for items in lists)}개 "
+          f"(정확 {len(kinds['exact'])}, 변형 {len(kinds['variant'])}, 없음 {len(kinds['missing'])}), 반복 {repeat}회")
+
+    for size in sizes:
+        foods = synthetic_food_catalog(size)
+        compact = CompactCatalog.from_foods(foods)
+
+        build_dicts_ms = _time_ms(lambda: IngredientMatcher(foods, version=0))
+        build_compact_ms = _time_ms(lambda: IngredientMatcher(compact, version=0))
+        matcher = IngredientMatcher(compact, version=0)
+        pickled_kb = len(pickle.dumps(matcher, protocol=pickle.HIGHEST_PROTOCOL)) / 1024
+
+        print(f"\n=== catalog size={size:,}")
+        print(f"인덱스 빌드: 딕셔너리 목록 {build_dicts_ms:.1f}ms, 압축 카탈로그 {build_compact_ms:.1f}ms, "
+              f"pickle {pickled_kb:,.0f}KB, 압축 카탈로그 {compact.nbytes / 1024:,.0f}KB")
+        print(f"{'':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+
+        per_list = [
+            _time_ms(lambda items=items: matcher.match_ingredients(items)) for items in lists for _ in range(repeat)
+        ]
+        print(format_summary('match_ingredients', per_list, width=20, digits=3))
+        for kind, names in kinds.items():
+            per_name = [_time_ms(lambda name=name: matcher.best_match(name)) for name in names for _ in range(repeat)]
+            print(format_summary(f"  best_match/{kind}", per_name, width=20, digits=3))
+
+        if baseline:
+            names = [food['name'] for food in foods]
+            all_names = [str(item['name']) for items in lists for item in items]
+            disagreements = sum(
+                (difflib.get_close_matches(name, names, n=1, cutoff=DEFAULT_CUTOFF) or [None])[0]
+                != matcher.best_match(name)
+                for name in all_names
+            )
+            per_name = [
+                _time_ms(lambda name=name: difflib.get_close_matches(name, names, n=1, cutoff=DEFAULT_CUTOFF))
+                for name in all_names
+            ]
+            print(format_summary('  difflib', per_name, width=20, digits=3) + f"  (결과 불일치 {disagreements}개)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,1000,10000,100000', help='카탈로그 크기 (쉼표로 구분)')
+    parser.add_argument('--repeat', type=int, default=20, help='측정 반복 횟수')
+    parser.add_argument(
+        '--baseline', action='store_true', help='difflib.get_close_matches 전체 탐색과 비교 (큰 카탈로그는 느림)'
+    )
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(',') if size.strip()], args.repeat, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
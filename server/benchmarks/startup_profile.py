@@ -0,0 +1,137 @@
+"""
+서버 콜드 스타트 측정
+
+1) `python -X importtime -c "import main"`을 새 프로세스로 실행해 main import에 걸린 시간과
+   누적 import 시간이 큰 모듈을 출력합니다. (어떤 SDK를 지연 import해야 하는지 찾을 때 사용)
+2) --serve를 주면 `python main.py`로 서버를 띄워 / (liveness)와 /ready (readiness)가
+   200을 반환하기까지 걸린 시간과 /ready의 단계별 준비 시간을 출력합니다.
+   (실제 Firebase 인증 정보가 있는 환경에서 사용. 준비가 끝나지 않으면 --timeout 후 종료)
+
+사용법 (server 디렉토리에서):
+    python -m benchmarks.startup_profile                    # import 시간 프로파일 (3회 실행 중앙값)
+    python -m benchmarks.startup_profile --top 30 --runs 5
+    python -m benchmarks.startup_profile --serve --port 8010
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.stats import percentile
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+
+# "import time:       self [us] |  cumulative | imported package"
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def _import_profile() -> Tuple[float, Dict[str, Tuple[float, int]]]:
+    """새 프로세스에서 main을 import하고 (전체 ms, 모듈 -> (누적 ms, 들여쓰기 깊이)) 반환"""
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'],
+        cwd=SERVER_DIR, capture_output=True, text=True, check=True,
+    )
+    modules: Dict[str, Tuple[float, int]] = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            depth = (len(match.group(3)) - 1) // 2
+            modules[match.group(4)] = (int(match.group(2)) / 1000, depth)
+    return modules.get('main', (0.0, 0))[0], modules
+
+
+def profile_imports(runs: int, top: int) -> None:
+    totals: List[float] = []
+    profiles: List[Dict[str, Tuple[float, int]]] = []
+    for _ in range(runs):
+        total_ms, modules = _import_profile()
+        totals.append(total_ms)
+        profiles.append(modules)
+
+    print(f"import main: 중앙값 {percentile(totals, 50):.0f}ms (실행 {runs}회: "
+          f"{', '.join(f'{ms:.0f}' for ms in totals)}ms)")
+
+    # main이 직접/간접으로 불러온 최상위 패키지별 누적 시간 (depth 1 = main이 직접 import한 모듈)
+    names = set().union(*profiles)
+    medians = {
+        name: percentile([profile[name][0] for profile in profiles if name in profile], 50) for name in names
+    }
+    depth = {name: min(profile[name][1] for profile in profiles if name in profile) for name in names}
+    direct = sorted((name for name in names if depth[name] == 1), key=lambda name: -medians[name])
+    print("\nmain이 직접 import한 모듈 (누적 ms)")
+    for name in direct[:top]:
+        print(f"  {medians[name]:>8.1f}  {name}")
+
+    heaviest = sorted((name for name in names if name != 'main'), key=lambda name: -medians[name])
+    print(f"\n누적 import 시간 상위 {top}개 (ms, 들여쓰기 깊이)")
+    for name in heaviest[:top]:
+        print(f"  {medians[name]:>8.1f}  {'  ' * depth[name]}{name}")
+
+
+def _poll(client: httpx.Client, path: str) -> Optional[httpx.Response]:
+    try:
+        return client.get(path)
+    except httpx.HTTPError:
+        return None
+
+
+def _ms(value: Optional[float]) -> str:
+    return f"{value:.0f}ms" if value is not None else '-'
+
+
+def profile_serve(port: int, timeout: float) -> None:
+    env = dict(os.environ, SERVER_PORT=str(port), SERVER_HOST='127.0.0.1', SERVER_WORKERS='1', DEBUG='false')
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, 'main.py'], cwd=SERVER_DIR, env=env)
+    live_ms = ready_ms = None
+    body = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - started < timeout and proc.poll() is None:
+                if live_ms is None:
+                    resp = _poll(client, '/')
+                    if resp is not None and resp.status_code == 200:
+                        live_ms = (time.perf_counter() - started) * 1000
+                if live_ms is not None:
+                    resp = _poll(client, '/ready')
+                    if resp is not None:
+                        body = resp.json()
+                        if resp.status_code == 200:
+                            ready_ms = (time.perf_counter() - started) * 1000
+                            break
+                time.sleep(0.05)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+    print(f"\n프로세스 시작 -> / 200: {_ms(live_ms) if live_ms is not None else '실패'}")
+    print(f"프로세스 시작 -> /ready 200: {_ms(ready_ms) if ready_ms is not None else '시간 초과'}")
+    if body:
+        print(f"import {_ms(body.get('import_ms'))}, lifespan 시작 후 준비 {_ms(body.get('ready_after_ms'))}")
+        for name, step in body.get('steps', {}).items():
+            error = f", error={step['error']}" if step.get('error') else ''
+            print(f"  {name:<10} {step['status']:<8} {_ms(step['duration_ms']):>10} (시도 {step['attempts']}회{error})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='import 측정 반복 횟수')
+    parser.add_argument('--top', type=int, default=15, help='출력할 모듈 수')
+    parser.add_argument('--serve', action='store_true', help='서버를 띄워 / 와 /ready까지 걸린 시간 측정')
+    parser.add_argument('--port', type=int, default=8010, help='--serve로 띄울 서버 포트')
+    parser.add_argument('--timeout', type=float, default=60.0, help='--serve에서 /ready를 기다릴 최대 시간(초)')
+    args = parser.parse_args()
+
+    profile_imports(args.runs, args.top)
+    if args.serve:
+        profile_serve(args.port, args.timeout)
+
+
+if __name__ == '__main__':
+    main()
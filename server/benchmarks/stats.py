@@ -0,0 +1,31 @@
+"""벤치마크 결과 집계용 백분위 계산"""
+from typing import Dict, List, Sequence
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """nearest-rank 방식 백분위 (값이 없으면 0)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/max/평균"""
+    values = list(values)
+    return {
+        'count': len(values),
+        'p50': percentile(values, 50),
+        'p95': percentile(values, 95),
+        'p99': percentile(values, 99),
+        'max': max(values) if values else 0.0,
+        'mean': sum(values) / len(values) if values else 0.0,
+    }
+
+
+def format_summary(label: str, values: List[float], width: int = 14, digits: int = 1) -> str:
+    """'label  count  p50  p95  p99  max' 한 줄 (ms 단위 값, 소수점 digits자리)"""
+    s = summarize(values)
+    columns = ' '.join(f"{s[key]:>9.{digits}f}" for key in ('p50', 'p95', 'p99', 'max'))
+    return f"{label:<{width}} {s['count']:>6} {columns}"
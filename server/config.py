@@ -1,3 +1,4 @@
+import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -12,6 +13,11 @@ class Settings(BaseSettings):
     # 2. 환경 변수에서 값을 읽어옵니다. (공백 제거 - 403 등 오류 방지)
     OPENGRAPH_API_KEY: str = (os.getenv("OPENGRAPH_API_KEY", "") or "").strip()
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    # 외부 API 주소 (부하 테스트 시 benchmarks/fake_upstreams.py 같은 로컬 대역 서버로 바꿔서 사용)
+    OPENGRAPH_API_BASE_URL: str = os.getenv("OPENGRAPH_API_BASE_URL", "https://opengraph.io").rstrip("/")
+    GEMINI_API_BASE_URL: str = os.getenv(
+        "GEMINI_API_BASE_URL", "https://generativelanguage.googleapis.com"
+    ).rstrip("/")
     FIREBASE_CREDENTIALS_PATH: str = os.getenv("FIREBASE_CREDENTIALS_PATH", "serviceAccountKey.json")
     
     # 서버 설정
@@ -19,27 +25,161 @@ class Settings(BaseSettings):
     SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
 
+    # 콜드 스타트 설정: 서버 시작 직후 Firebase/HTTP 커넥션/foodData 카탈로그를 백그라운드로 미리 준비하고,
+    # 모두 끝나야 /ready가 200을 반환합니다. (실패한 단계는 재시도 간격마다 다시 시도)
+    STARTUP_WARMUP_ENABLED: bool = os.getenv("STARTUP_WARMUP_ENABLED", "true").lower() == "true"
+    STARTUP_PRECONNECT_ENABLED: bool = os.getenv("STARTUP_PRECONNECT_ENABLED", "true").lower() == "true"
+    STARTUP_WARMUP_RETRY_SECONDS: float = float(os.getenv("STARTUP_WARMUP_RETRY_SECONDS", "5"))
+
+    # 멀티 워커 설정: 워커가 2개 이상이면 foodData 스냅샷/매칭 인덱스/추출 결과 캐시를 로컬 SQLite로 공유
+    SERVER_WORKERS: int = int(os.getenv("SERVER_WORKERS", "1"))
+    SHARED_CACHE_ENABLED: bool = os.getenv(
+        "SHARED_CACHE_ENABLED", "true" if int(os.getenv("SERVER_WORKERS", "1")) > 1 else "false"
+    ).lower() == "true"
+    SHARED_CACHE_PATH: str = os.getenv("SHARED_CACHE_PATH", "cache/shared_cache.sqlite3")
+    # 공유 foodData 스냅샷이 다른 워커에 의해 갱신되었는지 확인하는 주기(초)
+    FOOD_CATALOG_SHARED_POLL_SECONDS: float = float(os.getenv("FOOD_CATALOG_SHARED_POLL_SECONDS", "5"))
+
+    # 요청 시간 예산: /extract 요청 하나가 OpenGraph/Gemini 호출에 쓸 수 있는 전체 시간(초)
+    # 재료 추출 전에 예산이 떨어지면 메타데이터만 저장하고 재료는 '추출 대기'로 표시합니다.
+    REQUEST_BUDGET_SECONDS: float = float(os.getenv("REQUEST_BUDGET_SECONDS", "30"))
+
+    # foodData 카탈로그 캐시 설정
+    # TTL이 지나면 updatedAt 기준 증분 조회로 갱신하고, 전체 재적재 주기마다 삭제된 문서까지 반영합니다.
+    FOOD_CATALOG_TTL_SECONDS: float = float(os.getenv("FOOD_CATALOG_TTL_SECONDS", "300"))
+    FOOD_CATALOG_FULL_RELOAD_SECONDS: float = float(os.getenv("FOOD_CATALOG_FULL_RELOAD_SECONDS", "3600"))
+    FOOD_CATALOG_USE_LISTENER: bool = os.getenv("FOOD_CATALOG_USE_LISTENER", "true").lower() == "true"
+    # 압축 카탈로그 스냅샷 파일: 시작 시 mmap해 Firestore 조회 없이 첫 요청을 처리하고, 갱신은 백그라운드에서 진행
+    FOOD_CATALOG_SNAPSHOT_ENABLED: bool = os.getenv("FOOD_CATALOG_SNAPSHOT_ENABLED", "true").lower() == "true"
+    FOOD_CATALOG_SNAPSHOT_PATH: str = os.getenv("FOOD_CATALOG_SNAPSHOT_PATH", "cache/food_catalog.snapshot")
+    FOOD_CATALOG_SNAPSHOT_MAX_AGE_SECONDS: float = float(os.getenv("FOOD_CATALOG_SNAPSHOT_MAX_AGE_SECONDS", "604800"))
+
+    # URL 단위 추출 결과 캐시 설정 (memory | sqlite | none, 멀티 워커면 기본값 sqlite)
+    EXTRACTION_CACHE_BACKEND: str = os.getenv(
+        "EXTRACTION_CACHE_BACKEND", "sqlite" if int(os.getenv("SERVER_WORKERS", "1")) > 1 else "memory"
+    )
+    EXTRACTION_CACHE_PATH: str = os.getenv("EXTRACTION_CACHE_PATH", "cache/extraction_cache.sqlite3")
+    EXTRACTION_CACHE_TTL_SECONDS: float = float(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", "86400"))
+    EXTRACTION_CACHE_MAX_ENTRIES: int = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "10000"))
+
+    # 설명 텍스트 기준 Gemini 원본 재료 응답 캐시 (로컬 SQLite, 총 크기 초과 시 LRU 제거)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3")
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # 규칙 기반 재료 추출 설정: 재료 목록이 정형화된 캡션은 신뢰도가 기준 이상이면 Gemini 호출을 건너뜀
+    LOCAL_EXTRACT_ENABLED: bool = os.getenv("LOCAL_EXTRACT_ENABLED", "true").lower() == "true"
+    LOCAL_EXTRACT_MIN_CONFIDENCE: float = float(os.getenv("LOCAL_EXTRACT_MIN_CONFIDENCE", "0.8"))
+    LOCAL_EXTRACT_MATCH_CUTOFF: float = float(os.getenv("LOCAL_EXTRACT_MATCH_CUTOFF", "0.75"))
+
+    # Gemini에 보내기 전 캡션 전처리: 해시태그/멘션/이모지/홍보 문구 제거, 중복 줄 제거, 재료 구역만 남기기
+    # 전처리 후에도 추정 토큰 수가 CAPTION_MAX_TOKENS를 넘으면 뒤쪽 줄부터 잘라냄
+    CAPTION_PREPROCESS_ENABLED: bool = os.getenv("CAPTION_PREPROCESS_ENABLED", "true").lower() == "true"
+    CAPTION_ISOLATE_SECTION: bool = os.getenv("CAPTION_ISOLATE_SECTION", "true").lower() == "true"
+    CAPTION_MAX_TOKENS: int = int(os.getenv("CAPTION_MAX_TOKENS", "1024"))
+
+    # 일괄 추출(/extract/batch) 설정
+    BATCH_EXTRACT_MAX_ITEMS: int = int(os.getenv("BATCH_EXTRACT_MAX_ITEMS", "50"))
+    BATCH_EXTRACT_CONCURRENCY: int = int(os.getenv("BATCH_EXTRACT_CONCURRENCY", "4"))
+
+    # 백그라운드 추출 작업(/extract/async) 설정: 대기 작업은 로컬 SQLite에 기록해 재시작 후에도 이어서 처리
+    EXTRACTION_JOB_WORKERS: int = int(os.getenv("EXTRACTION_JOB_WORKERS", "4"))
+    EXTRACTION_JOB_MAX_QUEUED: int = int(os.getenv("EXTRACTION_JOB_MAX_QUEUED", "500"))
+    EXTRACTION_JOB_MAX_ATTEMPTS: int = int(os.getenv("EXTRACTION_JOB_MAX_ATTEMPTS", "3"))
+    EXTRACTION_JOB_RETRY_BACKOFF_SECONDS: float = float(os.getenv("EXTRACTION_JOB_RETRY_BACKOFF_SECONDS", "5"))
+    EXTRACTION_JOB_DB_PATH: str = os.getenv("EXTRACTION_JOB_DB_PATH", "cache/extraction_jobs.sqlite3")
+
+    # Firestore 비동기 실행 설정 (동기 SDK 호출을 전용 스레드 풀에서 실행)
+    FIRESTORE_MAX_WORKERS: int = int(os.getenv("FIRESTORE_MAX_WORKERS", "8"))
+    FIRESTORE_MAX_PENDING: int = int(os.getenv("FIRESTORE_MAX_PENDING", "64"))
+    FIRESTORE_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("FIRESTORE_QUEUE_TIMEOUT_SECONDS", "10"))
+    FIRESTORE_WRITE_TIMEOUT_SECONDS: float = float(os.getenv("FIRESTORE_WRITE_TIMEOUT_SECONDS", "10"))
+    FIRESTORE_WRITE_RETRIES: int = int(os.getenv("FIRESTORE_WRITE_RETRIES", "2"))
+    FIRESTORE_RETRY_BACKOFF_SECONDS: float = float(os.getenv("FIRESTORE_RETRY_BACKOFF_SECONDS", "0.5"))
+
+    # Gemini HTTP 클라이언트 설정 (서버 lifespan에서 한 번 생성해 커넥션 풀을 공유)
+    GEMINI_TIMEOUT_SECONDS: float = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "15"))
+    GEMINI_HTTP2: bool = os.getenv("GEMINI_HTTP2", "true").lower() == "true"
+    GEMINI_MAX_CONNECTIONS: int = int(os.getenv("GEMINI_MAX_CONNECTIONS", "20"))
+    GEMINI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("GEMINI_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    GEMINI_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("GEMINI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    GEMINI_MAX_CONNECTIONS_PER_HOST: int = int(os.getenv("GEMINI_MAX_CONNECTIONS_PER_HOST", "20"))
+
+    # Gemini 호출 제한: 429/503 응답에 따라 동시성 한도를 조절(AIMD)하고, 요청률 상한(0이면 제한 없음)을 넘는 호출은 대기열에서 기다림
+    GEMINI_MIN_CONCURRENCY: int = int(os.getenv("GEMINI_MIN_CONCURRENCY", "1"))
+    GEMINI_MAX_CONCURRENCY: int = int(os.getenv("GEMINI_MAX_CONCURRENCY", "20"))
+    GEMINI_RATE_LIMIT_PER_SECOND: float = float(os.getenv("GEMINI_RATE_LIMIT_PER_SECOND", "0"))
+    GEMINI_RATE_LIMIT_BURST: int = int(os.getenv("GEMINI_RATE_LIMIT_BURST", "10"))
+    GEMINI_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "20"))
+    GEMINI_THROTTLE_RETRIES: int = int(os.getenv("GEMINI_THROTTLE_RETRIES", "2"))
+
+    # Gemini 마이크로 배칭 설정: 수집 창(ms) 안에 들어온 재료 추출 요청을 한 번의 호출로 묶음 (0이면 비활성화)
+    GEMINI_BATCH_WINDOW_MS: float = float(os.getenv("GEMINI_BATCH_WINDOW_MS", "0"))
+    GEMINI_BATCH_MAX_SIZE: int = int(os.getenv("GEMINI_BATCH_MAX_SIZE", "8"))
+    GEMINI_BATCH_MAX_OUTPUT_TOKENS: int = int(os.getenv("GEMINI_BATCH_MAX_OUTPUT_TOKENS", "16384"))
+    GEMINI_BATCH_TIMEOUT_SECONDS: float = float(os.getenv("GEMINI_BATCH_TIMEOUT_SECONDS", "30"))
+
+    # Gemini 구조화 출력: responseMimeType=application/json과 responseSchema로 응답 형식을 강제 (API가 거부하면 프롬프트 지시로 대체)
+    GEMINI_STRUCTURED_OUTPUT: bool = os.getenv("GEMINI_STRUCTURED_OUTPUT", "true").lower() == "true"
+
+    # OpenGraph.io HTTP 클라이언트 설정
+    OPENGRAPH_TIMEOUT_SECONDS: float = float(os.getenv("OPENGRAPH_TIMEOUT_SECONDS", "30"))
+    OPENGRAPH_HTTP2: bool = os.getenv("OPENGRAPH_HTTP2", "true").lower() == "true"
+    OPENGRAPH_MAX_CONNECTIONS: int = int(os.getenv("OPENGRAPH_MAX_CONNECTIONS", "20"))
+    OPENGRAPH_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENGRAPH_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    OPENGRAPH_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("OPENGRAPH_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    OPENGRAPH_MAX_CONNECTIONS_PER_HOST: int = int(os.getenv("OPENGRAPH_MAX_CONNECTIONS_PER_HOST", "20"))
+
+    # OpenGraph.io 호출 제한 (Gemini와 같은 방식)
+    OPENGRAPH_MIN_CONCURRENCY: int = int(os.getenv("OPENGRAPH_MIN_CONCURRENCY", "1"))
+    OPENGRAPH_MAX_CONCURRENCY: int = int(os.getenv("OPENGRAPH_MAX_CONCURRENCY", "20"))
+    OPENGRAPH_RATE_LIMIT_PER_SECOND: float = float(os.getenv("OPENGRAPH_RATE_LIMIT_PER_SECOND", "0"))
+    OPENGRAPH_RATE_LIMIT_BURST: int = int(os.getenv("OPENGRAPH_RATE_LIMIT_BURST", "10"))
+    OPENGRAPH_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("OPENGRAPH_QUEUE_TIMEOUT_SECONDS", "20"))
+    OPENGRAPH_THROTTLE_RETRIES: int = int(os.getenv("OPENGRAPH_THROTTLE_RETRIES", "2"))
+
+    # OpenGraph.io 헤징: full_render 호출이 이 시간 안에 끝나지 않으면 가벼운 호출을 동시에 시작
+    OPENGRAPH_HEDGE_ENABLED: bool = os.getenv("OPENGRAPH_HEDGE_ENABLED", "true").lower() == "true"
+    OPENGRAPH_HEDGE_DELAY_SECONDS: float = float(os.getenv("OPENGRAPH_HEDGE_DELAY_SECONDS", "3"))
+
+    # 레시피 페이지 <head> 직접 조회 (OpenGraph.io보다 먼저 시도)
+    HTML_FETCH_ENABLED: bool = os.getenv("HTML_FETCH_ENABLED", "true").lower() == "true"
+    HTML_FETCH_TIMEOUT_SECONDS: float = float(os.getenv("HTML_FETCH_TIMEOUT_SECONDS", "5"))
+    HTML_FETCH_MAX_BYTES: int = int(os.getenv("HTML_FETCH_MAX_BYTES", str(256 * 1024)))
+    HTML_FETCH_USER_AGENT: str = os.getenv("HTML_FETCH_USER_AGENT", "Mozilla/5.0 (compatible; RottenRecipeBot/1.0)")
+    HTML_FETCH_HTTP2: bool = os.getenv("HTML_FETCH_HTTP2", "true").lower() == "true"
+    HTML_FETCH_MAX_CONNECTIONS: int = int(os.getenv("HTML_FETCH_MAX_CONNECTIONS", "50"))
+    HTML_FETCH_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTML_FETCH_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTML_FETCH_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTML_FETCH_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    HTML_FETCH_MAX_CONNECTIONS_PER_HOST: int = int(os.getenv("HTML_FETCH_MAX_CONNECTIONS_PER_HOST", "4"))
+
+    # 호스트별 메타데이터 조회 방식 학습 정책
+    HOST_POLICY_MAX_HOSTS: int = int(os.getenv("HOST_POLICY_MAX_HOSTS", "1024"))
+    HOST_POLICY_TTL_SECONDS: float = float(os.getenv("HOST_POLICY_TTL_SECONDS", "86400"))
+    HOST_POLICY_FAILURE_THRESHOLD: int = int(os.getenv("HOST_POLICY_FAILURE_THRESHOLD", "2"))
+
     class Config:
         extra = "allow"
 
 # 설정 객체 생성
 settings = Settings()
 
-# 3. 디버깅용: 서버 실행 시 터미널에 키가 로드됐는지 살짝 보여줍니다.
-if not settings.GEMINI_API_KEY:
-    print("⚠️ 경고: GEMINI_API_KEY를 .env에서 읽어오지 못했습니다!")
-else:
-    print(f"✅ Gemini 키 로드 완료: {settings.GEMINI_API_KEY[:5]}***")
-
-if not settings.OPENGRAPH_API_KEY:
-    print("⚠️ 경고: OPENGRAPH_API_KEY를 .env에서 읽어오지 못했습니다! (선택사항)")
-else:
-    key_preview = settings.OPENGRAPH_API_KEY[:5] if len(settings.OPENGRAPH_API_KEY) >= 5 else settings.OPENGRAPH_API_KEY
-    key_len = len(settings.OPENGRAPH_API_KEY)
-    print(f"✅ OpenGraph 키 로드 완료: {key_preview}*** (길이: {key_len}자, 공백 포함 여부 확인용)")
+# 3. 필수 키 로드 여부는 import 시점이 아니라 서버 시작 시 log_settings_summary()로 남깁니다.
+#    (import만 해도 출력되면 벤치마크/스크립트 출력에 섞이고, 키 일부가 로그에 남으므로 길이만 기록)
+def log_settings_summary() -> None:
+    """필수 키와 Firebase 인증 파일 경로가 설정되었는지 로그로 남김"""
+    logger = logging.getLogger(__name__)
+    if not settings.GEMINI_API_KEY:
+        logger.warning("GEMINI_API_KEY를 .env에서 읽어오지 못했습니다!")
+    else:
+        logger.info(f"Gemini 키 로드 완료 (길이: {len(settings.GEMINI_API_KEY)}자)")
 
-if not settings.FIREBASE_CREDENTIALS_PATH:
-    print("⚠️ 경고: FIREBASE_CREDENTIALS_PATH를 .env에서 읽어오지 못했습니다!")
-else:
-    print(f"✅ Firebase 인증 파일 경로: {settings.FIREBASE_CREDENTIALS_PATH}")
+    if not settings.OPENGRAPH_API_KEY:
+        logger.warning("OPENGRAPH_API_KEY를 .env에서 읽어오지 못했습니다! (선택사항)")
+    else:
+        logger.info(f"OpenGraph 키 로드 완료 (길이: {len(settings.OPENGRAPH_API_KEY)}자)")
 
+    if not settings.FIREBASE_CREDENTIALS_PATH:
+        logger.warning("FIREBASE_CREDENTIALS_PATH를 .env에서 읽어오지 못했습니다!")
+    else:
+        logger.info(f"Firebase 인증 파일 경로: {settings.FIREBASE_CREDENTIALS_PATH}")
@@ -1,14 +1,25 @@
-"""Firebase Admin SDK 초기화 및 Firestore 저장 모듈"""
+"""
+Firebase Admin SDK 초기화 및 Firestore 저장 모듈
+
+firebase_admin / google.cloud.firestore는 import만으로 수백 ms가 걸리므로 모듈 최상단에서 불러오지 않고,
+실제로 쓰는 함수 안에서 불러옵니다. (서버는 시작 직후 워밍업 단계에서 initialize_firebase로 미리 불러옴)
+"""
+import asyncio
+import functools
+import logging
 import os
+import secrets
+import string
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Sequence, Tuple, TypeVar
 from datetime import datetime
-from firebase_admin import initialize_app, credentials, firestore
-from firebase_admin.exceptions import FirebaseError
-import firebase_admin
 
 from config import settings
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
 
 # Firebase 앱 초기화 여부 추적
 _firebase_app = None
@@ -21,6 +32,9 @@ def initialize_firebase():
     if _firebase_app is not None:
         return _firebase_app
     
+    import firebase_admin
+    from firebase_admin import credentials, initialize_app
+    
     try:
         # 서비스 계정 키 파일 경로 확인
         cred_path = settings.FIREBASE_CREDENTIALS_PATH
@@ -50,15 +64,23 @@ def initialize_firebase():
 def get_firestore_client():
     """Firestore 클라이언트 반환"""
     initialize_firebase()
+    from firebase_admin import firestore
     return firestore.client()
 
 
-def get_food_data() -> List[Dict[str, Any]]:
-    """Firestore의 foodData 컬렉션에서 모든 음식 데이터 가져오기"""
+def get_food_data(fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Firestore의 foodData 컬렉션에서 모든 음식 데이터 가져오기
+    
+    Args:
+        fields: 가져올 필드 목록 (주면 해당 필드만 전송받음, 없으면 모든 필드)
+    """
     db = get_firestore_client()
     
     try:
         food_data_ref = db.collection('foodData')
+        if fields:
+            food_data_ref = food_data_ref.select(list(fields))
         docs = food_data_ref.stream()
         
         food_list = []
@@ -72,6 +94,93 @@ def get_food_data() -> List[Dict[str, Any]]:
         raise RuntimeError(f"foodData 조회 실패: {str(e)}")
 
 
+def get_food_data_updated_since(
+    updated_after: datetime,
+    fields: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """foodData 컬렉션에서 updatedAt이 주어진 시각 이후인 문서만 가져오기 (증분 갱신용, fields는 get_food_data와 동일)"""
+    from google.cloud.firestore_v1 import FieldFilter
+    db = get_firestore_client()
+    
+    try:
+        query = db.collection('foodData').where(
+            filter=FieldFilter('updatedAt', '>', updated_after)
+        )
+        if fields:
+            query = query.select(list(fields))
+        
+        food_list = []
+        for doc in query.stream():
+            data = doc.to_dict()
+            data['id'] = doc.id
+            food_list.append(data)
+        
+        return food_list
+    except Exception as e:
+        raise RuntimeError(f"foodData 증분 조회 실패: {str(e)}")
+
+
+def watch_food_data(on_changes: Callable[[List[Tuple[str, str, Optional[Dict[str, Any]]]]], None]):
+    """
+    foodData 컬렉션에 스냅샷 리스너 등록
+    
+    Args:
+        on_changes: 스냅샷마다 [(change_type, doc_id, data), ...] 리스트로 호출되는 콜백.
+            change_type은 'ADDED', 'MODIFIED', 'REMOVED' 중 하나이며 REMOVED일 때 data는 None
+    
+    Returns:
+        리스너 해제를 위한 Watch 객체 (unsubscribe() 호출로 해제)
+    """
+    db = get_firestore_client()
+    
+    def _on_snapshot(col_snapshot, changes, read_time):
+        batch = []
+        for change in changes:
+            doc = change.document
+            if change.type.name == 'REMOVED':
+                batch.append(('REMOVED', doc.id, None))
+            else:
+                data = doc.to_dict() or {}
+                data['id'] = doc.id
+                batch.append((change.type.name, doc.id, data))
+        if batch:
+            on_changes(batch)
+    
+    return db.collection('foodData').on_snapshot(_on_snapshot)
+
+
+def _build_recipe_data(
+    original_url: str,
+    title: str,
+    thumbnail: Optional[str],
+    source_name: str,
+    ai_extracted_ingredients: List[Dict[str, Any]],
+    final_ingredients: Optional[List[Dict[str, Any]]] = None,
+    ingredients_status: str = 'complete',
+    status: str = 'planned'
+) -> Dict[str, Any]:
+    """recipeLog 문서 데이터 구성"""
+    from firebase_admin import firestore
+    # final_ingredients가 없으면 ai_extracted_ingredients와 동일하게 설정
+    if final_ingredients is None:
+        final_ingredients = ai_extracted_ingredients.copy()
+    
+    # 저장할 데이터 구조 (이미지가 없으면 빈 문자열 또는 None)
+    return {
+        'original_url': original_url,
+        'title': title,
+        'thumbnail': thumbnail if thumbnail else '',
+        'source_name': source_name or '',
+        'ai_extracted_ingredients': ai_extracted_ingredients,
+        'final_ingredients': final_ingredients,
+        # 'pending'이면 요청 시간 예산 안에 재료를 추출하지 못해 재료가 비어 있거나 일부만 있음
+        'ingredients_status': ingredients_status,
+        # 'extracting'이면 백그라운드 작업이 아직 추출 중 (완료 시 'planned', 실패 시 'failed')
+        'status': status,
+        'created_at': firestore.SERVER_TIMESTAMP,
+    }
+
+
 def save_recipe_to_firestore(
     uid: str,
     original_url: str,
@@ -79,7 +188,11 @@ def save_recipe_to_firestore(
     thumbnail: Optional[str],
     source_name: str,
     ai_extracted_ingredients: List[Dict[str, Any]],
-    final_ingredients: Optional[List[Dict[str, Any]]] = None
+    final_ingredients: Optional[List[Dict[str, Any]]] = None,
+    document_id: Optional[str] = None,
+    timeout: Optional[float] = None,
+    ingredients_status: str = 'complete',
+    status: str = 'planned'
 ) -> str:
     """
     레시피 데이터를 Firestore에 저장
@@ -91,33 +204,275 @@ def save_recipe_to_firestore(
         thumbnail: 썸네일 이미지 URL
         ai_extracted_ingredients: AI가 추출한 재료 리스트
         final_ingredients: 최종 확인된 재료 리스트 (없으면 ai_extracted_ingredients와 동일)
+        document_id: 저장할 문서 ID (없으면 자동 생성). 같은 ID로 다시 저장하면 덮어쓰므로 재시도해도 중복 문서가 생기지 않음
+        timeout: Firestore 쓰기 요청 타임아웃 (초)
+        ingredients_status: 재료 추출 상태 ('complete' 또는 시간 예산 소진으로 재료를 다 얻지 못한 'pending')
+        status: 문서 상태 (기본 'planned', 백그라운드 추출 대기 문서는 'extracting')
     
     Returns:
         저장된 문서 ID
     """
     db = get_firestore_client()
-    
-    # final_ingredients가 없으면 ai_extracted_ingredients와 동일하게 설정
-    if final_ingredients is None:
-        final_ingredients = ai_extracted_ingredients.copy()
-    
-    # 저장할 데이터 구조 (이미지가 없으면 빈 문자열 또는 None)
-    recipe_data = {
-        'original_url': original_url,
-        'title': title,
-        'thumbnail': thumbnail if thumbnail else '',
-        'source_name': source_name or '',
-        'ai_extracted_ingredients': ai_extracted_ingredients,
-        'final_ingredients': final_ingredients,
-        'status': 'planned',
-        'created_at': firestore.SERVER_TIMESTAMP,
-    }
+    recipe_data = _build_recipe_data(
+        original_url=original_url,
+        title=title,
+        thumbnail=thumbnail,
+        source_name=source_name,
+        ai_extracted_ingredients=ai_extracted_ingredients,
+        final_ingredients=final_ingredients,
+        ingredients_status=ingredients_status,
+        status=status,
+    )
     
     try:
         # users/{uid}/recipeLog 경로에 저장
-        doc_ref = db.collection('users').document(uid).collection('recipeLog').add(recipe_data)
-        # add()는 (timestamp, DocumentReference) 튜플을 반환
-        return doc_ref[1].id  # 문서 ID 반환
+        recipe_log_ref = db.collection('users').document(uid).collection('recipeLog')
+        doc_ref = recipe_log_ref.document(document_id) if document_id else recipe_log_ref.document()
+        doc_ref.set(recipe_data, timeout=timeout)
+        return doc_ref.id  # 문서 ID 반환
     except Exception as e:
         raise RuntimeError(f"Firestore 저장 실패: {str(e)}")
 
+
+def complete_recipe_in_firestore(
+    uid: str,
+    document_id: str,
+    original_url: str,
+    title: str,
+    thumbnail: Optional[str],
+    source_name: str,
+    ai_extracted_ingredients: List[Dict[str, Any]],
+    final_ingredients: Optional[List[Dict[str, Any]]] = None,
+    timeout: Optional[float] = None,
+    ingredients_status: str = 'complete'
+) -> bool:
+    """
+    'extracting' 상태로 먼저 만든 recipeLog 문서를 추출 결과로 채우고 'planned'로 변경
+    
+    created_at은 처음 만든 시각을 유지합니다. 그 사이 사용자가 문서를 삭제했다면 다시 만들지 않습니다.
+    
+    Returns:
+        문서를 갱신했으면 True, 문서가 없어 건너뛰었으면 False
+    """
+    db = get_firestore_client()
+    recipe_data = _build_recipe_data(
+        original_url=original_url,
+        title=title,
+        thumbnail=thumbnail,
+        source_name=source_name,
+        ai_extracted_ingredients=ai_extracted_ingredients,
+        final_ingredients=final_ingredients,
+        ingredients_status=ingredients_status,
+    )
+    recipe_data.pop('created_at')
+    return _update_recipe_document(db, uid, document_id, recipe_data, timeout)
+
+
+def mark_recipe_extraction_failed(
+    uid: str,
+    document_id: str,
+    error: str,
+    timeout: Optional[float] = None
+) -> bool:
+    """백그라운드 추출에 끝내 실패한 recipeLog 문서를 'failed' 상태로 변경 (문서가 없으면 False)"""
+    db = get_firestore_client()
+    return _update_recipe_document(
+        db, uid, document_id, {'status': 'failed', 'extraction_error': error[:500]}, timeout
+    )
+
+
+def _update_recipe_document(
+    db,
+    uid: str,
+    document_id: str,
+    fields: Dict[str, Any],
+    timeout: Optional[float]
+) -> bool:
+    from google.api_core.exceptions import NotFound
+    doc_ref = db.collection('users').document(uid).collection('recipeLog').document(document_id)
+    try:
+        doc_ref.update(fields, timeout=timeout)
+        return True
+    except NotFound:
+        logger.info(f"recipeLog 문서가 삭제되어 갱신을 건너뜁니다: uid={uid}, document_id={document_id}")
+        return False
+    except Exception as e:
+        raise RuntimeError(f"Firestore 갱신 실패: {str(e)}")
+
+
+# Firestore WriteBatch 한 번에 담을 수 있는 최대 쓰기 수
+FIRESTORE_BATCH_LIMIT = 500
+
+
+def save_recipes_batch_to_firestore(
+    uid: str,
+    recipes: List[Dict[str, Any]],
+    timeout: Optional[float] = None
+) -> List[str]:
+    """
+    여러 레시피를 users/{uid}/recipeLog에 WriteBatch로 묶어 저장
+    
+    Args:
+        uid: 사용자 ID
+        recipes: save_recipe_to_firestore의 인자(original_url, title, thumbnail, source_name,
+            ai_extracted_ingredients, final_ingredients, document_id)를 담은 딕셔너리 리스트
+        timeout: 커밋 요청 하나당 타임아웃 (초)
+    
+    Returns:
+        recipes 순서대로 저장된 문서 ID 리스트
+    """
+    db = get_firestore_client()
+    recipe_log_ref = db.collection('users').document(uid).collection('recipeLog')
+    
+    try:
+        doc_ids = []
+        for start in range(0, len(recipes), FIRESTORE_BATCH_LIMIT):
+            batch = db.batch()
+            for recipe in recipes[start:start + FIRESTORE_BATCH_LIMIT]:
+                recipe = dict(recipe)
+                document_id = recipe.pop('document_id', None)
+                doc_ref = recipe_log_ref.document(document_id) if document_id else recipe_log_ref.document()
+                batch.set(doc_ref, _build_recipe_data(**recipe))
+                doc_ids.append(doc_ref.id)
+            batch.commit(timeout=timeout)
+        return doc_ids
+    except Exception as e:
+        raise RuntimeError(f"Firestore 일괄 저장 실패: {str(e)}")
+
+
+# ---------- 비동기 실행 계층 ----------
+# firebase_admin의 Firestore 호출은 동기(gRPC 블로킹)이므로, 이벤트 루프를 막지 않도록
+# 전용 스레드 풀에서 실행합니다. 대기 중인 작업 수를 제한해 과부하 시 호출자가 기다리도록(백프레셔) 합니다.
+
+_firestore_executor: Optional[ThreadPoolExecutor] = None
+_firestore_slots: Optional[asyncio.Semaphore] = None
+
+
+def _get_firestore_executor() -> ThreadPoolExecutor:
+    global _firestore_executor
+    
+    if _firestore_executor is None:
+        _firestore_executor = ThreadPoolExecutor(
+            max_workers=settings.FIRESTORE_MAX_WORKERS,
+            thread_name_prefix='firestore',
+        )
+    return _firestore_executor
+
+
+async def run_firestore_call(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    동기 Firestore 호출을 전용 스레드 풀에서 실행
+    
+    실행 중이거나 대기 중인 작업이 FIRESTORE_MAX_PENDING개를 넘으면 자리가 날 때까지 기다리고,
+    FIRESTORE_QUEUE_TIMEOUT_SECONDS 안에 자리가 나지 않으면 RuntimeError를 발생시킵니다.
+    호출자가 취소되어도 스레드의 gRPC 호출은 멈추지 않으므로, 자리는 스레드 작업이 끝날 때 반납합니다.
+    """
+    global _firestore_slots
+    
+    if _firestore_slots is None:
+        _firestore_slots = asyncio.Semaphore(settings.FIRESTORE_MAX_PENDING)
+    
+    try:
+        await asyncio.wait_for(_firestore_slots.acquire(), timeout=settings.FIRESTORE_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise RuntimeError("Firestore 작업 대기열이 가득 찼습니다.")
+    
+    slots = _firestore_slots
+    try:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(_get_firestore_executor(), functools.partial(func, *args, **kwargs))
+    except BaseException:
+        slots.release()
+        raise
+
+    def _release(done: asyncio.Future) -> None:
+        slots.release()
+        # 호출자가 먼저 취소된 경우에도 예외가 '회수되지 않음' 경고로 남지 않도록 확인
+        if not done.cancelled():
+            done.exception()
+
+    future.add_done_callback(_release)
+    return await asyncio.shield(future)
+
+
+async def save_recipe_to_firestore_async(**kwargs: Any) -> str:
+    """
+    save_recipe_to_firestore의 비동기 버전 (타임아웃 및 재시도 포함)
+    
+    문서 ID를 미리 정해 두고 재시도하므로, 앞선 시도가 실제로는 성공했더라도 같은 문서를 덮어쓸 뿐
+    중복 문서가 생기지 않습니다.
+    """
+    kwargs.setdefault('document_id', _new_recipe_document_id())
+    kwargs.setdefault('timeout', settings.FIRESTORE_WRITE_TIMEOUT_SECONDS)
+    return await _run_write_with_retries(save_recipe_to_firestore, kwargs)
+
+
+async def complete_recipe_in_firestore_async(**kwargs: Any) -> bool:
+    """complete_recipe_in_firestore의 비동기 버전 (타임아웃 및 재시도 포함)"""
+    kwargs.setdefault('timeout', settings.FIRESTORE_WRITE_TIMEOUT_SECONDS)
+    return await _run_write_with_retries(complete_recipe_in_firestore, kwargs)
+
+
+async def mark_recipe_extraction_failed_async(uid: str, document_id: str, error: str) -> bool:
+    """mark_recipe_extraction_failed의 비동기 버전 (타임아웃 및 재시도 포함)"""
+    return await _run_write_with_retries(
+        mark_recipe_extraction_failed,
+        {'uid': uid, 'document_id': document_id, 'error': error,
+         'timeout': settings.FIRESTORE_WRITE_TIMEOUT_SECONDS},
+    )
+
+
+async def save_recipes_batch_to_firestore_async(uid: str, recipes: List[Dict[str, Any]]) -> List[str]:
+    """
+    save_recipes_batch_to_firestore의 비동기 버전 (타임아웃 및 재시도 포함)
+    
+    각 레시피의 문서 ID를 미리 정해 두므로 재시도해도 중복 문서가 생기지 않습니다.
+    """
+    recipes = [
+        {**recipe, 'document_id': recipe.get('document_id') or _new_recipe_document_id()}
+        for recipe in recipes
+    ]
+    return await _run_write_with_retries(
+        save_recipes_batch_to_firestore,
+        {'uid': uid, 'recipes': recipes, 'timeout': settings.FIRESTORE_WRITE_TIMEOUT_SECONDS},
+    )
+
+
+async def _run_write_with_retries(func: Callable[..., T], kwargs: Dict[str, Any]) -> T:
+    """쓰기 작업을 Firestore 스레드 풀에서 실행하고 실패 시 지수 백오프로 재시도"""
+    attempts = settings.FIRESTORE_WRITE_RETRIES + 1
+    for attempt in range(1, attempts + 1):
+        try:
+            # 시간 상한은 kwargs['timeout'](gRPC 요청 타임아웃)과 대기열 타임아웃이 맡음
+            # (바깥에서 wait_for로 끊으면 스레드는 계속 막혀 있는 채로 재시도가 스레드를 하나 더 씀)
+            return await run_firestore_call(func, **kwargs)
+        except RuntimeError as e:
+            if attempt >= attempts:
+                raise RuntimeError(f"Firestore 저장 실패 ({attempts}회 시도): {e}") from e
+            backoff = settings.FIRESTORE_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1))
+            logger.warning(f"Firestore 저장 실패, {backoff:.1f}초 후 재시도 ({attempt}/{attempts}): {e}")
+            await asyncio.sleep(backoff)
+
+
+# Firestore 자동 ID와 같은 문자 집합 (영문 대소문자 + 숫자)
+_AUTO_ID_ALPHABET = string.ascii_letters + string.digits
+
+
+def _new_recipe_document_id() -> str:
+    """
+    recipeLog 문서 ID를 미리 생성 (Firestore 자동 ID와 같은 20자 형식)
+
+    클라이언트를 거치지 않으므로 첫 호출에서도 firebase_admin 초기화가 이벤트 루프에서 실행되지 않습니다.
+    """
+    return ''.join(secrets.choice(_AUTO_ID_ALPHABET) for _ in range(20))
+
+
+def shutdown_firestore_executor() -> None:
+    """Firestore 전용 스레드 풀 종료 (서버 종료 시 호출)"""
+    global _firestore_executor, _firestore_slots
+    
+    if _firestore_executor is not None:
+        _firestore_executor.shutdown(wait=False, cancel_futures=True)
+        _firestore_executor = None
+    _firestore_slots = None
+
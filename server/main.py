@@ -1,24 +1,79 @@
 """FastAPI 메인 애플리케이션"""
+import time
+
+# 콜드 스타트 측정: 아래 모듈 import에 걸린 시간을 /ready와 /metrics에 보고
+_IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel, HttpUrl
-from typing import Optional
-import uvicorn
+from typing import List, Literal, Optional
+import json
 import traceback
 import logging
 
-from config import settings
-from services.recipe_extractor import extract_recipe
+from config import log_settings_summary, settings
+from services.recipe_extractor import (
+    extract_recipe,
+    extract_recipe_stream,
+    extract_recipes_batch,
+    fail_extraction_job,
+    get_extraction_stats,
+    run_extraction_job,
+    submit_extraction_job,
+    warm_up_ingredient_matcher,
+)
+from services.extraction_jobs import JobQueueFull, get_extraction_job_queue, init_extraction_job_queue
+from services.gemini_batcher import close_gemini_batcher
+from services.http_clients import init_http_clients, close_http_clients, get_http_pool_stats
+from services.upstream_limiter import get_upstream_limiter_stats
+from services.budget import RequestBudget
+from services.food_catalog import get_food_catalog
+from services.shared_cache import get_shared_cache
+from services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+from services.request_context import RequestContextMiddleware, configure_logging
+from services.startup import get_startup_warmup, init_startup_warmup, record_import_time
+from firebase_config import shutdown_firestore_executor
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+# 로깅 설정 (모든 로그 줄에 요청 ID 포함)
+configure_logging(logging.INFO)
 logger = logging.getLogger(__name__)
 
+record_import_time(time.perf_counter() - _IMPORT_STARTED)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """서버 시작/종료 시 공유 리소스 관리"""
+    log_settings_summary()
+    # 외부 호출용 HTTP 커넥션 풀을 한 번만 생성해 모든 요청이 공유
+    init_http_clients()
+    # 백그라운드 추출 워커 시작 (재시작 전에 마무리하지 못한 작업도 이어서 처리)
+    job_queue = init_extraction_job_queue(run_extraction_job, fail_extraction_job)
+    await job_queue.start()
+    # Firebase 초기화, 외부 API 사전 연결, foodData 카탈로그/매칭 인덱스 적재를 백그라운드로 진행
+    # (끝날 때까지 /ready는 503. 멀티 워커 모드에서는 상위 프로세스가 공유 캐시에 미리 적재해 둔 것을 읽음)
+    startup_warmup = init_startup_warmup()
+    startup_warmup.start()
+    yield
+    # 종료 시 /ready부터 503으로 바꿔 새 트래픽을 막은 뒤
+    # 추출 워커, Gemini 묶음 호출, 공유 HTTP 커넥션 풀, foodData 리스너, Firestore 스레드 풀 정리
+    await startup_warmup.stop()
+    await job_queue.stop()
+    await close_gemini_batcher()
+    await close_http_clients()
+    get_food_catalog().close()
+    shutdown_firestore_executor()
+
+
 # FastAPI 앱 생성
 app = FastAPI(
     title="Rotten Recipe Extractor API",
     description="인스타그램 레시피 추출 및 Firebase 연동 API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS 설정 (Flutter 앱에서 호출 가능하도록)
@@ -28,7 +83,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
+# 요청 ID 지정(X-Request-ID) 및 요청 처리 시간 히스토그램 기록
+app.add_middleware(RequestContextMiddleware)
 
 
 # 요청 모델
@@ -39,6 +97,41 @@ class ExtractRequest(BaseModel):
 
 # 응답 모델
 class ExtractResponse(BaseModel):
+    success: bool
+    document_id: Optional[str] = None
+    title: Optional[str] = None
+    thumbnail: Optional[str] = None
+    source_name: Optional[str] = None
+    ingredients: Optional[list] = None
+    ingredients_pending: Optional[bool] = None
+    timings: Optional[dict] = None
+    error: Optional[str] = None
+
+
+# 백그라운드 추출 요청/응답 모델
+class ExtractJobRequest(ExtractRequest):
+    priority: Literal['high', 'normal'] = 'normal'
+
+
+class ExtractJobResponse(BaseModel):
+    success: bool
+    document_id: str
+    status: str
+
+
+# 일괄 추출 요청 모델
+class BatchExtractItem(BaseModel):
+    url: str
+
+
+class BatchExtractRequest(BaseModel):
+    uid: str
+    items: List[BatchExtractItem]
+
+
+# 일괄 추출 응답 모델
+class BatchExtractItemResult(BaseModel):
+    url: str
     success: bool
     document_id: Optional[str] = None
     title: Optional[str] = None
@@ -48,15 +141,72 @@ class ExtractResponse(BaseModel):
     error: Optional[str] = None
 
 
+class BatchExtractResponse(BaseModel):
+    success: bool
+    results: Optional[List[BatchExtractItemResult]] = None
+    timings: Optional[dict] = None
+    error: Optional[str] = None
+
+
 @app.get("/")
 async def root():
-    """헬스 체크 엔드포인트"""
+    """헬스 체크(liveness) 엔드포인트: 프로세스가 떠 있으면 준비 여부와 상관없이 200"""
     return {
         "status": "ok",
         "message": "Rotten Recipe Extractor API is running"
     }
 
 
+@app.get("/ready")
+async def ready():
+    """
+    준비 상태(readiness) 엔드포인트: Firebase, 외부 API 사전 연결, foodData 카탈로그 준비가 끝나면 200
+
+    준비 중이거나 종료 중이면 503과 함께 단계별 상태를 반환합니다. (로드 밸런서 헬스 체크용)
+    """
+    startup_warmup = get_startup_warmup()
+    if startup_warmup is None:
+        return JSONResponse(status_code=503, content={"ready": False})
+    if not startup_warmup.ready:
+        return JSONResponse(status_code=503, content=startup_warmup.status())
+    return startup_warmup.status()
+
+
+@app.get("/stats/http")
+async def http_pool_stats():
+    """외부 호출용 HTTP 커넥션 풀 사용량 (풀 크기 조정용)"""
+    return get_http_pool_stats()
+
+
+@app.get("/stats/upstream")
+async def upstream_limiter_stats():
+    """Gemini/OpenGraph 호출 제한 상태 (현재 동시성 한도, 대기 수, 429/503 횟수 등)"""
+    return get_upstream_limiter_stats()
+
+
+@app.get("/stats/extraction")
+async def extraction_stats():
+    """추출 캐시 적중률 및 동시 요청 합류(절약된 upstream 호출 수) 통계"""
+    return get_extraction_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus 텍스트 형식 메트릭 (이 워커 프로세스 기준)
+
+    요청/단계별 지연 시간 히스토그램, 폴백 횟수, upstream 응답 상태 코드별 횟수
+    """
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/stats/jobs")
+async def job_queue_stats():
+    """백그라운드 추출 작업 큐 상태 (대기/실행 중 작업 수, 완료/재시도/실패 수)"""
+    job_queue = get_extraction_job_queue()
+    return job_queue.stats() if job_queue else {}
+
+
 @app.post("/extract", response_model=ExtractResponse)
 async def extract_recipe_endpoint(request: ExtractRequest):
     """
@@ -72,11 +222,15 @@ async def extract_recipe_endpoint(request: ExtractRequest):
         - title: 레시피 제목 (string, optional)
         - thumbnail: 썸네일 이미지 URL (string, optional)
         - ingredients: 추출된 재료 리스트 (list, optional)
+        - ingredients_pending: 시간 예산 안에 재료를 추출하지 못해 재료가 '추출 대기' 상태인지 여부 (bool, optional)
+        - timings: 단계별 소요 시간 ms (dict, optional)
         - error: 오류 메시지 (string, optional)
     """
     try:
         logger.info(f"레시피 추출 요청: url={request.url}, uid={request.uid}")
-        result = await extract_recipe(request.url, request.uid)
+        # 요청 단위 시간 예산: 각 단계 타임아웃이 남은 예산을 넘지 않도록 파이프라인 전체에 전달
+        budget = RequestBudget(settings.REQUEST_BUDGET_SECONDS)
+        result = await extract_recipe(request.url, request.uid, budget)
         
         if not result.get('success'):
             error_msg = result.get('error', '레시피 추출 중 오류가 발생했습니다.')
@@ -100,11 +254,128 @@ async def extract_recipe_endpoint(request: ExtractRequest):
         )
 
 
+@app.post("/extract/async", response_model=ExtractJobResponse, status_code=202)
+async def extract_recipe_async_endpoint(request: ExtractJobRequest):
+    """
+    recipeLog 문서를 'extracting' 상태로 바로 만들어 ID를 반환하고, 추출은 백그라운드 워커가 마무리
+    
+    Request Body:
+        - url: 레시피 URL (string)
+        - uid: 사용자 ID (string)
+        - priority: 'high' 또는 'normal' (기본 'normal'). high 작업은 대기 중인 normal 작업보다 먼저 처리
+    
+    Response (202):
+        - success: 작업 등록 여부 (bool)
+        - document_id: 만든 recipeLog 문서 ID (string). 추출이 끝나면 이 문서의 status가 'planned'(실패 시 'failed')로 바뀜
+        - status: 'extracting'
+    """
+    try:
+        logger.info(f"레시피 백그라운드 추출 요청: url={request.url}, uid={request.uid}, priority={request.priority}")
+        document_id = await submit_extraction_job(request.url, request.uid, request.priority)
+        return ExtractJobResponse(success=True, document_id=document_id, status='extracting')
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        logger.error(f"서버 오류 발생:\n{error_trace}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"서버 오류: {str(e)}"
+        )
+
+
+@app.post("/extract/stream")
+async def extract_recipe_stream_endpoint(request: ExtractRequest):
+    """
+    레시피 추출 진행 상황을 NDJSON(한 줄에 JSON 이벤트 하나)으로 스트리밍
+    
+    Request Body:
+        - url: 레시피 URL (string)
+        - uid: 사용자 ID (string)
+    
+    Response (application/x-ndjson, 한 줄씩):
+        - {"type": "metadata", "title", "thumbnail", "source_name"}
+        - {"type": "ingredient", "ingredient": {standard_name, food_id, category, amount, unit}}
+        - {"type": "done", "success": true, "document_id", "ingredients", "ingredients_pending", "timings"}
+        - 실패 시 {"type": "error", "success": false, "error"}
+    """
+    logger.info(f"레시피 스트리밍 추출 요청: url={request.url}, uid={request.uid}")
+    budget = RequestBudget(settings.REQUEST_BUDGET_SECONDS)
+    
+    async def _events():
+        async for event in extract_recipe_stream(request.url, request.uid, budget):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(_events(), media_type="application/x-ndjson")
+
+
+@app.post("/extract/batch", response_model=BatchExtractResponse)
+async def extract_recipes_batch_endpoint(request: BatchExtractRequest):
+    """
+    여러 레시피 URL을 한 번에 추출하고 Firestore에 일괄 저장
+    
+    Request Body:
+        - uid: 사용자 ID (string)
+        - items: [{url}] 리스트 (최대 BATCH_EXTRACT_MAX_ITEMS개)
+    
+    Response:
+        - success: 배치 처리 성공 여부 (bool)
+        - results: 항목별 결과 리스트 (항목 단위 실패는 success=false와 error로 표시)
+        - timings: 단계별 소요 시간 ms (dict, optional)
+        - error: 오류 메시지 (string, optional)
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="items가 비어 있습니다.")
+    if len(request.items) > settings.BATCH_EXTRACT_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"한 번에 최대 {settings.BATCH_EXTRACT_MAX_ITEMS}개까지 요청할 수 있습니다."
+        )
+    
+    try:
+        urls = [item.url for item in request.items]
+        logger.info(f"레시피 일괄 추출 요청: {len(urls)}개, uid={request.uid}")
+        result = await extract_recipes_batch(urls, request.uid)
+        
+        if not result.get('success'):
+            error_msg = result.get('error', '레시피 일괄 추출 중 오류가 발생했습니다.')
+            logger.error(f"레시피 일괄 추출 실패: {error_msg}")
+            raise HTTPException(
+                status_code=500,
+                detail=error_msg
+            )
+        
+        return BatchExtractResponse(**result)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        logger.error(f"서버 오류 발생:\n{error_trace}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"서버 오류: {str(e)}"
+        )
+
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host=settings.SERVER_HOST,
-        port=settings.SERVER_PORT,
-        reload=settings.DEBUG
-    )
+    import uvicorn
+
+    if settings.SERVER_WORKERS > 1:
+        # 워커를 띄우기 전에 foodData 스냅샷과 매칭 인덱스를 공유 캐시에 한 번만 적재
+        if get_shared_cache() is not None:
+            warm_up_ingredient_matcher()
+        uvicorn.run(
+            "main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            workers=settings.SERVER_WORKERS
+        )
+    else:
+        uvicorn.run(
+            "main:app",
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            reload=settings.DEBUG
+        )
 
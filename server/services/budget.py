@@ -0,0 +1,88 @@
+"""요청 단위 시간 예산(deadline)"""
+import asyncio
+import time
+from typing import AsyncIterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class BudgetExhausted(Exception):
+    """요청 시간 예산을 모두 써서 다음 단계를 시작할 수 없는 경우"""
+
+
+class RequestBudget:
+    """
+    요청 하나가 upstream 호출에 쓸 수 있는 전체 시간 예산.
+
+    /extract 핸들러에서 만들어 추출 파이프라인 전체에 전달하며, 각 단계는 자신의 기본 타임아웃과
+    남은 예산 중 작은 값을 타임아웃으로 사용합니다. 예산이 다 떨어지면 남은 단계를 건너뛰고
+    그때까지의 결과만 반환합니다.
+    """
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.deadline = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """남은 시간(초, 0 이상)"""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.deadline
+
+    def timeout(self, stage_timeout: Optional[float] = None) -> float:
+        """
+        단계 타임아웃을 남은 예산으로 줄인 값
+
+        Raises:
+            BudgetExhausted: 남은 예산이 없는 경우
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise BudgetExhausted(f"요청 시간 예산({self.seconds:.0f}초)을 모두 사용했습니다.")
+        return remaining if stage_timeout is None else min(stage_timeout, remaining)
+
+    def reserve(self, seconds: float) -> "RequestBudget":
+        """
+        뒤 단계 몫으로 seconds초를 남겨 둔 하위 예산 (앞 단계가 전체 예산을 다 쓰지 않도록)
+
+        남은 예산이 seconds보다 넉넉하지 않으면 남은 예산의 절반까지는 앞 단계에 줍니다.
+        """
+        remaining = self.remaining()
+        child = RequestBudget(self.seconds)
+        child.deadline = min(self.deadline, time.monotonic() + max(remaining - seconds, remaining / 2))
+        return child
+
+    def cap_deadline(self, deadline: float) -> float:
+        """time.monotonic 기준 기한을 예산 기한 이내로 제한"""
+        return min(deadline, self.deadline)
+
+
+def stage_timeout(budget: Optional[RequestBudget], default: Optional[float] = None) -> Optional[float]:
+    """budget이 없으면 default를, 있으면 남은 예산으로 줄인 타임아웃 반환"""
+    return default if budget is None else budget.timeout(default)
+
+
+async def iterate_within_budget(
+    iterator: AsyncIterator[T], budget: Optional[RequestBudget]
+) -> AsyncIterator[T]:
+    """
+    비동기 이터레이터를 남은 예산 안에서만 순회
+
+    다음 항목을 기다리는 동안 예산이 떨어지면 대기를 취소하고 순회를 끝냅니다.
+    (httpx 읽기 타임아웃은 조각 사이 간격만 제한하므로 전체 시간은 여기서 제한)
+    """
+    if budget is None:
+        async for item in iterator:
+            yield item
+        return
+
+    while True:
+        remaining = budget.remaining()
+        if remaining <= 0:
+            return
+        try:
+            item = await asyncio.wait_for(iterator.__anext__(), remaining)
+        except (StopAsyncIteration, asyncio.TimeoutError):
+            return
+        yield item
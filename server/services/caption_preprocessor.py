@@ -0,0 +1,200 @@
+"""Gemini 재료 추출 전 캡션 전처리 (잡음 제거, 재료 구역 분리, 중복 줄 제거, 토큰 예산)"""
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from services.llm_cache import EMOJI_PATTERN
+from services.local_extractor import SECTION_END, SECTION_HEADER, STEP_LINE, has_measurement
+from services.metrics import record_caption_tokens
+
+_URL = re.compile(r'https?://\S+|www\.\S+', re.IGNORECASE)
+_HASHTAG = re.compile(r'#[^\s#]+')
+# 이메일 주소의 @는 남김
+_MENTION = re.compile(r'(?<![\w.])@[\w.]+')
+_ZERO_WIDTH = re.compile('[\u200b\u200c\u2060\ufeff]')
+# 기호로만 이뤄진 구분선 ("━━━━", "・・・", "......")
+_DECORATION = re.compile(r'^[\W_]+$')
+# 레시피와 무관한 홍보/참여 유도 문구 (수량 표기가 있는 줄은 재료일 수 있으므로 남김)
+_PROMO = re.compile(
+    r'팔로우|맞팔|선팔|좋아요|댓글|공유\s*(?:해|하기|부탁)|저장\s*(?:필수|해\s*두|하고|해\s*주)'
+    r'|프로필\s*(?:링크|상단)|링크\s*(?:는|에서|클릭)|협찬|광고|쿠폰|할인\s*코드|공구|공동\s*구매'
+    r'|구매\s*(?:링크|문의|하기)|문의|디엠|이벤트|\bDM\b|\bfollow|link\s*in\s*bio|sponsored|giveaway|\bad\b',
+    re.IGNORECASE,
+)
+_HANGUL_OR_CJK = re.compile('[\u1100-\u11ff\u3130-\u318f\uac00-\ud7a3\u4e00-\u9fff\u3040-\u30ff]')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Gemini 입력 토큰 수 추정 (로컬 토크나이저가 없으므로 전처리 전후 비교용 근사치)
+
+    영문/숫자/ASCII 기호는 4자당 1토큰, 한글·한자·가나는 1자당 0.7토큰,
+    이모지 등 나머지 문자는 1자당 1토큰으로 계산하고 공백은 세지 않습니다.
+    """
+    ascii_chars = cjk_chars = other_chars = 0
+    for char in text:
+        if char.isspace():
+            continue
+        if char.isascii():
+            ascii_chars += 1
+        elif _HANGUL_OR_CJK.match(char):
+            cjk_chars += 1
+        else:
+            other_chars += 1
+    return round(ascii_chars / 4 + cjk_chars * 0.7 + other_chars)
+
+
+@dataclass
+class PreparedCaption:
+    """전처리 결과와 전후 추정 토큰 수"""
+    text: str
+    tokens_before: int
+    tokens_after: int
+    section_isolated: bool = False
+    truncated: bool = False
+    removed_lines: int = 0
+
+
+def _clean_line(line: str) -> str:
+    line = _URL.sub(' ', line)
+    line = _HASHTAG.sub(' ', line)
+    line = _MENTION.sub(' ', line)
+    line = EMOJI_PATTERN.sub(' ', line)
+    return ' '.join(line.split())
+
+
+def _isolate_section(lines: List[str]) -> Optional[List[str]]:
+    """
+    재료 구역(재료/양념/소스 제목부터 조리 순서 전까지)의 줄만 반환
+
+    제목 줄도 함께 남겨 "양념: ..."처럼 어느 구역의 재료인지 알 수 있게 하고,
+    구역 안의 재료 항목이 2개 미만이면 구역을 확신할 수 없으므로 None
+    """
+    section: List[str] = []
+    in_section = False
+    items = 0
+    for line in lines:
+        if SECTION_END.search(line) or (in_section and STEP_LINE.match(line)):
+            in_section = False
+            continue
+        header = SECTION_HEADER.match(line)
+        if header:
+            in_section = True
+            section.append(line)
+            items += bool(header.group('rest'))
+            continue
+        if in_section:
+            section.append(line)
+            items += 1
+    return section if items >= 2 else None
+
+
+def _truncate(lines: List[str], max_tokens: int) -> List[str]:
+    """앞쪽 줄부터 토큰 예산 안에 들어가는 만큼만 남김 (첫 줄부터 넘치면 글자 단위로 자름)"""
+    kept: List[str] = []
+    used = 0
+    for line in lines:
+        cost = estimate_tokens(line)
+        if used + cost > max_tokens:
+            if not kept:
+                kept.append(line[:max(1, len(line) * max_tokens // max(cost, 1))])
+            break
+        kept.append(line)
+        used += cost
+    return kept
+
+
+class CaptionPreprocessor:
+    """
+    인스타그램 캡션에서 재료 추출에 필요 없는 부분을 덜어내 Gemini 입력 토큰을 줄입니다.
+
+    1. URL, 해시태그, @멘션, 이모지 제거 및 공백 정리
+    2. 구분선, 빈 줄, 중복 줄, 홍보 문구 줄 제거
+    3. 재료 구역이 있으면 그 구역만 남김 (사연/조리 순서 제거)
+    4. 추정 토큰 수가 max_tokens를 넘으면 뒤쪽 줄부터 잘라냄
+
+    규칙 기반 추출기는 원문 구조를 그대로 쓰므로 이 전처리는 Gemini로 넘기는 텍스트에만 적용합니다.
+    """
+
+    def __init__(self, max_tokens: int, isolate_section: bool = True):
+        self._max_tokens = max_tokens
+        self._isolate_section = isolate_section
+        self.captions = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+        self.sections_isolated = 0
+        self.truncated = 0
+
+    def prepare(self, description: str) -> PreparedCaption:
+        """전처리한 텍스트와 전후 추정 토큰 수 반환 (통계와 메트릭에도 반영)"""
+        text = unicodedata.normalize('NFC', _ZERO_WIDTH.sub('', description))
+        raw_lines = text.splitlines()
+
+        lines: List[str] = []
+        seen = set()
+        for raw_line in raw_lines:
+            line = _clean_line(raw_line)
+            if not line or _DECORATION.match(line):
+                continue
+            key = ''.join(line.split()).casefold()
+            if key in seen:
+                continue
+            if _PROMO.search(line) and not SECTION_HEADER.match(line) and not has_measurement(line):
+                continue
+            seen.add(key)
+            lines.append(line)
+
+        section = _isolate_section(lines) if self._isolate_section else None
+        if section is not None:
+            lines = section
+        if not lines:
+            # 해시태그만 있는 캡션은 태그 단어를 본문으로 사용 (#두부 #애호박)
+            lines = [' '.join(tag.lstrip('#') for tag in _HASHTAG.findall(text))]
+
+        kept = _truncate(lines, self._max_tokens)
+        prepared = PreparedCaption(
+            text='\n'.join(kept).strip(),
+            tokens_before=estimate_tokens(description),
+            tokens_after=0,
+            section_isolated=section is not None,
+            truncated=sum(map(len, kept)) < sum(map(len, lines)),
+            removed_lines=len(raw_lines) - len(kept),
+        )
+        prepared.tokens_after = estimate_tokens(prepared.text)
+
+        self.captions += 1
+        self.tokens_before += prepared.tokens_before
+        self.tokens_after += prepared.tokens_after
+        self.sections_isolated += prepared.section_isolated
+        self.truncated += prepared.truncated
+        record_caption_tokens(prepared.tokens_before, prepared.tokens_after)
+        return prepared
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'captions': self.captions,
+            'tokens_before': self.tokens_before,
+            'tokens_after': self.tokens_after,
+            'saved_ratio': round(1 - self.tokens_after / self.tokens_before, 3) if self.tokens_before else 0.0,
+            'sections_isolated': self.sections_isolated,
+            'truncated': self.truncated,
+        }
+
+
+_caption_preprocessor: Optional[CaptionPreprocessor] = None
+
+
+def get_caption_preprocessor() -> Optional[CaptionPreprocessor]:
+    """프로세스 전역 캡션 전처리기 반환 (CAPTION_PREPROCESS_ENABLED=false면 None)"""
+    global _caption_preprocessor
+
+    if not settings.CAPTION_PREPROCESS_ENABLED:
+        return None
+    if _caption_preprocessor is None:
+        _caption_preprocessor = CaptionPreprocessor(
+            max_tokens=settings.CAPTION_MAX_TOKENS,
+            isolate_section=settings.CAPTION_ISOLATE_SECTION,
+        )
+    return _caption_preprocessor
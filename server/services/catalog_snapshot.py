@@ -0,0 +1,367 @@
+"""foodData 카탈로그의 압축 바이너리 형식과 버전이 있는 로컬 스냅샷 파일 (mmap으로 읽기)"""
+import array
+import logging
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'RRFC'
+# 형식(열 구성, 헤더)을 바꾸면 올려서 이전 파일을 읽지 않도록 함
+FORMAT_VERSION = 1
+
+# 카탈로그가 보관하는 foodData 필드 (그 외 필드는 서버에서 쓰지 않으므로 버림)
+CATALOG_FIELDS = ('name', 'category', 'emojiPath', 'shelfLifeMap', 'updatedAt')
+
+# 문자열 없음 / 보관 기한 없음 표시
+NO_STRING = 0xFFFFFFFF
+NO_SHELF_LIFE = -1
+# int16 보관 기한의 최댓값 (약 89년, 넘는 값은 이 값으로 저장)
+MAX_SHELF_LIFE_DAYS = 0x7FFF
+
+# magic, 형식 버전, 바이트 순서(0=little, 1=big), generation, 생성 시각, 최신 updatedAt(없으면 NaN),
+# 음식 수, 문자열 수, 카테고리 수, 보관 기한 키 수
+_HEADER = struct.Struct('<4sHHQdd4I')
+# 헤더 뒤에 오는 구역 시작 위치들 (uint64, 아래 _SECTIONS 순서)
+_SECTIONS = (
+    'string_offsets',   # uint32[string_count + 1], UTF-8 blob 안의 시작 위치
+    'string_blob',      # 모든 문자열(id, 이름, 카테고리, 이모지 경로, 보관 기한 키)을 한 번씩만 저장
+    'categories',       # uint32[category_count], 카테고리 코드 -> 문자열 번호
+    'shelf_keys',       # uint32[shelf_key_count], 보관 기한 열 -> 문자열 번호 ("냉장|통째|false" 등)
+    'ids',              # uint32[food_count], 문자열 번호
+    'names',            # uint32[food_count], 문자열 번호
+    'category_codes',   # uint16[food_count], 카테고리 코드 (NO_STRING이면 0xFFFF)
+    'emoji_paths',      # uint32[food_count], 문자열 번호 (없으면 NO_STRING)
+    'updated_at',       # float64[food_count], epoch 초 (없으면 NaN)
+    'shelf_life',       # int16[food_count * shelf_key_count], 일 단위 (없으면 -1)
+)
+_SECTION_TABLE = struct.Struct(f'<{len(_SECTIONS)}Q')
+_NO_CATEGORY = 0xFFFF
+_BYTE_ORDER = 0 if sys.byteorder == 'little' else 1
+
+
+def project_food(doc_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Firestore 문서에서 카탈로그가 보관하는 필드만 남긴 음식 딕셔너리
+
+    압축 카탈로그에 저장했다가 읽은 값(CompactCatalog.to_dict)과 같은 형식으로 맞춥니다.
+    (보관 기한은 일 단위 정수, 빈 보관 기한 맵과 형식이 맞지 않는 값은 생략)
+    그래야 스냅샷 파일이나 리스너 최초 스냅샷을 Firestore 내용과 비교해 실제로 바뀐 경우만 버전을 올립니다.
+    """
+    food: Dict[str, Any] = {'id': str(doc_id), 'name': str(data.get('name') or '')}
+    category = data.get('category')
+    if isinstance(category, str):
+        food['category'] = category
+    emoji_path = data.get('emojiPath')
+    if isinstance(emoji_path, str):
+        food['emojiPath'] = emoji_path
+    shelf_life_map = _shelf_life_map(data.get('shelfLifeMap'))
+    if shelf_life_map:
+        food['shelfLifeMap'] = shelf_life_map
+    updated_at = data.get('updatedAt')
+    if isinstance(updated_at, datetime):
+        food['updatedAt'] = _from_epoch(_to_epoch(updated_at))
+    return food
+
+
+def _shelf_life_days(value: Any) -> Optional[int]:
+    """보관 기한 값을 저장할 일 수로 변환 (소수는 버림, 음수나 숫자가 아닌 값은 None)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0:
+        return min(int(value), MAX_SHELF_LIFE_DAYS)
+    return None
+
+
+def _shelf_life_map(value: Any) -> Dict[str, int]:
+    if not isinstance(value, dict):
+        return {}
+    days = {key: _shelf_life_days(item) for key, item in value.items()}
+    return {key: item for key, item in days.items() if item is not None}
+
+
+def _to_epoch(value: Any) -> float:
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return math.nan
+
+
+def _from_epoch(value: float) -> Optional[datetime]:
+    if math.isnan(value):
+        return None
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+class CompactCatalog:
+    """
+    읽기 전용 foodData 카탈로그.
+
+    음식마다 딕셔너리를 만드는 대신 열(column) 단위 배열로 보관합니다.
+
+    - 문자열은 한 번씩만 UTF-8 blob에 저장하고 번호(interning)로 참조
+    - 카테고리는 uint16 코드, 보관 기한(shelfLifeMap)은 키 순서를 고정한 int16 행렬(일 단위)
+
+    버퍼는 bytes이거나 mmap이며, 배열은 memoryview.cast로 복사 없이 읽습니다.
+    여러 워커가 같은 스냅샷 파일을 mmap하면 페이지 캐시를 함께 씁니다.
+    문자열은 필요할 때만 디코딩하고, 이름 목록(names())은 한 번 만든 뒤 재사용합니다.
+    """
+
+    def __init__(self, buffer, source: Optional[str] = None):
+        self._buffer = buffer
+        self.source = source
+        view = memoryview(buffer)
+        if len(view) < _HEADER.size + _SECTION_TABLE.size:
+            raise ValueError("카탈로그 스냅샷이 너무 짧습니다.")
+        (
+            magic, format_version, byte_order, self.generation, self.created_at, max_updated_at,
+            food_count, string_count, category_count, shelf_key_count,
+        ) = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or format_version != FORMAT_VERSION or byte_order != _BYTE_ORDER:
+            raise ValueError(
+                f"지원하지 않는 카탈로그 스냅샷입니다: magic={magic!r}, format_version={format_version}"
+            )
+        self.max_updated_at = _from_epoch(max_updated_at)
+        offsets = dict(zip(_SECTIONS, _SECTION_TABLE.unpack_from(view, _HEADER.size)))
+
+        def section(name: str, fmt: str, count: int) -> memoryview:
+            start = offsets[name]
+            size = struct.calcsize(fmt) * count
+            if start + size > len(view):
+                raise ValueError(f"카탈로그 스냅샷이 잘렸습니다: section={name}")
+            return view[start:start + size].cast(fmt)
+
+        self._count = food_count
+        self._string_offsets = section('string_offsets', 'I', string_count + 1)
+        self._blob = view[offsets['string_blob']:offsets['string_blob'] + self._string_offsets[string_count]]
+        self._categories = tuple(self.string(i) for i in section('categories', 'I', category_count))
+        self._shelf_keys = tuple(self.string(i) for i in section('shelf_keys', 'I', shelf_key_count))
+        self._ids = section('ids', 'I', food_count)
+        self._names = section('names', 'I', food_count)
+        self._category_codes = section('category_codes', 'H', food_count)
+        self._emoji_paths = section('emoji_paths', 'I', food_count)
+        self._updated_at = section('updated_at', 'd', food_count)
+        self._shelf_life = section('shelf_life', 'h', food_count * shelf_key_count)
+        self._name_list: Optional[List[str]] = None
+
+    @classmethod
+    def from_foods(
+        cls,
+        foods: Iterable[Dict[str, Any]],
+        generation: int = 0,
+        max_updated_at: Optional[datetime] = None,
+    ) -> 'CompactCatalog':
+        """음식 딕셔너리들로 메모리 안의 카탈로그 생성"""
+        return cls(encode_catalog(foods, generation, max_updated_at))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """음식 딕셔너리를 하나씩 만들어 반환 (기존 리스트 형식이 필요한 곳용)"""
+        for row in range(self._count):
+            yield self.to_dict(row)
+
+    @property
+    def nbytes(self) -> int:
+        return len(memoryview(self._buffer))
+
+    @property
+    def categories(self) -> tuple:
+        return self._categories
+
+    @property
+    def shelf_life_keys(self) -> tuple:
+        return self._shelf_keys
+
+    def string(self, index: int) -> str:
+        return bytes(self._blob[self._string_offsets[index]:self._string_offsets[index + 1]]).decode('utf-8')
+
+    def names(self) -> List[str]:
+        """행 순서대로의 음식 이름 목록 (interning된 문자열, 처음 한 번만 디코딩)"""
+        if self._name_list is None:
+            self._name_list = [sys.intern(self.string(index)) for index in self._names]
+        return self._name_list
+
+    def name(self, row: int) -> str:
+        return self.names()[row]
+
+    def food_id(self, row: int) -> str:
+        return self.string(self._ids[row])
+
+    def category(self, row: int) -> str:
+        code = self._category_codes[row]
+        return '' if code == _NO_CATEGORY else self._categories[code]
+
+    def emoji_path(self, row: int) -> Optional[str]:
+        index = self._emoji_paths[row]
+        return None if index == NO_STRING else self.string(index)
+
+    def updated_at(self, row: int) -> Optional[datetime]:
+        return _from_epoch(self._updated_at[row])
+
+    def shelf_life(self, row: int) -> Dict[str, int]:
+        width = len(self._shelf_keys)
+        values = self._shelf_life[row * width:(row + 1) * width]
+        return {key: value for key, value in zip(self._shelf_keys, values) if value != NO_SHELF_LIFE}
+
+    def to_dict(self, row: int) -> Dict[str, Any]:
+        """project_food와 같은 형식의 음식 딕셔너리 (보관 기한이 없으면 shelfLifeMap 생략)"""
+        food: Dict[str, Any] = {'id': self.food_id(row), 'name': self.name(row)}
+        if self._category_codes[row] != _NO_CATEGORY:
+            food['category'] = self.category(row)
+        emoji_path = self.emoji_path(row)
+        if emoji_path is not None:
+            food['emojiPath'] = emoji_path
+        shelf_life = self.shelf_life(row) if self._shelf_keys else None
+        if shelf_life:
+            food['shelfLifeMap'] = shelf_life
+        updated_at = self.updated_at(row)
+        if updated_at is not None:
+            food['updatedAt'] = updated_at
+        return food
+
+    def to_bytes(self) -> bytes:
+        return bytes(memoryview(self._buffer))
+
+
+def encode_catalog(
+    foods: Iterable[Dict[str, Any]],
+    generation: int = 0,
+    max_updated_at: Optional[datetime] = None,
+) -> bytes:
+    """
+    음식 딕셔너리들을 압축 카탈로그 바이트로 직렬화
+
+    보관 기한 값이 정수가 아니면(소수 등) 버림 처리하고, 음수나 숫자가 아닌 값은 없는 것으로 봅니다.
+    MAX_SHELF_LIFE_DAYS를 넘는 값은 MAX_SHELF_LIFE_DAYS로 저장합니다.
+    """
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    food_list = list(foods)
+    category_codes: Dict[str, int] = {}
+    shelf_keys: Dict[str, int] = {}
+    for food in food_list:
+        category = food.get('category')
+        if isinstance(category, str) and category not in category_codes:
+            category_codes[category] = len(category_codes)
+        shelf_life_map = food.get('shelfLifeMap')
+        if isinstance(shelf_life_map, dict):
+            for key in shelf_life_map:
+                if key not in shelf_keys:
+                    shelf_keys[key] = len(shelf_keys)
+    if len(category_codes) >= _NO_CATEGORY:
+        raise ValueError(f"카테고리가 너무 많습니다: {len(category_codes)}개")
+
+    ids = array.array('I')
+    names = array.array('I')
+    codes = array.array('H')
+    emoji_paths = array.array('I')
+    updated_at = array.array('d')
+    shelf_life = array.array('h', [NO_SHELF_LIFE]) * (len(food_list) * len(shelf_keys))
+    for row, food in enumerate(food_list):
+        ids.append(intern(str(food.get('id', ''))))
+        names.append(intern(str(food.get('name') or '')))
+        category = food.get('category')
+        codes.append(category_codes[category] if isinstance(category, str) else _NO_CATEGORY)
+        emoji_path = food.get('emojiPath')
+        emoji_paths.append(intern(emoji_path) if isinstance(emoji_path, str) else NO_STRING)
+        updated_at.append(_to_epoch(food.get('updatedAt')))
+        shelf_life_map = food.get('shelfLifeMap')
+        if isinstance(shelf_life_map, dict):
+            base = row * len(shelf_keys)
+            for key, value in shelf_life_map.items():
+                days = _shelf_life_days(value)
+                if days is not None:
+                    shelf_life[base + shelf_keys[key]] = days
+
+    categories = array.array('I', (intern(category) for category in category_codes))
+    shelf_key_strings = array.array('I', (intern(key) for key in shelf_keys))
+
+    encoded = [value.encode('utf-8') for value in strings]
+    string_offsets = array.array('I', [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    sections = {
+        'string_offsets': string_offsets.tobytes(),
+        'string_blob': b''.join(encoded),
+        'categories': categories.tobytes(),
+        'shelf_keys': shelf_key_strings.tobytes(),
+        'ids': ids.tobytes(),
+        'names': names.tobytes(),
+        'category_codes': codes.tobytes(),
+        'emoji_paths': emoji_paths.tobytes(),
+        'updated_at': updated_at.tobytes(),
+        'shelf_life': shelf_life.tobytes(),
+    }
+
+    # 모든 구역을 8바이트 경계에 맞춰 배치 (cast로 바로 읽을 수 있도록)
+    position = _HEADER.size + _SECTION_TABLE.size
+    offsets = []
+    chunks = []
+    for name in _SECTIONS:
+        padding = -position % 8
+        chunks.append(b'\0' * padding)
+        position += padding
+        offsets.append(position)
+        chunks.append(sections[name])
+        position += len(sections[name])
+
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, _BYTE_ORDER, generation, time.time(), _to_epoch(max_updated_at),
+        len(food_list), len(strings), len(category_codes), len(shelf_keys),
+    )
+    return header + _SECTION_TABLE.pack(*offsets) + b''.join(chunks)
+
+
+def write_catalog_snapshot(path: str, catalog: CompactCatalog) -> None:
+    """
+    스냅샷 파일을 원자적으로 교체 (임시 파일에 쓴 뒤 rename)
+
+    이전 파일을 mmap하고 있는 프로세스는 교체 후에도 이전 내용을 그대로 읽습니다.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(memoryview(catalog._buffer))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, target)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def load_catalog_snapshot(path: str) -> Optional[CompactCatalog]:
+    """스냅샷 파일을 mmap해 반환 (없거나 형식이 맞지 않으면 None)"""
+    try:
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        # ValueError: 빈 파일은 mmap할 수 없음
+        return None
+    try:
+        return CompactCatalog(buffer, source=path)
+    except ValueError as e:
+        # buffer는 참조가 사라지면 해제됨 (예외 프레임이 memoryview를 잡고 있어 바로 close할 수 없음)
+        logger.warning(f"foodData 스냅샷을 읽을 수 없어 무시합니다: path={path}, error={e}")
+        return None
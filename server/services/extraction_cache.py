@@ -0,0 +1,313 @@
+"""URL 단위 레시피 추출 결과 캐시"""
+import asyncio
+import functools
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# 공유 링크에 붙는 추적용 쿼리 파라미터 (콘텐츠와 무관하므로 캐시 키에서 제거)
+_TRACKING_PARAMS = {
+    'igsh', 'igshid', 'fbclid', 'gclid', 'mibextid', 'si', 'ref', 'ref_src', 'feature', 'share_id',
+}
+_TRACKING_PREFIXES = ('utm_',)
+
+# 조회 시각(last_access) 갱신을 모아 두었다가 한 번에 기록하는 개수
+_TOUCH_FLUSH_SIZE = 64
+
+_INSTAGRAM_HOSTS = {'instagram.com', 'www.instagram.com', 'm.instagram.com', 'instagr.am'}
+# /p/{code}, /reel/{code}, /reels/{code}, /tv/{code}, /{username}/p/{code}, /{username}/reel/{code}는 모두 같은 게시물
+_INSTAGRAM_POST_PATH = re.compile(
+    r'^/(?:(?:p|reel|reels|tv)|(?P<user>[A-Za-z0-9_.]+)/(?:p|reel))/(?P<code>[A-Za-z0-9_-]+)/?$'
+)
+# 게시물 단축 코드나 사용자 이름 자리에 올 수 있지만 게시물이 아닌 경로 (/reels/audio/{id}/ 등)
+_INSTAGRAM_RESERVED_SEGMENTS = {
+    'audio', 'explore', 'stories', 'accounts', 'direct', 'tags', 'locations', 'reels', 'reel', 'p', 'tv',
+}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    캐시 키로 사용할 정규화 URL 생성
+
+    - scheme/host 소문자화, 기본 포트 및 fragment 제거
+    - igsh, utm_* 등 추적용 파라미터 제거 후 나머지 파라미터 정렬
+    - 인스타그램 게시물은 reel/p/tv 경로 변형을 https://www.instagram.com/p/{code}/ 로 통일
+    """
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+
+    if host in _INSTAGRAM_HOSTS:
+        match = _INSTAGRAM_POST_PATH.match(parts.path)
+        if match and not {match.group('user'), match.group('code').lower()} & _INSTAGRAM_RESERVED_SEGMENTS:
+            return f"https://www.instagram.com/p/{match.group('code')}/"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in _TRACKING_PARAMS and not key.lower().startswith(_TRACKING_PREFIXES)
+    )
+    path = parts.path or '/'
+    return urlunsplit((scheme, host, path, urlencode(query), ''))
+
+
+class MemoryCacheBackend:
+    """프로세스 메모리 LRU 캐시 (재시작 시 비워짐)"""
+
+    # 이벤트 루프에서 바로 호출해도 되는 백엔드
+    blocking = False
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCacheBackend:
+    """
+    로컬 SQLite 파일 기반 LRU 캐시 (서버 재시작 후에도 유지)
+
+    WAL 모드로 열기 때문에 같은 파일을 여러 프로세스가 함께 사용할 수 있습니다.
+    조회 시각 갱신은 모아 두었다가 저장할 때 함께 기록하고, 만료/초과 항목 정리는
+    추적 중인 항목 수가 max_entries를 넘을 때만 실행합니다.
+    """
+
+    # 호출이 디스크 I/O와 잠금 대기로 막힐 수 있으므로 ExtractionCache가 전용 스레드에서 실행
+    blocking = True
+
+    def __init__(self, path: str, max_entries: int):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # 아직 기록하지 않은 조회 시각 (key -> last_access)
+        self._touched: Dict[str, float] = {}
+
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL,'
+            ' last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)')
+        self._conn.commit()
+        self._entry_count = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at <= now:
+                self._touched.pop(key, None)
+                self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+                self._conn.commit()
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= _TOUCH_FLUSH_SIZE:
+                self._flush_touched()
+                self._conn.commit()
+        return json.loads(value)
+
+    def set(self, key: str, value: Dict[str, Any], ttl_seconds: float) -> None:
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            exists = self._conn.execute('SELECT 1 FROM entries WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)',
+                (key, payload, now + ttl_seconds, now),
+            )
+            self._touched.pop(key, None)
+            self._entry_count += 0 if exists else 1
+            self._flush_touched()
+            if self._entry_count > self._max_entries:
+                self._evict(now)
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                'UPDATE entries SET last_access = ? WHERE key = ?',
+                [(last_access, key) for key, last_access in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self, now: float) -> None:
+        """만료 항목 정리 후 최대 개수를 넘으면 가장 오래 사용되지 않은 항목부터 제거"""
+        self._conn.execute('DELETE FROM entries WHERE expires_at <= ?', (now,))
+        self._conn.execute(
+            'DELETE FROM entries WHERE key IN ('
+            ' SELECT key FROM entries ORDER BY last_access ASC'
+            ' LIMIT max(0, (SELECT COUNT(*) FROM entries) - ?))',
+            (self._max_entries,),
+        )
+        # 같은 파일을 쓰는 다른 워커가 저장한 항목까지 반영
+        self._entry_count = self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._touched.pop(key, None)
+            cursor = self._conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+            self._entry_count -= max(cursor.rowcount, 0)
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+
+class ExtractionCache:
+    """
+    정규화 URL을 키로 레시피 콘텐츠(title, thumbnail, source_name, raw_ingredients)를 저장하는 캐시
+
+    raw_ingredients는 foodData 매칭 전의 Gemini 원본 결과이므로,
+    캐시 적중 시에도 매칭은 현재 카탈로그 기준으로 다시 수행됩니다.
+    SQLite처럼 막힐 수 있는 백엔드는 전용 스레드 하나에서 호출해 이벤트 루프를 막지 않습니다.
+    """
+
+    def __init__(self, backend, ttl_seconds: float):
+        self._backend = backend
+        self._ttl_seconds = ttl_seconds
+        self._executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix='extraction-cache') if backend.blocking else None
+        )
+        self.hits = 0
+        self.misses = 0
+
+    async def _run(self, func, *args: Any) -> Any:
+        if self._executor is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def get(self, url: str) -> Optional[Dict[str, Any]]:
+        key = canonicalize_url(url)
+        try:
+            value = await self._run(self._backend.get, key)
+        except Exception as e:
+            # 캐시 장애가 추출 자체를 막지 않도록 미스로 처리
+            logger.warning(f"추출 캐시 조회 실패: key={key}, error={e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, url: str, content: Dict[str, Any]) -> None:
+        key = canonicalize_url(url)
+        try:
+            await self._run(self._backend.set, key, content, self._ttl_seconds)
+        except Exception as e:
+            logger.warning(f"추출 캐시 저장 실패: key={key}, error={e}")
+
+    async def delete(self, url: str) -> None:
+        await self._run(self._backend.delete, canonicalize_url(url))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'backend': type(self._backend).__name__,
+            'entries': len(self._backend),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class _DisabledCache:
+    """EXTRACTION_CACHE_BACKEND=none일 때 사용하는 빈 캐시"""
+
+    async def get(self, url: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    async def set(self, url: str, content: Dict[str, Any]) -> None:
+        pass
+
+    async def delete(self, url: str) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': 'none'}
+
+
+_extraction_cache = None
+_extraction_cache_lock = threading.Lock()
+
+
+def resolve_cache_path(path: str) -> str:
+    # 상대 경로인 경우 server 디렉토리 기준으로 변환 (firebase 인증 파일 경로와 동일한 규칙)
+    if path != ':memory:' and not os.path.isabs(path):
+        return str(Path(__file__).parent.parent / path)
+    return path
+
+
+def get_extraction_cache():
+    """설정(EXTRACTION_CACHE_BACKEND)에 맞는 프로세스 전역 추출 캐시 반환"""
+    global _extraction_cache
+
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                backend_name = settings.EXTRACTION_CACHE_BACKEND.lower()
+                if backend_name == 'memory':
+                    backend = MemoryCacheBackend(settings.EXTRACTION_CACHE_MAX_ENTRIES)
+                elif backend_name == 'sqlite':
+                    backend = SqliteCacheBackend(
+                        resolve_cache_path(settings.EXTRACTION_CACHE_PATH),
+                        settings.EXTRACTION_CACHE_MAX_ENTRIES,
+                    )
+                else:
+                    _extraction_cache = _DisabledCache()
+                    return _extraction_cache
+                _extraction_cache = ExtractionCache(backend, settings.EXTRACTION_CACHE_TTL_SECONDS)
+    return _extraction_cache
@@ -0,0 +1,322 @@
+"""recipeLog 문서를 먼저 만들고 백그라운드 워커가 추출을 마무리하는 작업 큐"""
+import asyncio
+import functools
+import itertools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from config import settings
+from services.extraction_cache import resolve_cache_path
+from services.request_context import reset_request_id, set_request_id
+
+logger = logging.getLogger(__name__)
+
+# 숫자가 작을수록 먼저 처리 (우선 처리 레인)
+PRIORITIES = {'high': 0, 'normal': 1}
+
+
+class JobQueueFull(Exception):
+    """대기 중인 작업이 EXTRACTION_JOB_MAX_QUEUED개를 넘어 새 작업을 받을 수 없는 경우"""
+
+
+@dataclass
+class ExtractionJob:
+    """추출 작업 하나 (job_id는 미리 만든 recipeLog 문서 ID)"""
+    job_id: str
+    uid: str
+    url: str
+    priority: int = PRIORITIES['normal']
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.time)
+
+
+class JobStore:
+    """
+    대기/실행 중인 작업을 로컬 SQLite 파일에 기록합니다.
+
+    작업은 끝나면 삭제되므로, 서버가 재시작되었을 때 남아 있는 행이 곧 마무리하지 못한 작업입니다.
+    여러 워커 프로세스가 같은 파일을 쓰므로 각 행에 담당 프로세스(owner, pid)를 기록하고,
+    재시작 시에는 종료된 프로세스의 작업만 가져옵니다(claim_orphans).
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._owner = os.getpid()
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' job_id TEXT PRIMARY KEY,'
+            ' uid TEXT NOT NULL,'
+            ' url TEXT NOT NULL,'
+            ' priority INTEGER NOT NULL,'
+            ' attempts INTEGER NOT NULL,'
+            ' enqueued_at REAL NOT NULL,'
+            ' owner INTEGER NOT NULL DEFAULT 0)'
+        )
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(jobs)')}
+        if 'owner' not in columns:
+            # owner 열이 없던 이전 파일: 기존 행은 owner=0(종료된 프로세스)으로 취급
+            self._conn.execute('ALTER TABLE jobs ADD COLUMN owner INTEGER NOT NULL DEFAULT 0')
+        self._conn.commit()
+
+    def save(self, job: ExtractionJob) -> None:
+        """작업 추가 또는 시도 횟수 갱신"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO jobs (job_id, uid, url, priority, attempts, enqueued_at, owner)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (job.job_id, job.uid, job.url, job.priority, job.attempts, job.enqueued_at, self._owner),
+            )
+            self._conn.commit()
+
+    def remove(self, job_id: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+            self._conn.commit()
+
+    def claim_orphans(self) -> List[ExtractionJob]:
+        """
+        종료된 프로세스가 남긴 작업을 이 프로세스 소유로 바꾸고 반환 (우선순위, 등록 순)
+
+        owner를 비교하며 갱신하므로 여러 워커가 동시에 시작해도 작업 하나는 한 워커만 가져갑니다.
+        컨테이너 재시작으로 이전과 같은 pid를 받은 경우를 위해 자기 pid의 행도 가져옵니다
+        (시작 시점에는 이 프로세스가 처리 중인 작업이 없으므로).
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT job_id, uid, url, priority, attempts, enqueued_at, owner FROM jobs'
+                ' ORDER BY priority, enqueued_at'
+            ).fetchall()
+            claimed = []
+            for *fields, owner in rows:
+                if owner != self._owner and _process_alive(owner):
+                    continue
+                cursor = self._conn.execute(
+                    'UPDATE jobs SET owner = ? WHERE job_id = ? AND owner = ?', (self._owner, fields[0], owner)
+                )
+                if cursor.rowcount:
+                    claimed.append(ExtractionJob(*fields))
+            self._conn.commit()
+        return claimed
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _process_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # 다른 사용자의 프로세스가 같은 pid를 쓰고 있음
+        return True
+    return True
+
+
+class ExtractionJobQueue:
+    """
+    추출 작업 큐와 프로세스 내 비동기 워커 풀.
+
+    - 우선순위가 높은(high) 작업은 먼저 들어온 일반 작업보다 앞서 처리됩니다.
+    - 대기 중인 작업이 max_queued개를 넘으면 submit()이 JobQueueFull을 발생시킵니다.
+    - 작업은 JobStore에도 기록되어 서버가 재시작되면 start()에서 다시 대기열에 넣습니다.
+      (멀티 워커에서는 종료된 워커가 남긴 작업만 가져옴)
+    - 여러 워커 프로세스가 같은 SQLite 파일을 쓰므로, 쓰기 잠금을 기다리는 동안 이벤트 루프를 막지 않도록
+      JobStore 호출은 전용 스레드 하나에서 실행합니다.
+    - handler가 예외를 던지면 retry_backoff초부터 두 배씩 늘려 가며 max_attempts번까지 다시 시도하고,
+      그래도 실패하면 on_failure를 호출합니다.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[ExtractionJob], Awaitable[None]],
+        on_failure: Callable[[ExtractionJob, str], Awaitable[None]],
+        *,
+        workers: int,
+        max_queued: int,
+        max_attempts: int,
+        retry_backoff: float,
+    ):
+        self._store = store
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='extraction-jobs')
+        self._handler = handler
+        self._on_failure = on_failure
+        self._worker_count = max(1, workers)
+        self._max_queued = max_queued
+        self._max_attempts = max(1, max_attempts)
+        self._retry_backoff = retry_backoff
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._seq = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self._retry_handles: Set[asyncio.TimerHandle] = set()
+        self._stopping = False
+        self._running = 0
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.recovered = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        """워커를 시작하고, 재시작 전에 마무리하지 못한 작업을 다시 대기열에 넣음 (서버 시작 시 호출)"""
+        self._queue = asyncio.PriorityQueue()
+        self._stopping = False
+        pending = await self._store_call(self._store.claim_orphans)
+        for job in pending:
+            self._put(job)
+        self.recovered += len(pending)
+        if pending:
+            logger.info(f"마무리하지 못한 추출 작업 {len(pending)}개를 다시 대기열에 넣었습니다.")
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"extraction-job-{i}") for i in range(self._worker_count)
+        ]
+
+    async def stop(self) -> None:
+        """워커 종료 (실행 중이거나 재시도를 기다리던 작업은 저장소에 남아 다음 시작 때 다시 처리됨)"""
+        # 저장소를 닫기 전에 새 submit과 예약된 재시도가 저장소에 닿지 않도록 먼저 막음
+        self._stopping = True
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        # 전용 스레드에서 실행 중이거나 대기 중인 저장소 호출이 끝난 뒤 닫힘
+        await self._store_call(self._store.close)
+        self._executor.shutdown(wait=False)
+
+    def has_capacity(self) -> bool:
+        return not self._stopping and self._queue is not None and self._queue.qsize() < self._max_queued
+
+    async def submit(self, job: ExtractionJob) -> None:
+        """
+        작업을 저장소에 기록하고 대기열에 추가
+
+        Raises:
+            JobQueueFull: 대기 중인 작업이 max_queued개 이상이거나 워커가 시작되지 않았거나 종료 중인 경우
+        """
+        if self._stopping:
+            self.rejected += 1
+            raise JobQueueFull("서버가 종료 중이라 추출 작업을 받을 수 없습니다.")
+        if not self.has_capacity():
+            self.rejected += 1
+            raise JobQueueFull(f"추출 대기 작업이 가득 찼습니다. (최대 {self._max_queued}개)")
+        await self._store_call(self._store.save, job)
+        self._put(job)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'workers': len(self._workers),
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'running': self._running,
+            'max_queued': self._max_queued,
+            'completed': self.completed,
+            'failed': self.failed,
+            'retried': self.retried,
+            'recovered': self.recovered,
+            'rejected': self.rejected,
+        }
+
+    # ---------- 내부 구현 ----------
+
+    async def _store_call(self, func, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    def _put(self, job: ExtractionJob) -> None:
+        item: Tuple[int, int, ExtractionJob] = (job.priority, next(self._seq), job)
+        self._queue.put_nowait(item)
+
+    def _schedule_retry(self, job: ExtractionJob, delay: float) -> None:
+        """delay초 뒤 작업을 다시 대기열에 넣음 (stop()에서 취소할 수 있도록 핸들을 보관)"""
+        def _requeue() -> None:
+            self._retry_handles.discard(handle)
+            self._put(job)
+
+        handle = asyncio.get_running_loop().call_later(delay, _requeue)
+        self._retry_handles.add(handle)
+
+    async def _work(self) -> None:
+        while True:
+            _, _, job = await self._queue.get()
+            self._running += 1
+            # 작업 로그는 문서 ID로 묶어 볼 수 있도록 요청 ID 대신 job-<문서 ID> 사용
+            token = set_request_id(f"job-{job.job_id}")
+            try:
+                await self._run(job)
+            finally:
+                reset_request_id(token)
+                self._running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job: ExtractionJob) -> None:
+        job.attempts += 1
+        await self._store_call(self._store.save, job)
+        try:
+            await self._handler(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if job.attempts < self._max_attempts:
+                self.retried += 1
+                backoff = self._retry_backoff * (2 ** (job.attempts - 1))
+                logger.warning(
+                    f"추출 작업 실패, {backoff:.0f}초 후 다시 시도합니다 ({job.attempts}/{self._max_attempts}): "
+                    f"job_id={job.job_id}, error={e}"
+                )
+                # 워커를 붙잡지 않도록 대기열에 다시 넣는 시점만 미룸 (저장소에는 남아 있음)
+                self._schedule_retry(job, backoff)
+                return
+            self.failed += 1
+            logger.error(f"추출 작업 최종 실패: job_id={job.job_id}, url={job.url}, error={e}")
+            try:
+                await self._on_failure(job, str(e))
+            except Exception as failure_error:
+                logger.error(f"추출 실패 상태 저장 실패: job_id={job.job_id}, error={failure_error}")
+        else:
+            self.completed += 1
+        await self._store_call(self._store.remove, job.job_id)
+
+
+_job_queue: Optional[ExtractionJobQueue] = None
+
+
+def init_extraction_job_queue(
+    handler: Callable[[ExtractionJob], Awaitable[None]],
+    on_failure: Callable[[ExtractionJob, str], Awaitable[None]],
+) -> ExtractionJobQueue:
+    """프로세스 전역 작업 큐 생성 (서버 lifespan에서 start()와 함께 호출)"""
+    global _job_queue
+
+    _job_queue = ExtractionJobQueue(
+        JobStore(resolve_cache_path(settings.EXTRACTION_JOB_DB_PATH)),
+        handler,
+        on_failure,
+        workers=settings.EXTRACTION_JOB_WORKERS,
+        max_queued=settings.EXTRACTION_JOB_MAX_QUEUED,
+        max_attempts=settings.EXTRACTION_JOB_MAX_ATTEMPTS,
+        retry_backoff=settings.EXTRACTION_JOB_RETRY_BACKOFF_SECONDS,
+    )
+    return _job_queue
+
+
+def get_extraction_job_queue() -> Optional[ExtractionJobQueue]:
+    """프로세스 전역 작업 큐 반환 (init_extraction_job_queue 전이면 None)"""
+    return _job_queue
@@ -0,0 +1,462 @@
+"""프로세스 단위(또는 워커 프로세스 간 공유) foodData 카탈로그 캐시"""
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from services.catalog_snapshot import (
+    CATALOG_FIELDS,
+    CompactCatalog,
+    load_catalog_snapshot,
+    project_food,
+    write_catalog_snapshot,
+)
+from services.extraction_cache import resolve_cache_path
+from services.shared_cache import get_shared_cache
+from firebase_config import (
+    get_food_data,
+    get_food_data_updated_since,
+    run_firestore_call,
+    watch_food_data,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _default_snapshot_path() -> Optional[str]:
+    if not settings.FOOD_CATALOG_SNAPSHOT_ENABLED:
+        return None
+    return resolve_cache_path(settings.FOOD_CATALOG_SNAPSHOT_PATH)
+
+
+class FoodCatalog:
+    """
+    foodData 컬렉션을 한 번만 적재해 두고 변경분만 반영하는 캐시.
+
+    - 최초 조회 시 컬렉션 전체를 읽어옵니다. (서버가 쓰는 필드만 전송받음)
+    - 스냅샷 리스너가 켜져 있으면 Firestore 변경 알림으로 즉시 갱신합니다.
+    - 리스너가 없거나 끊긴 경우 TTL이 지나면 updatedAt 증분 조회로 갱신합니다.
+    - 내용이 실제로 바뀔 때마다 version이 1씩 증가하므로,
+      하위 소비자(매칭 인덱스 등)는 version 비교로 재구성 여부를 판단할 수 있습니다.
+
+    갱신이 끝날 때마다 (version, CompactCatalog) 튜플을 통째로 교체해 게시하므로,
+    읽는 쪽은 락 없이 일관된 스냅샷을 얻습니다.
+
+    snapshot_path가 있으면 게시할 때마다 압축 카탈로그를 로컬 파일로도 저장하고,
+    다음 프로세스는 시작할 때 이 파일을 mmap해 Firestore 조회 없이 첫 요청을 처리합니다.
+    이때 Firestore 갱신은 백그라운드 스레드에서 진행됩니다.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = settings.FOOD_CATALOG_TTL_SECONDS,
+        full_reload_seconds: float = settings.FOOD_CATALOG_FULL_RELOAD_SECONDS,
+        use_listener: bool = settings.FOOD_CATALOG_USE_LISTENER,
+        snapshot_path: Optional[str] = None,
+        snapshot_max_age_seconds: float = settings.FOOD_CATALOG_SNAPSHOT_MAX_AGE_SECONDS,
+    ):
+        self._ttl_seconds = ttl_seconds
+        self._full_reload_seconds = full_reload_seconds
+        self._use_listener = use_listener
+        self._snapshot_path = snapshot_path
+        self._snapshot_max_age_seconds = snapshot_max_age_seconds
+
+        self._lock = threading.RLock()
+        # 스냅샷 파일에서 시작한 경우 None (갱신이 필요할 때 게시된 카탈로그에서 딕셔너리를 만듦)
+        self._foods: Optional[Dict[str, Dict[str, Any]]] = {}
+        self._version = 0
+        self._dirty = False
+        self._published: Tuple[int, CompactCatalog] = (0, CompactCatalog.from_foods([]))
+        self._loaded = False
+        self._refreshed_at = 0.0
+        self._full_loaded_at = 0.0
+        self._max_updated_at: Optional[datetime] = None
+        self._watch = None
+        self._background: Optional[threading.Thread] = None
+
+    @property
+    def version(self) -> int:
+        """카탈로그 내용이 바뀔 때마다 증가하는 버전 번호"""
+        return self._published[0]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def get_foods(self) -> CompactCatalog:
+        """
+        현재 카탈로그 반환 (필요 시 적재/갱신, Firestore 호출 시 블로킹)
+
+        반환되는 카탈로그는 같은 version 동안 동일한 객체가 재사용되며 읽기 전용입니다.
+        """
+        if self.needs_refresh():
+            self._ensure_fresh()
+        return self._published[1]
+
+    async def get_foods_async(self) -> CompactCatalog:
+        """get_foods의 비동기 버전 (적재/갱신이 필요할 때만 Firestore 스레드 풀에서 실행)"""
+        if self.needs_refresh():
+            await run_firestore_call(self._ensure_fresh)
+        return self._published[1]
+
+    def snapshot(self) -> Tuple[int, CompactCatalog]:
+        """
+        현재 게시된 (version, 카탈로그) 반환
+
+        아직 적재되지 않았을 때만 적재하며, TTL 갱신은 하지 않습니다.
+        """
+        if not self._loaded:
+            self._ensure_fresh()
+        return self._published
+
+    def needs_refresh(self) -> bool:
+        """적재 또는 갱신이 필요한지 여부 (락 없이 확인)"""
+        if not self._loaded:
+            return True
+        if self._background is not None:
+            # 백그라운드 갱신 중에는 게시된 카탈로그를 그대로 사용
+            return False
+        now = time.monotonic()
+        if now - self._full_loaded_at >= self._full_reload_seconds:
+            return True
+        if not self._listener_streaming() and now - self._refreshed_at >= self._ttl_seconds:
+            return True
+        return self._use_listener and self._listener_dead()
+
+    def invalidate(self) -> None:
+        """다음 조회 시 전체 재적재가 일어나도록 캐시 무효화"""
+        with self._lock:
+            self._full_loaded_at = 0.0
+            self._refreshed_at = 0.0
+
+    def close(self) -> None:
+        """스냅샷 리스너 해제"""
+        with self._lock:
+            if self._watch is not None:
+                try:
+                    self._watch.unsubscribe()
+                except Exception as e:
+                    logger.warning(f"foodData 리스너 해제 실패: {e}")
+                self._watch = None
+
+    # ---------- 내부 구현 ----------
+
+    def _ensure_fresh(self) -> None:
+        with self._lock:
+            if not self._loaded and self._load_snapshot_file():
+                # 파일 내용으로 바로 응답하고 Firestore 갱신은 백그라운드에서
+                self._start_background_refresh()
+                return
+            if self._foods is None:
+                # 파일에서 시작한 뒤 백그라운드 갱신이 실패한 경우: 계속 파일 내용으로 응답하며 다시 시도
+                self._start_background_refresh()
+                return
+            self._refresh()
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if not self._loaded or now - self._full_loaded_at >= self._full_reload_seconds:
+            self._full_reload()
+        elif not self._listener_streaming() and now - self._refreshed_at >= self._ttl_seconds:
+            # 리스너가 없거나 끊긴 동안에는 TTL 증분 갱신으로 따라잡음
+            self._delta_refresh()
+
+        if self._use_listener and self._listener_dead():
+            if self._watch is not None:
+                logger.warning("foodData 스냅샷 리스너가 종료되어 다시 등록합니다.")
+                self.close()
+            self._start_listener()
+        self._publish()
+
+    def _load_snapshot_file(self) -> bool:
+        """스냅샷 파일이 있고 오래되지 않았으면 게시 (성공 여부 반환)"""
+        if not self._snapshot_path:
+            return False
+        catalog = load_catalog_snapshot(self._snapshot_path)
+        if catalog is None:
+            return False
+        age = time.time() - catalog.created_at
+        if age >= self._snapshot_max_age_seconds:
+            logger.info(f"foodData 스냅샷 파일이 오래되어 Firestore에서 적재합니다: age={age:.0f}s")
+            return False
+        self._adopt(catalog)
+        # 파일이 저장된 시점을 마지막 갱신 시점으로 보고 TTL/전체 재적재 주기를 이어서 적용
+        self._refreshed_at = self._full_loaded_at = time.monotonic() - max(0.0, age)
+        logger.info(
+            f"foodData 스냅샷 파일 적재: {len(catalog)}개 항목, age={age:.0f}s, "
+            f"{catalog.nbytes / 1024:.0f}KB, version={self._version}"
+        )
+        return True
+
+    def _adopt(self, catalog: CompactCatalog) -> None:
+        """파일에서 읽은 카탈로그를 그대로 게시 (딕셔너리는 갱신이 필요할 때 만듦)"""
+        self._version += 1
+        self._published = (self._version, catalog)
+        self._foods = None
+        self._dirty = False
+        self._max_updated_at = catalog.max_updated_at
+        self._loaded = True
+
+    def _materialize_foods(self) -> Dict[str, Dict[str, Any]]:
+        if self._foods is None:
+            self._foods = {food['id']: food for food in self._published[1]}
+        return self._foods
+
+    def _start_background_refresh(self) -> None:
+        if self._background is not None:
+            return
+        self._background = threading.Thread(
+            target=self._background_refresh, name='food-catalog-refresh', daemon=True
+        )
+        self._background.start()
+
+    def _background_refresh(self) -> None:
+        try:
+            with self._lock:
+                self._refresh()
+        except Exception as e:
+            logger.warning(f"foodData 백그라운드 갱신 실패, 스냅샷 파일 내용으로 계속 응답합니다: {e}")
+            # TTL이 지나면 다시 시도
+            self._refreshed_at = self._full_loaded_at = (
+                time.monotonic() - self._full_reload_seconds + self._ttl_seconds
+            )
+        finally:
+            self._background = None
+
+    def _full_reload(self) -> None:
+        started = time.monotonic()
+        food_list = get_food_data(CATALOG_FIELDS)
+        foods = {food['id']: project_food(food['id'], food) for food in food_list}
+
+        # 스냅샷 파일에서 시작했다면 파일 내용과 비교 (같으면 버전을 올리지 않아 매칭 인덱스 재사용)
+        if foods != self._materialize_foods():
+            self._bump_version()
+        self._foods = foods
+        self._max_updated_at = _max_updated_at(food_list)
+
+        self._loaded = True
+        self._full_loaded_at = self._refreshed_at = time.monotonic()
+        logger.info(
+            f"foodData 전체 적재 완료: {len(foods)}개 항목, version={self._version}, "
+            f"elapsed={(time.monotonic() - started) * 1000:.0f}ms"
+        )
+
+    def _delta_refresh(self) -> None:
+        if self._max_updated_at is None:
+            # updatedAt 필드가 없는 컬렉션이면 증분 조회가 불가능하므로 전체 재적재
+            self._full_reload()
+            return
+
+        try:
+            changed = get_food_data_updated_since(self._max_updated_at, CATALOG_FIELDS)
+        except Exception as e:
+            logger.warning(f"foodData 증분 갱신 실패, 기존 캐시를 유지합니다: {e}")
+            self._refreshed_at = time.monotonic()
+            return
+
+        for food in changed:
+            self._apply_change('MODIFIED', food['id'], food)
+        latest = _max_updated_at(changed)
+        if latest is not None and latest > self._max_updated_at:
+            self._max_updated_at = latest
+        self._refreshed_at = time.monotonic()
+        if changed:
+            logger.info(f"foodData 증분 갱신: {len(changed)}개 변경, version={self._version}")
+
+    def _listener_streaming(self) -> bool:
+        """리스너가 변경을 받고 있는지 여부 (재연결 중이거나 종료되었으면 False)"""
+        watch = self._watch
+        return watch is not None and not self._listener_dead() and getattr(watch, 'is_active', True)
+
+    def _listener_dead(self) -> bool:
+        """리스너가 없거나 복구할 수 없는 오류로 종료되어 다시 등록해야 하는지 여부"""
+        watch = self._watch
+        # Watch는 재시도할 수 없는 스트림 오류가 나면 스스로 close()하고 _closed를 세움
+        return watch is None or getattr(watch, '_closed', False)
+
+    def _start_listener(self) -> None:
+        try:
+            self._watch = watch_food_data(self._on_listener_changes)
+            logger.info("foodData 스냅샷 리스너 등록 완료")
+        except Exception as e:
+            # 리스너를 쓸 수 없으면 TTL 기반 증분 갱신으로 동작
+            logger.warning(f"foodData 스냅샷 리스너 등록 실패, TTL 갱신으로 대체합니다: {e}")
+            self._use_listener = False
+
+    def _on_listener_changes(self, changes: List[Tuple[str, str, Optional[Dict[str, Any]]]]) -> None:
+        with self._lock:
+            for change_type, doc_id, data in changes:
+                self._apply_change(change_type, doc_id, data)
+            self._refreshed_at = time.monotonic()
+            self._publish()
+
+    def _apply_change(self, change_type: str, doc_id: str, data: Optional[Dict[str, Any]]) -> None:
+        foods = self._materialize_foods()
+        if change_type == 'REMOVED':
+            if foods.pop(doc_id, None) is not None:
+                self._bump_version()
+            return
+
+        data = project_food(doc_id, data)
+        if foods.get(doc_id) == data:
+            # 리스너 최초 스냅샷 등 내용이 같은 경우 버전을 올리지 않음
+            return
+        foods[doc_id] = data
+        updated_at = data.get('updatedAt')
+        if isinstance(updated_at, datetime) and (
+            self._max_updated_at is None or updated_at > self._max_updated_at
+        ):
+            self._max_updated_at = updated_at
+        self._bump_version()
+
+    def _bump_version(self) -> None:
+        self._version += 1
+        self._dirty = True
+
+    def _publish(self) -> None:
+        if self._dirty:
+            catalog = CompactCatalog.from_foods(
+                self._foods.values(), generation=self._version, max_updated_at=self._max_updated_at
+            )
+            self._published = (self._version, catalog)
+            self._dirty = False
+            self._write_snapshot_file(catalog)
+
+    def _write_snapshot_file(self, catalog: CompactCatalog) -> None:
+        if not self._snapshot_path:
+            return
+        try:
+            write_catalog_snapshot(self._snapshot_path, catalog)
+        except OSError as e:
+            logger.warning(f"foodData 스냅샷 파일 저장 실패: path={self._snapshot_path}, error={e}")
+
+
+class SharedFoodCatalog(FoodCatalog):
+    """
+    여러 워커 프로세스가 같은 스냅샷 파일을 mmap해 함께 쓰는 카탈로그.
+
+    - Firestore 조회(전체 적재/증분 갱신)는 잠금을 얻은 프로세스 하나만 합니다.
+      그 프로세스가 결과를 스냅샷 파일로 저장하고 공유 캐시(SharedCacheStore)의 revision을 올립니다.
+    - 나머지 프로세스는 poll_seconds마다 revision만 확인하고, 바뀌었을 때만 파일을 다시 mmap합니다.
+    - 프로세스마다 스냅샷 리스너를 두면 워커 수만큼 컬렉션 전체를 읽게 되므로 리스너는 사용하지 않습니다.
+
+    shared_revision은 현재 내용이 어느 공유 스냅샷에서 왔는지 나타내며(0이면 공유 스냅샷과 무관),
+    매칭 인덱스도 이 값으로 공유 캐시에 저장됩니다. 내용이 바뀌지 않은 갱신은 revision을 올리지 않습니다.
+    """
+
+    SNAPSHOT_KEY = 'food_catalog'
+    _REFRESH_LOCK = 'food_catalog_refresh'
+    # 갱신하던 프로세스가 죽어도 이 시간이 지나면 다른 프로세스가 잠금을 가져감
+    _REFRESH_LOCK_SECONDS = 120.0
+
+    def __init__(
+        self,
+        shared_store,
+        poll_seconds: float = settings.FOOD_CATALOG_SHARED_POLL_SECONDS,
+        ttl_seconds: float = settings.FOOD_CATALOG_TTL_SECONDS,
+        full_reload_seconds: float = settings.FOOD_CATALOG_FULL_RELOAD_SECONDS,
+        snapshot_path: Optional[str] = None,
+    ):
+        super().__init__(
+            ttl_seconds=ttl_seconds,
+            full_reload_seconds=full_reload_seconds,
+            use_listener=False,
+            # 워커 간에는 스냅샷 파일로 내용을 주고받으므로 FOOD_CATALOG_SNAPSHOT_ENABLED와 무관하게 사용
+            snapshot_path=snapshot_path or resolve_cache_path(settings.FOOD_CATALOG_SNAPSHOT_PATH),
+        )
+        self.shared_store = shared_store
+        self.shared_revision = 0
+        self._poll_seconds = poll_seconds
+        self._checked_at = 0.0
+        # 공유 스냅샷의 마지막 갱신 시각 (프로세스 간 비교를 위해 time.time 사용)
+        self._shared_refreshed_at = 0.0
+
+    def needs_refresh(self) -> bool:
+        return not self._loaded or time.monotonic() - self._checked_at >= self._poll_seconds
+
+    def _ensure_fresh(self) -> None:
+        with self._lock:
+            self._checked_at = time.monotonic()
+            self._sync_from_snapshot()
+
+            if self._snapshot_stale() and self.shared_store.try_lock(
+                self._REFRESH_LOCK, self._REFRESH_LOCK_SECONDS
+            ):
+                try:
+                    # 잠금을 기다리는 사이 다른 프로세스가 갱신했을 수 있으므로 다시 확인
+                    self._sync_from_snapshot()
+                    if self._snapshot_stale():
+                        self._refresh_and_share()
+                finally:
+                    self.shared_store.unlock(self._REFRESH_LOCK)
+            elif not self._loaded:
+                # 공유 스냅샷이 아직 없고 다른 프로세스가 적재 중이면 기다리지 않고 직접 적재
+                self._full_reload()
+                self.shared_revision = 0
+            self._publish()
+
+    def _snapshot_stale(self) -> bool:
+        return self.shared_revision == 0 or time.time() - self._shared_refreshed_at >= self._ttl_seconds
+
+    def _sync_from_snapshot(self) -> None:
+        meta = self.shared_store.revision(self.SNAPSHOT_KEY)
+        if meta is None:
+            return
+        revision, self._shared_refreshed_at = meta
+        if revision == self.shared_revision:
+            return
+        catalog = load_catalog_snapshot(self._snapshot_path)
+        if catalog is None:
+            logger.warning(f"공유 foodData 스냅샷 파일을 읽지 못했습니다: path={self._snapshot_path}")
+            return
+        self._adopt(catalog)
+        self.shared_revision = revision
+        logger.info(
+            f"공유 foodData 스냅샷 적재: {len(catalog)}개 항목, revision={revision}, version={self._version}"
+        )
+
+    def _refresh_and_share(self) -> None:
+        now = time.time()
+        shared = self.shared_store.get(self.SNAPSHOT_KEY)
+        full_loaded_at = shared[1].get('full_loaded_at', 0.0) if shared else 0.0
+        if not self._loaded or now - full_loaded_at >= self._full_reload_seconds:
+            self._full_reload()
+            full_loaded_at = now
+        else:
+            self._delta_refresh()
+
+        changed = self._dirty or self.shared_revision == 0
+        # 바뀐 내용이 있으면 파일을 먼저 교체한 뒤 revision을 올림
+        self._publish()
+        self.shared_revision = self.shared_store.set(
+            self.SNAPSHOT_KEY,
+            {'full_loaded_at': full_loaded_at},
+            revision=None if changed else self.shared_revision,
+        )
+        self._shared_refreshed_at = now
+
+
+def _max_updated_at(food_list: List[Dict[str, Any]]) -> Optional[datetime]:
+    values = [f.get('updatedAt') for f in food_list if isinstance(f.get('updatedAt'), datetime)]
+    return max(values) if values else None
+
+
+_food_catalog: Optional[FoodCatalog] = None
+_food_catalog_lock = threading.Lock()
+
+
+def get_food_catalog() -> FoodCatalog:
+    """프로세스 전역 FoodCatalog 인스턴스 반환 (공유 캐시를 쓰면 SharedFoodCatalog)"""
+    global _food_catalog
+
+    if _food_catalog is None:
+        with _food_catalog_lock:
+            if _food_catalog is None:
+                shared_store = get_shared_cache()
+                if shared_store:
+                    _food_catalog = SharedFoodCatalog(shared_store)
+                else:
+                    _food_catalog = FoodCatalog(snapshot_path=_default_snapshot_path())
+    return _food_catalog
@@ -0,0 +1,141 @@
+"""짧은 수집 창 안에 들어온 Gemini 재료 추출 요청을 한 번의 호출로 묶는 마이크로 배처"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import settings
+from services.budget import RequestBudget
+from services.gemini_service import (
+    extract_raw_ingredients_batch_with_gemini,
+    extract_raw_ingredients_with_gemini,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class GeminiMicroBatcher:
+    """
+    재료 추출 요청을 window_seconds 동안 모았다가 한 번의 generateContent 호출로 처리합니다.
+
+    첫 요청이 들어오면 수집 창을 열고, 창이 닫히거나 max_batch_size개가 모이면 즉시 호출합니다.
+    긴 고정 지시문을 여러 레시피가 공유하므로 토큰 사용량과 호출 수가 줄어듭니다.
+    """
+
+    def __init__(self, window_seconds: float, max_batch_size: int):
+        self._window_seconds = window_seconds
+        self._max_batch_size = max_batch_size
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # 실행 중인 묶음 호출 (이벤트 루프는 태스크를 약하게만 참조하므로 끝날 때까지 여기서 보관)
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.batched_requests = 0
+
+    async def submit(self, description: str) -> Optional[List[Dict[str, Any]]]:
+        """description의 원본 재료 리스트 반환 (실패 시 None)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((description, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self._window_seconds, self._flush)
+
+        # 호출자가 취소되어도 배치 안의 다른 요청에는 영향이 없도록 shield
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'batches': self.batches,
+            'batched_requests': self.batched_requests,
+            'pending': len(self._pending),
+            'running': len(self._tasks),
+        }
+
+    async def close(self) -> None:
+        """대기 중이거나 실행 중인 묶음 호출을 취소하고, 결과를 기다리던 요청에는 None 반환 (서버 종료 시)"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        _resolve_unfinished(batch)
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            # 취소되거나 예외로 끝나도 기다리는 요청이 멈춰 있지 않도록 결과를 못 받은 요청은 None으로 끝냄
+            task.add_done_callback(lambda _: _resolve_unfinished(batch))
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.batched_requests += len(batch)
+        descriptions = [description for description, _ in batch]
+        try:
+            results = await extract_raw_ingredients_batch_with_gemini(descriptions)
+        except Exception as e:
+            logger.warning(f"Gemini 마이크로 배치 처리 실패: size={len(batch)}, error={e}")
+            results = [None] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _resolve_unfinished(batch: List[Tuple[str, asyncio.Future]]) -> None:
+    for _, future in batch:
+        if not future.done():
+            future.set_result(None)
+
+
+_batcher: Optional[GeminiMicroBatcher] = None
+
+
+def get_gemini_batcher() -> GeminiMicroBatcher:
+    """프로세스 전역 마이크로 배처 반환"""
+    global _batcher
+
+    if _batcher is None:
+        _batcher = GeminiMicroBatcher(
+            window_seconds=settings.GEMINI_BATCH_WINDOW_MS / 1000,
+            max_batch_size=settings.GEMINI_BATCH_MAX_SIZE,
+        )
+    return _batcher
+
+
+async def close_gemini_batcher() -> None:
+    """프로세스 전역 마이크로 배처 정리 (서버 종료 시 호출)"""
+    if _batcher is not None:
+        await _batcher.close()
+
+
+async def extract_raw_ingredients(
+    description: str,
+    budget: Optional[RequestBudget] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    원본 재료 추출 진입점
+
+    GEMINI_BATCH_WINDOW_MS가 0보다 크면 마이크로 배처를 거치고, 아니면 바로 개별 호출합니다.
+    묶음 호출은 여러 요청이 공유하므로 budget은 결과를 기다리는 시간에만 적용되며,
+    예산 안에 결과가 오지 않으면 None을 반환합니다. (묶음 호출 자체는 계속 진행)
+    """
+    if settings.GEMINI_BATCH_WINDOW_MS > 0 and settings.GEMINI_BATCH_MAX_SIZE > 1:
+        if budget is None:
+            return await get_gemini_batcher().submit(description)
+        try:
+            return await asyncio.wait_for(get_gemini_batcher().submit(description), budget.remaining())
+        except asyncio.TimeoutError:
+            logger.warning("요청 시간 예산 안에 Gemini 묶음 호출 결과를 받지 못했습니다.")
+            return None
+    return await extract_raw_ingredients_with_gemini(description, budget)
@@ -1,16 +1,26 @@
 """Google Gemini API를 통한 텍스트 분석 및 재료 추출 서비스"""
+import asyncio
 import json
-import re
-from typing import List, Dict, Any
+import logging
+from contextlib import aclosing
+from typing import AsyncIterator, Iterable, List, Dict, Any, Optional, Tuple, Union
 
 import httpx
-import difflib
+from pydantic import BaseModel, TypeAdapter, ValidationError, field_validator
 
 from config import settings
-from firebase_config import get_food_data
+from services.http_clients import get_http_client
+from services.json_stream import IncrementalJsonArrayParser, parse_completed_array_items
+from services.llm_cache import get_llm_cache
+from services.local_extractor import parse_amount, to_number
+from services.upstream_limiter import get_upstream_limiter
+from services.budget import BudgetExhausted, RequestBudget, iterate_within_budget, stage_timeout
+from services.metrics import record_fallback, record_gemini_parse
 
-# Gemini v1 REST 엔드포인트 및 모델 후보 설정
-GEMINI_API_ENDPOINT = "https://generativelanguage.googleapis.com"
+logger = logging.getLogger(__name__)
+
+# Gemini v1 REST 엔드포인트 및 모델 후보 설정 (GEMINI_API_BASE_URL로 변경 가능)
+GEMINI_API_ENDPOINT = settings.GEMINI_API_BASE_URL
 
 # v1 REST에서 사용할 모델 후보들 (우선순위 순)
 # REST 호출 시에는 전체 리소스 이름인 "models/..." 형식을 사용합니다.
@@ -20,22 +30,198 @@ MODEL_CANDIDATES = [
     #"models/gemini-pro",
 ]
 
+# 레시피 하나당 응답 토큰 상한 (JSON 응답이 중간에 끊기지 않도록 2048로 설정)
+MAX_OUTPUT_TOKENS_PER_RECIPE = 2048
+
+# 재료 추출 프롬프트 버전 (프롬프트나 응답 형식을 바꾸면 올려서 이전 LLM 응답 캐시를 무효화)
+PROMPT_VERSION = "ingredients-v2"
+
+# 구조화 출력용 재료 배열 스키마 (Gemini responseSchema는 OpenAPI 3.0 부분집합)
+INGREDIENT_SCHEMA: Dict[str, Any] = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {
+            "name": {"type": "STRING"},
+            "amount": {"type": "NUMBER", "nullable": True},
+            "unit": {"type": "STRING"},
+        },
+        "required": ["name", "amount", "unit"],
+    },
+}
+
+# API가 responseSchema를 거부하면 프로세스가 끝날 때까지 프롬프트 지시만으로 JSON을 요청
+_structured_output_rejected = False
+
+
+class RawIngredient(BaseModel):
+    """Gemini가 추출한 재료 하나 (foodData 매칭 전 원본)"""
+    name: str
+    amount: Optional[Union[int, float]] = None
+    unit: str = ""
+
+    @field_validator("name", mode="before")
+    @classmethod
+    def _strip_name(cls, value: Any) -> Any:
+        return value.strip() if isinstance(value, str) else value
+
+    @field_validator("amount", mode="before")
+    @classmethod
+    def _coerce_amount(cls, value: Any) -> Any:
+        # 구조화 출력이 아닐 때 오는 "1/2" 같은 문자열은 숫자로 바꾸고, "약간"처럼 읽을 수 없으면 수량 없음
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, str):
+            try:
+                return to_number(parse_amount(value.strip()))
+            except (ValueError, ZeroDivisionError):
+                return None
+        return value if isinstance(value, (int, float)) else None
+
+    @field_validator("unit", mode="before")
+    @classmethod
+    def _coerce_unit(cls, value: Any) -> str:
+        return "" if value is None else str(value).strip()
+
+
+_INGREDIENT_LIST = TypeAdapter(List[RawIngredient])
+_BATCH_INGREDIENTS = TypeAdapter(Dict[str, List[RawIngredient]])
+
+
+def _structured_output_available() -> bool:
+    return settings.GEMINI_STRUCTURED_OUTPUT and not _structured_output_rejected
+
+
+def _generation_config(max_output_tokens: int, response_schema: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """generationConfig 생성 (response_schema가 있으면 JSON 구조화 출력 요청)"""
+    # 일관성 향상을 위해 temperature 낮춤
+    config: Dict[str, Any] = {
+        "maxOutputTokens": max_output_tokens,
+        "temperature": 0.1,
+    }
+    if response_schema is not None:
+        config["responseMimeType"] = "application/json"
+        config["responseSchema"] = response_schema
+    return config
+
+
+def _rejects_structured_output(status_code: int, body: str, response_schema: Optional[Dict[str, Any]]) -> bool:
+    """
+    구조화 출력 필드를 지원하지 않아 400을 받은 경우 True를 반환하고, 이후 호출에서는 스키마를 보내지 않음
+
+    (예: 'Unknown name "responseSchema" at generation_config')
+    """
+    global _structured_output_rejected
+
+    if response_schema is None or status_code != 400:
+        return False
+    if not any(field in body for field in ("responseSchema", "response_schema", "responseMimeType", "response_mime_type")):
+        return False
+    _structured_output_rejected = True
+    record_fallback("structured_output_unsupported")
+    logger.warning(f"[Gemini] 구조화 출력을 지원하지 않아 프롬프트 지시 방식으로 전환합니다: body={body[:300]}")
+    return True
+
+
+def _validate_items(items: Iterable[Any]) -> List[Dict[str, Any]]:
+    """재료 객체를 하나씩 검증해 통과한 것만 반환 (이름이 비었거나 형식이 틀린 항목은 버림)"""
+    valid = []
+    for item in items:
+        try:
+            ingredient = RawIngredient.model_validate(item)
+        except ValidationError:
+            continue
+        if ingredient.name:
+            valid.append(ingredient.model_dump())
+    return valid
+
+
+def _strip_code_fence(text: str) -> str:
+    """프롬프트 지시 방식 응답에 붙는 마크다운 코드 블록(```json ... ```) 제거"""
+    if text.startswith("```"):
+        lines = text.split("\n")
+        return "\n".join(lines[1:-1]) if len(lines) > 2 else text
+    return text
+
+
+def _parse_ingredients(text: str, structured: bool) -> Tuple[Optional[List[Dict[str, Any]]], bool]:
+    """
+    Gemini 응답 텍스트를 한 번에 검증해 재료 리스트로 변환
+
+    응답이 끊겼거나(MAX_TOKENS) 형식이 틀리면 배열에서 닫힌 객체만 골라 항목별로 검증합니다.
 
-def _call_gemini_v1(prompt: str) -> str:
+    Returns:
+        (재료 리스트, 응답이 온전했는지 여부). 배열을 찾지 못하면 (None, False)
     """
-    Gemini v1 REST API를 직접 호출하여 텍스트 응답을 반환합니다.
+    mode = "structured" if structured else "prompt"
+    if not structured:
+        text = _strip_code_fence(text)
+    try:
+        ingredients = _INGREDIENT_LIST.validate_json(text)
+    except ValidationError as e:
+        record_fallback("json_repair")
+        try:
+            items = parse_completed_array_items(text)
+        except ValueError:
+            record_gemini_parse(mode, "failed")
+            logger.error(
+                f"[Gemini JSON 파싱 실패] 원본 응답 전문:\n"
+                f"길이: {len(text)}자\n"
+                f"내용: {text}\n"
+                f"에러: {e.errors(include_url=False)[:3]}"
+            )
+            return None, False
+        record_gemini_parse(mode, "repaired")
+        ingredients = _validate_items(items)
+        logger.warning(
+            f"[Gemini Partial Response] 완전한 JSON이 아니어서 닫힌 객체 {len(ingredients)}개만 사용합니다. "
+            f"(길이: {len(text)}자, mode={mode})"
+        )
+        return ingredients, False
+
+    record_gemini_parse(mode, "ok")
+    return [ingredient.model_dump() for ingredient in ingredients if ingredient.name], True
+
+
+async def _call_gemini_v1_with_model(
+    prompt: str,
+    max_output_tokens: int = MAX_OUTPUT_TOKENS_PER_RECIPE,
+    timeout: Optional[float] = None,
+    budget: Optional[RequestBudget] = None,
+    response_schema: Optional[Dict[str, Any]] = None,
+    info: Optional[Dict[str, Any]] = None
+) -> Tuple[str, Optional[str]]:
+    """
+    Gemini v1 REST API를 직접 호출하여 텍스트 응답과 응답한 모델 이름을 반환합니다. (모델 이름은 LLM 응답 캐시 키용)
 
     여러 모델 후보를 순차적으로 시도하며, 첫 번째 성공한 모델의 응답을 반환합니다.
+    공유 AsyncClient를 사용하므로 응답을 기다리는 동안 이벤트 루프를 막지 않습니다.
+    timeout이 없으면 공유 클라이언트 기본값(GEMINI_TIMEOUT_SECONDS)을 사용합니다.
+
+    budget이 주어지면 모델 후보마다 타임아웃을 남은 예산으로 줄이고,
+    예산이 떨어지면 남은 후보를 시도하지 않습니다.
+    response_schema가 주어지면 JSON 구조화 출력을 요청하고, API가 거부하면 스키마 없이 다시 호출합니다.
+    info를 넘기면 구조화 출력으로 응답받았는지를 info['structured']에 기록합니다.
+
+    Returns:
+        (응답 텍스트, 모델 이름). 모든 후보가 실패하면 ("", None)
     """
+    client = get_http_client("gemini")
+    # 모든 모델 후보 시도가 같은 대기 기한을 공유 (한도 초과 시 실패 대신 기한까지 대기)
+    limiter = get_upstream_limiter("gemini")
+    deadline = limiter.deadline()
+    if budget is not None:
+        deadline = budget.cap_deadline(deadline)
     last_error = None
 
-    # generation 설정: JSON 응답이 중간에 끊기지 않도록 토큰 수를 2048로 증가, 일관성 향상을 위해 temperature 낮춤
-    generation_config = {
-        "maxOutputTokens": 2048,
-        "temperature": 0.1,
-    }
+    if not _structured_output_available():
+        response_schema = None
+    generation_config = _generation_config(max_output_tokens, response_schema)
 
-    for model_name in MODEL_CANDIDATES:
+    for index, model_name in enumerate(MODEL_CANDIDATES):
+        if index > 0:
+            # 앞 모델 후보가 실패해 다음 후보로 넘어감
+            record_fallback("gemini_model_fallthrough")
         url = f"{GEMINI_API_ENDPOINT}/v1/{model_name}:generateContent"
         params = {"key": settings.GEMINI_API_KEY}
         # body 구조: generationConfig를 최상단에 명시적으로 배치
@@ -51,12 +237,27 @@ def _call_gemini_v1(prompt: str) -> str:
         }
 
         try:
-            # 인스타그램 링크의 텍스트 길이를 고려해도 15초 이내로 응답받도록 타임아웃 제한
-            resp = httpx.post(url, params=params, json=body, timeout=15.0)
+            # 타임아웃을 따로 주지 않으면 GEMINI_TIMEOUT_SECONDS(기본 15초)를 따르고, 남은 예산보다 길지 않게 제한
+            try:
+                request_timeout = stage_timeout(budget, timeout or settings.GEMINI_TIMEOUT_SECONDS)
+            except BudgetExhausted as e:
+                last_error = str(e)
+                logger.warning(f"[Gemini Budget] 요청 시간 예산 소진으로 남은 모델 후보를 건너뜁니다: model_name={model_name}")
+                break
+            # httpx 타임아웃은 연결/읽기 단계별 값이므로 전체 응답 시간은 wait_for로 한 번 더 제한
+            resp = await limiter.call(
+                lambda: asyncio.wait_for(
+                    client.post(url, params=params, json=body, timeout=request_timeout), request_timeout
+                ),
+                deadline,
+            )
+
+            if _rejects_structured_output(resp.status_code, resp.text, response_schema):
+                return await _call_gemini_v1_with_model(prompt, max_output_tokens, timeout, budget, info=info)
 
             if resp.status_code == 404:
                 # 모델이 해당 버전에서 지원되지 않는 경우
-                print(
+                logger.warning(
                     f"[Gemini 404] url={url}, status=404, "
                     f"model_name={model_name}, body={resp.text}"
                 )
@@ -69,235 +270,375 @@ def _call_gemini_v1(prompt: str) -> str:
             # v1 응답 구조에서 첫 번째 candidate의 텍스트 추출
             candidates = data.get("candidates") or []
             if not candidates:
-                print(f"[Gemini Warning] candidates 비어 있음: model_name={model_name}, data={data}")
+                logger.warning(f"[Gemini Warning] candidates 비어 있음: model_name={model_name}, data={data}")
                 last_error = "no candidates"
                 continue
 
             content = candidates[0].get("content") or {}
             parts = content.get("parts") or []
             if not parts or "text" not in parts[0]:
-                print(f"[Gemini Warning] parts 비어 있거나 text 없음: model_name={model_name}, data={data}")
+                logger.warning(f"[Gemini Warning] parts 비어 있거나 text 없음: model_name={model_name}, data={data}")
                 last_error = "no text in parts"
                 continue
 
             text = parts[0]["text"]
-            print(
+            if info is not None:
+                info["structured"] = response_schema is not None
+            logger.info(
                 f"[Gemini] 모델 호출 성공: model_name={model_name}, "
                 f"endpoint={GEMINI_API_ENDPOINT}/v1"
             )
-            return text
+            return text, model_name
 
-        except httpx.TimeoutException as e:
-            last_error = str(e)
-            print(f"[Gemini Timeout] url={url}, model_name={model_name}, error={e}")
+        except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+            last_error = str(e) or type(e).__name__
+            logger.warning(f"[Gemini Timeout] url={url}, model_name={model_name}, error={last_error}")
             # 타임아웃 시 바로 다음 후보로 넘어가거나, 후보가 더 없으면 빠르게 종료
             continue
         except httpx.HTTPStatusError as e:
             last_error = str(e)
-            print(
+            logger.warning(
                 f"[Gemini HTTP Error] url={url}, model_name={model_name}, error={e}, "
                 f"response={getattr(e, 'response', None)}"
             )
             continue
         except Exception as e:
             last_error = str(e)
-            print(
+            logger.warning(
                 f"[Gemini Error] url={url}, model_name={model_name}, error={e}"
             )
             continue
 
-    print(
+    logger.error(
         f"[Gemini Fatal] 모든 모델 후보 호출 실패. "
         f"endpoint={GEMINI_API_ENDPOINT}/v1, "
         f"candidates={MODEL_CANDIDATES}, "
         f"last_error={last_error}"
     )
-    return ""
+    return "", None
 
 
-def extract_ingredients_with_gemini(
-    description: str,
-    food_data: List[Dict[str, Any]]
-) -> List[Dict[str, Any]]:
+async def _stream_gemini_v1(
+    prompt: str,
+    max_output_tokens: int = MAX_OUTPUT_TOKENS_PER_RECIPE,
+    info: Optional[Dict[str, Any]] = None,
+    budget: Optional[RequestBudget] = None,
+    response_schema: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
     """
-    Gemini를 사용하여 텍스트에서 재료를 추출하고,
-    Python에서 foodData와 매칭하여 표준화된 재료 리스트를 반환합니다.
+    Gemini v1 streamGenerateContent(SSE)를 호출하여 생성되는 텍스트 조각을 순서대로 반환합니다.
 
-    Args:
-        description: 분석할 텍스트 (레시피 설명 또는 제목)
-        food_data: Firebase의 foodData 컬렉션 데이터
-
-    Returns:
-        표준화된 재료 리스트 (standard_name, food_id, category, amount, unit 포함)
+    첫 텍스트 조각을 받기 전에 실패하면 다음 모델 후보로 넘어가고,
+    조각을 내보낸 뒤 끊기면 그때까지의 조각만으로 종료합니다.
+    info를 넘기면 응답한 모델 이름을 info['model']에, 구조화 출력 여부를 info['structured']에 기록합니다.
+    budget이 주어지면 예산이 떨어지는 즉시 그때까지의 조각만으로 종료합니다.
     """
-    # 프롬프트 축소: Gemini에게는 재료명/수량만 추출하도록만 요청
+    client = get_http_client("gemini")
+    limiter = get_upstream_limiter("gemini")
+    deadline = limiter.deadline()
+    if budget is not None:
+        deadline = budget.cap_deadline(deadline)
+    last_error = None
+
+    if not _structured_output_available():
+        response_schema = None
+    generation_config = _generation_config(max_output_tokens, response_schema)
+    retry_without_schema = False
+
+    for index, model_name in enumerate(MODEL_CANDIDATES):
+        if index > 0:
+            record_fallback("gemini_model_fallthrough")
+        url = f"{GEMINI_API_ENDPOINT}/v1/{model_name}:streamGenerateContent"
+        params = {"key": settings.GEMINI_API_KEY, "alt": "sse"}
+        body = {
+            "generationConfig": generation_config,
+            "contents": [
+                {
+                    "parts": [
+                        {"text": prompt}
+                    ]
+                }
+            ],
+        }
+
+        emitted = False
+        try:
+            read_timeout = stage_timeout(budget, settings.GEMINI_TIMEOUT_SECONDS)
+            async with limiter.slot(deadline) as permit, \
+                    client.stream("POST", url, params=params, json=body, timeout=read_timeout) as resp:
+                permit.observe(resp)
+                if resp.status_code != 200:
+                    await resp.aread()
+                    if _rejects_structured_output(resp.status_code, resp.text, response_schema):
+                        # 슬롯을 반납한 뒤 스키마 없이 처음부터 다시 호출
+                        retry_without_schema = True
+                        break
+                    logger.warning(
+                        f"[Gemini Stream Error] url={url}, status={resp.status_code}, "
+                        f"model_name={model_name}, body={resp.text[:500]}"
+                    )
+                    last_error = f"status={resp.status_code}"
+                    continue
+
+                async for line in resp.aiter_lines():
+                    if budget is not None and budget.expired():
+                        logger.warning(f"[Gemini Budget] 요청 시간 예산 소진으로 스트리밍을 중단합니다: model_name={model_name}")
+                        return
+                    if not line.startswith("data:"):
+                        continue
+                    data = json.loads(line[len("data:"):].strip())
+                    candidates = data.get("candidates") or []
+                    if not candidates:
+                        continue
+                    parts = (candidates[0].get("content") or {}).get("parts") or []
+                    for part in parts:
+                        text = part.get("text")
+                        if text:
+                            if not emitted and info is not None:
+                                info["model"] = model_name
+                                info["structured"] = response_schema is not None
+                            emitted = True
+                            yield text
+
+            logger.info(f"[Gemini] 스트리밍 호출 완료: model_name={model_name}")
+            return
+
+        except BudgetExhausted as e:
+            last_error = str(e)
+            break
+        except Exception as e:
+            last_error = str(e)
+            logger.warning(f"[Gemini Stream Error] url={url}, model_name={model_name}, error={e}")
+            if emitted:
+                # 이미 내보낸 조각이 있으면 다른 모델로 처음부터 다시 생성하지 않음
+                return
+            continue
+
+    if retry_without_schema:
+        async for text in _stream_gemini_v1(prompt, max_output_tokens, info, budget):
+            yield text
+        return
+
+    logger.error(
+        f"[Gemini Fatal] 모든 모델 후보 스트리밍 호출 실패. "
+        f"candidates={MODEL_CANDIDATES}, last_error={last_error}"
+    )
+
+
+# 재료 필드 설명 (단건/묶음 프롬프트 공통, 응답 형식은 구조화 출력 스키마가 강제)
+_FIELD_INSTRUCTIONS = """- name: 본문에 나온 재료 이름 그대로 (예: "사과대추", "루꼴라")
+- amount: 수량 숫자, 없으면 null
+- unit: 단위 (예: "개", "큰술", "g", "ml"), 없으면 빈 문자열"""
+
+
+def _build_ingredient_prompt(description: str) -> str:
+    """재료 추출용 프롬프트 생성"""
     # foodData 전체 리스트는 보내지 않고, 매칭은 Python 코드에서 후처리로 수행
-    prompt = f"""다음은 인스타그램 레시피 본문입니다. 이 텍스트에서 '재료명'과 '수량' 정보를 JSON 배열로만 추출해 주세요.
+    prompt = f"""다음 인스타그램 레시피 본문에 나오는 식재료를 모두 추출해 주세요.
 
-텍스트:
 \"\"\"{description}\"\"\"
 
-작업 지시사항:
-1. 텍스트 속에 등장하는 식재료(예: 사과, 루꼴라, 피스타치오 등)를 찾아주세요.
-2. 각 재료에 대해 다음 정보를 JSON 객체로 작성하세요:
-   - name: 재료 이름 (텍스트에 나온 그대로, 예: "사과대추", "루꼴라")
-   - amount: 수량 또는 대략적인 개수 (숫자, 없으면 null)
-   - unit: 단위 (예: "개", "컵", "큰술", "g", "ml" 등, 없으면 빈 문자열)
-3. 계량 정보가 전혀 없으면 amount는 null, unit은 ""(빈 문자열)로 두세요.
-4. 최종 응답은 아래와 같은 JSON 배열 형식이어야 합니다:
-
-[
-  {{
-    "name": "사과대추",
-    "amount": 5,
-    "unit": "개"
-  }},
-  {{
-    "name": "루꼴라",
-    "amount": null,
-    "unit": ""
-  }}
-]
+{_FIELD_INSTRUCTIONS}
 
-재료가 전혀 없다면 빈 배열 []만 반환하세요.
+응답은 [{{"name": ..., "amount": ..., "unit": ...}}] 형식의 JSON 배열만 출력하고, 재료가 없으면 []를 반환하세요."""
+    return prompt
 
-중요: 마크다운 코드 블록(```json ... ```)을 절대 사용하지 말고, 순수 JSON 배열만 출력하세요.
-설명이나 자연어 문장도 포함하지 말고, 오직 JSON 배열만 반환하세요.
 
-경고: 중간에 응답을 끊지 말고 반드시 JSON 배열을 완성하세요. 모든 재료 정보를 포함한 완전한 JSON 배열을 반환해야 합니다.
+async def extract_raw_ingredients_with_gemini(
+    description: str,
+    budget: Optional[RequestBudget] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Gemini를 사용하여 텍스트에서 재료명/수량/단위를 추출합니다. (foodData 매칭 전 원본)
 
-CRITICAL: 절대 중간에 끊지 말고 마지막 대괄호 ]를 닫을 때까지 응답하세요. / Never cut off the response in the middle. You must complete the JSON array by closing the final bracket ]."""
+    Args:
+        description: 분석할 텍스트 (레시피 설명 또는 제목)
+        budget: 요청 시간 예산 (있으면 Gemini 호출 타임아웃을 남은 예산으로 제한)
+
+    Returns:
+        name, amount, unit을 가진 원본 재료 리스트.
+        호출 또는 파싱에 실패하면 None (재료가 없는 정상 응답인 빈 리스트와 구분)
+    """
+    llm_cache = get_llm_cache()
+    cached = await llm_cache.get(description, MODEL_CANDIDATES, PROMPT_VERSION)
+    if cached is not None:
+        return cached
+
+    prompt = _build_ingredient_prompt(description)
+    info: Dict[str, Any] = {}
 
     try:
-        # Gemini v1 REST API 직접 호출
-        response_text = _call_gemini_v1(prompt).strip()
+        # Gemini v1 REST API 직접 호출 (가능하면 JSON 구조화 출력)
+        response_text, model_name = await _call_gemini_v1_with_model(
+            prompt, budget=budget, response_schema=INGREDIENT_SCHEMA, info=info
+        )
+        response_text = response_text.strip()
 
         if not response_text:
             # 호출 실패 또는 비어 있는 응답
-            return []
+            return None
 
-        # JSON 파싱 시도
-        # 마크다운 코드 블록 제거 (```json ... ``` 형식)
-        if response_text.startswith("```"):
-            lines = response_text.split("\n")
-            response_text = "\n".join(lines[1:-1]) if len(lines) > 2 else response_text
+        ingredients, complete = _parse_ingredients(response_text, info.get("structured", False))
+        if ingredients is None:
+            return None
 
-        try:
-            ingredients = json.loads(response_text)
-        except json.JSONDecodeError as e:
-            # JSON 파싱 실패 시, 응답이 중간에 끊겼는지 확인
-            # 응답이 "["로 시작하지만 완전하지 않은 경우를 감지
-            is_partial = (
-                response_text.strip().startswith("[") 
-                and not response_text.strip().endswith("]")
-            )
-            
-            if is_partial:
-                print(
-                    f"[Gemini Partial Response] 응답이 중간에 끊김:\n"
-                    f"길이: {len(response_text)}자\n"
-                    f"끊긴 내용: {response_text}\n"
-                    f"에러: {str(e)}"
-                )
-                # 강제 복구 로직: 끊긴 JSON을 강제로 닫아서라도 파싱 시도
-                fixed_text = response_text.strip()
-                try:
-                    # 마지막 문자가 "}"가 아니면 불완전한 객체를 닫기
-                    if not fixed_text.endswith("}"):
-                        # 마지막에 "name"으로 시작하는 불완전한 필드가 있는 경우 처리
-                        if '"name"' in fixed_text and fixed_text.rfind('"name"') > fixed_text.rfind('}'):
-                            # 불완전한 name 필드를 닫고 객체와 배열을 닫기
-                            fixed_text += '": null, "amount": null, "unit": ""}]'
-                        else:
-                            fixed_text += '}]'
-                    else:
-                        # "}"로 끝나면 배열만 닫기
-                        fixed_text += "]"
-                    
-                    ingredients = json.loads(fixed_text)
-                    print(f"[Gemini 복구 성공] 끊긴 JSON을 강제로 복구하여 {len(ingredients)}개 재료를 추출했습니다.")
-                except Exception as recovery_error:
-                    print(
-                        f"[Gemini 복구 실패] 강제 복구 시도 중 오류: {str(recovery_error)}\n"
-                        f"복구 시도한 텍스트: {fixed_text}"
-                    )
-                    return []
-            
-            # JSON 파싱 실패 시, 응답에서 JSON 부분만 추출 시도
-            json_match = re.search(r"\[.*\]", response_text, re.DOTALL)
-            if json_match:
-                try:
-                    ingredients = json.loads(json_match.group(0))
-                except json.JSONDecodeError:
-                    # 정규식으로 추출한 부분도 파싱 실패
-                    print(
-                        f"[Gemini JSON 파싱 실패] 원본 응답 전문:\n"
-                        f"길이: {len(response_text)}자\n"
-                        f"내용: {response_text}\n"
-                        f"에러: {str(e)}"
-                    )
-                    return []
-            else:
-                # JSON 배열 패턴을 찾지 못함
-                print(
-                    f"[Gemini JSON 파싱 실패] 원본 응답 전문:\n"
-                    f"길이: {len(response_text)}자\n"
-                    f"내용: {response_text}\n"
-                    f"에러: {str(e)}"
-                )
-                return []
-
-        # 결과 검증
-        if not isinstance(ingredients, list):
-            return []
-
-        # -------- 후처리: Python에서 foodData와 매칭 --------
-        # 1) foodData의 이름 목록 준비
-        food_name_to_food: Dict[str, Dict[str, Any]] = {}
-        food_names: List[str] = []
-        for food in food_data:
-            name = (food.get("name") or "").strip()
-            if name:
-                food_names.append(name)
-                food_name_to_food[name] = food
-
-        matched_ingredients: List[Dict[str, Any]] = []
-
-        for ing in ingredients:
-            if not isinstance(ing, Dict):
-                continue
+        # 끊긴 응답에서 일부만 건진 결과는 캐시하지 않음
+        if complete and model_name:
+            await llm_cache.set(description, model_name, PROMPT_VERSION, ingredients)
+        return ingredients
 
-            raw_name = (ing.get("name") or "").strip()
-            if not raw_name:
-                continue
+    except Exception as e:
+        error_msg = str(e)
+        logger.error(
+            f"Gemini API 호출 중 오류: {error_msg} "
+            f"(endpoint={GEMINI_API_ENDPOINT}/v1, "
+            f"model_candidates={MODEL_CANDIDATES})"
+        )
+        return None
 
-            # fuzzy matching: 가장 유사한 foodData.name 찾기 (cutoff 0.4로 낮춰서 '아보카도'와 '후숙된 아보카도' 같은 경우도 매칭)
-            candidates = difflib.get_close_matches(raw_name, food_names, n=1, cutoff=0.4)
-            if not candidates:
-                # 매칭이 불확실하면 제외
-                continue
 
-            best_name = candidates[0]
-            food = food_name_to_food.get(best_name) or {}
+def _batch_ingredient_schema(size: int) -> Dict[str, Any]:
+    """묶음 응답 스키마 (본문 키 r0..r{size-1}마다 재료 배열)"""
+    keys = [f"r{i}" for i in range(size)]
+    return {
+        "type": "OBJECT",
+        "properties": {key: INGREDIENT_SCHEMA for key in keys},
+        "required": keys,
+    }
 
-            matched_ingredients.append(
-                {
-                    "standard_name": best_name,
-                    "food_id": food.get("id", ""),
-                    "category": food.get("category", ""),
-                    "amount": ing.get("amount"),
-                    "unit": ing.get("unit", ""),
-                }
-            )
 
-        return matched_ingredients
+def _build_batch_ingredient_prompt(descriptions: List[str]) -> str:
+    """여러 레시피 본문을 한 번에 처리하는 재료 추출용 프롬프트 생성 (키별 JSON 객체 응답)"""
+    sections = "\n\n".join(
+        f"[r{i}]\n\"\"\"{description}\"\"\"" for i, description in enumerate(descriptions)
+    )
+    keys = ", ".join(f'"r{i}"' for i in range(len(descriptions)))
+    prompt = f"""다음 인스타그램 레시피 본문 {len(descriptions)}개 각각에 나오는 식재료를 모두 추출해 주세요.
+
+{sections}
+
+{_FIELD_INSTRUCTIONS}
 
+응답은 본문 키({keys})마다 재료 배열을 값으로 갖는 JSON 객체만 출력하고, 재료가 없는 본문은 []로 두세요."""
+    return prompt
+
+
+async def extract_raw_ingredients_batch_with_gemini(
+    descriptions: List[str]
+) -> List[Optional[List[Dict[str, Any]]]]:
+    """
+    여러 레시피 본문의 재료를 한 번의 Gemini 호출로 추출합니다.
+
+    응답을 본문별로 나눠 반환하며, 응답 전체를 검증하지 못했거나 특정 본문의 결과가 빠진 경우
+    해당 본문만 extract_raw_ingredients_with_gemini로 개별 호출해 채웁니다.
+
+    Returns:
+        descriptions 순서대로 원본 재료 리스트 (실패한 항목은 None)
+    """
+    llm_cache = get_llm_cache()
+    results: List[Optional[List[Dict[str, Any]]]] = [
+        await llm_cache.get(description, MODEL_CANDIDATES, PROMPT_VERSION) for description in descriptions
+    ]
+    # LLM 응답 캐시에 없는 본문만 묶어서 호출
+    pending = [i for i, value in enumerate(results) if value is None]
+    if len(pending) <= 1:
+        for i in pending:
+            results[i] = await extract_raw_ingredients_with_gemini(descriptions[i])
+        return results
+
+    pending_descriptions = [descriptions[i] for i in pending]
+    parsed: Optional[Dict[str, List[RawIngredient]]] = None
+    model_name: Optional[str] = None
+    info: Dict[str, Any] = {}
+    try:
+        response_text, model_name = await _call_gemini_v1_with_model(
+            _build_batch_ingredient_prompt(pending_descriptions),
+            max_output_tokens=min(
+                MAX_OUTPUT_TOKENS_PER_RECIPE * len(pending_descriptions),
+                settings.GEMINI_BATCH_MAX_OUTPUT_TOKENS,
+            ),
+            timeout=settings.GEMINI_BATCH_TIMEOUT_SECONDS,
+            response_schema=_batch_ingredient_schema(len(pending_descriptions)),
+            info=info,
+        )
+        response_text = response_text.strip()
+
+        if response_text:
+            structured = info.get("structured", False)
+            mode = "structured" if structured else "prompt"
+            try:
+                parsed = _BATCH_INGREDIENTS.validate_json(
+                    response_text if structured else _strip_code_fence(response_text)
+                )
+                record_gemini_parse(mode, "ok")
+            except ValidationError as e:
+                # 묶음 응답은 부분 복구하지 않고 본문별 개별 호출로 채움
+                record_gemini_parse(mode, "failed")
+                logger.warning(
+                    f"[Gemini Batch] 응답 검증 실패: size={len(pending)}, mode={mode}, "
+                    f"error={e.errors(include_url=False)[:3]}"
+                )
     except Exception as e:
-        error_msg = str(e)
-        print(
-            f"Gemini API 호출 중 오류: {error_msg} "
-            f"(endpoint={GEMINI_API_ENDPOINT}/v1, "
-            f"model_candidates={MODEL_CANDIDATES})"
+        logger.warning(f"[Gemini Batch] 일괄 호출 실패, 개별 호출로 대체합니다: size={len(pending)}, error={e}")
+        parsed = None
+
+    if parsed is not None:
+        for position, i in enumerate(pending):
+            value = parsed.get(f"r{position}")
+            if value is not None:
+                results[i] = [ingredient.model_dump() for ingredient in value if ingredient.name]
+                # 묶음 프롬프트도 본문별 추출 작업은 같으므로 같은 프롬프트 버전으로 캐시
+                if model_name:
+                    await llm_cache.set(descriptions[i], model_name, PROMPT_VERSION, results[i])
+
+    missing = [i for i, value in enumerate(results) if value is None]
+    if missing:
+        logger.warning(f"[Gemini Batch] {len(missing)}/{len(pending)}개 본문을 개별 호출로 재시도합니다.")
+        retried = await asyncio.gather(
+            *[extract_raw_ingredients_with_gemini(descriptions[i]) for i in missing]
         )
-        return []
+        for i, value in zip(missing, retried):
+            results[i] = value
 
+    return results
+
+
+async def stream_raw_ingredients_with_gemini(
+    description: str,
+    parser: Optional[IncrementalJsonArrayParser] = None,
+    budget: Optional[RequestBudget] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Gemini 스트리밍 응답에서 재료 객체가 하나씩 닫힐 때마다 검증해 반환합니다. (foodData 매칭 전 원본)
+
+    응답이 중간에 끊겨도 그때까지 완성된 재료는 모두 반환되며, 검증에 실패한 객체는 건너뜁니다.
+    parser를 넘기면 스트림이 끝난 뒤 parser.finished로 배열이 온전히 닫혔는지 확인할 수 있습니다.
+    LLM 응답 캐시에 적중하면 호출 없이 캐시된 재료를 같은 방식으로 반환합니다.
+    """
+    parser = parser or IncrementalJsonArrayParser()
+    llm_cache = get_llm_cache()
+    cached = await llm_cache.get(description, MODEL_CANDIDATES, PROMPT_VERSION)
+    if cached is not None:
+        for item in parser.feed(json.dumps(cached, ensure_ascii=False)):
+            yield item
+        return
+
+    items: List[Dict[str, Any]] = []
+    info: Dict[str, Any] = {}
+    stream = _stream_gemini_v1(
+        _build_ingredient_prompt(description), info=info, budget=budget, response_schema=INGREDIENT_SCHEMA
+    )
+    async with aclosing(stream) as chunks:
+        async for chunk in iterate_within_budget(chunks, budget):
+            for item in _validate_items(parser.feed(chunk)):
+                items.append(item)
+                yield item
+            if parser.finished:
+                break
+
+    if info.get("model") and not (budget is not None and budget.expired()):
+        # 예산 소진으로 끊긴 스트림은 파싱 결과로 세지 않음
+        outcome = "ok" if parser.finished else ("repaired" if items else "failed")
+        record_gemini_parse("structured" if info.get("structured") else "prompt", outcome)
+    if parser.finished and info.get("model"):
+        await llm_cache.set(description, info["model"], PROMPT_VERSION, items)
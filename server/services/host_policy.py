@@ -0,0 +1,105 @@
+"""호스트별로 어떤 메타데이터 조회 방식(variant)이 통하는지 학습하는 정책"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+from config import settings
+
+
+def host_key(url: str) -> str:
+    """정책 키로 사용할 호스트 (소문자, www. 제거)"""
+    host = (urlsplit(url.strip()).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+@dataclass
+class _VariantRecord:
+    """호스트 하나에서 variant 하나의 최근 결과"""
+    usable: int = 0
+    unusable: int = 0
+    # 양수면 연속 성공 횟수, 음수면 연속 실패 횟수
+    streak: int = 0
+    updated_at: float = 0.0
+
+
+class HostFetchPolicy:
+    """
+    호스트별 variant("full", "cheap" 등) 결과를 기억해 다음 요청의 조회 순서를 정합니다.
+
+    - 마지막 결과가 사용 가능한(title/description이 있는) 응답이었던 variant는 prefers()가 True
+    - failure_threshold번 연속으로 실패한 variant는 avoids()가 True
+    - ttl_seconds가 지난 기록은 잊어버리고 처음 보는 호스트처럼 다시 시도합니다.
+    - 최대 max_hosts개 호스트까지 LRU로 유지합니다. (프로세스 메모리, 재시작 시 비워짐)
+    """
+
+    def __init__(self, max_hosts: int, ttl_seconds: float, failure_threshold: int):
+        self._max_hosts = max_hosts
+        self._ttl = ttl_seconds
+        self._failure_threshold = max(1, failure_threshold)
+        self._hosts: 'OrderedDict[str, Dict[str, _VariantRecord]]' = OrderedDict()
+
+    def record(self, host: str, variant: str, usable: bool) -> None:
+        """variant 호출 결과 기록 (사용 가능한 메타데이터를 받았는지 여부)"""
+        if not host:
+            return
+        records = self._hosts.get(host)
+        if records is None:
+            records = self._hosts[host] = {}
+        self._hosts.move_to_end(host)
+        record = records.setdefault(variant, _VariantRecord())
+        if usable:
+            record.usable += 1
+            record.streak = max(record.streak, 0) + 1
+        else:
+            record.unusable += 1
+            record.streak = min(record.streak, 0) - 1
+        record.updated_at = time.monotonic()
+
+        while len(self._hosts) > self._max_hosts:
+            self._hosts.popitem(last=False)
+
+    def prefers(self, host: str, variant: str) -> bool:
+        """최근에 이 호스트에서 variant가 사용 가능한 결과를 냈는지"""
+        record = self._get(host, variant)
+        return record is not None and record.streak > 0
+
+    def avoids(self, host: str, variant: str) -> bool:
+        """이 호스트에서 variant가 연속으로 실패해 시도할 가치가 낮은지"""
+        record = self._get(host, variant)
+        return record is not None and record.streak <= -self._failure_threshold
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'hosts': len(self._hosts),
+            'max_hosts': self._max_hosts,
+        }
+
+    def _get(self, host: str, variant: str) -> Optional[_VariantRecord]:
+        records = self._hosts.get(host)
+        if not records:
+            return None
+        record = records.get(variant)
+        if record is None:
+            return None
+        if time.monotonic() - record.updated_at > self._ttl:
+            del records[variant]
+            return None
+        return record
+
+
+_host_policy: Optional[HostFetchPolicy] = None
+
+
+def get_host_policy() -> HostFetchPolicy:
+    """프로세스 전역 호스트 정책 반환"""
+    global _host_policy
+
+    if _host_policy is None:
+        _host_policy = HostFetchPolicy(
+            max_hosts=settings.HOST_POLICY_MAX_HOSTS,
+            ttl_seconds=settings.HOST_POLICY_TTL_SECONDS,
+            failure_threshold=settings.HOST_POLICY_FAILURE_THRESHOLD,
+        )
+    return _host_policy
@@ -0,0 +1,203 @@
+"""레시피 페이지 HTML <head>를 직접 받아 og:/meta 태그를 파싱하는 메타데이터 조회"""
+import asyncio
+import codecs
+import ipaddress
+import logging
+import socket
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import httpx
+
+from config import settings
+from services.budget import RequestBudget, stage_timeout
+from services.http_clients import get_http_client
+from services.metrics import record_upstream_status
+
+logger = logging.getLogger(__name__)
+
+# 메타 태그 키 -> 결과 키 (앞에 있는 키가 우선)
+_DESCRIPTION_KEYS = ('og:description', 'twitter:description', 'description')
+_IMAGE_KEYS = ('og:image', 'og:image:url', 'og:image:secure_url', 'twitter:image')
+_TITLE_KEYS = ('og:title', 'twitter:title')
+_SITE_NAME_KEYS = ('og:site_name',)
+_META_KEYS = frozenset(_DESCRIPTION_KEYS + _IMAGE_KEYS + _TITLE_KEYS + _SITE_NAME_KEYS)
+
+_HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+_REDIRECT_STATUS_CODES = (301, 302, 303, 307, 308)
+_MAX_REDIRECTS = 5
+
+
+class HtmlFetchError(Exception):
+    """페이지를 직접 받아 메타데이터를 얻지 못한 경우"""
+
+
+class HeadMetadataParser(HTMLParser):
+    """
+    HTML을 조각 단위로 feed()받아 <head>의 og:/twitter:/description 메타 태그와 <title>을 모읍니다.
+
+    </head> 또는 <body>를 만나면 done이 True가 되어 호출자가 나머지 본문을 받지 않아도 됩니다.
+    속성 순서, 따옴표 종류, 엔티티(&amp; 등)는 html.parser가 처리합니다.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.done = False
+        self._meta: Dict[str, str] = {}
+        self._title_parts: List[str] = []
+        self._in_title = False
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if self.done:
+            return
+        if tag == 'meta':
+            values = {name.lower(): value for name, value in attrs if value is not None}
+            key = (values.get('property') or values.get('name') or '').strip().lower()
+            content = (values.get('content') or '').strip()
+            if key in _META_KEYS and content and key not in self._meta:
+                self._meta[key] = content
+        elif tag == 'title':
+            self._in_title = True
+        elif tag == 'body':
+            self.done = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'title':
+            self._in_title = False
+        elif tag == 'head':
+            self.done = True
+
+    def handle_data(self, data: str) -> None:
+        if self._in_title and not self.done:
+            self._title_parts.append(data)
+
+    def result(self) -> Dict[str, Optional[str]]:
+        """description, og:image, title, og:site_name을 포함한 딕셔너리"""
+        title = ' '.join(''.join(self._title_parts).split()) or None
+        return {
+            'description': self._first(_DESCRIPTION_KEYS),
+            'og:image': self._first(_IMAGE_KEYS),
+            'title': self._first(_TITLE_KEYS) or title,
+            'og:site_name': self._first(_SITE_NAME_KEYS),
+        }
+
+    def _first(self, keys: Tuple[str, ...]) -> Optional[str]:
+        for key in keys:
+            if self._meta.get(key):
+                return self._meta[key]
+        return None
+
+
+def parse_head_metadata(html_content: str) -> Dict[str, Optional[str]]:
+    """HTML 문자열 전체에서 메타데이터 파싱 (한 번에 feed)"""
+    parser = HeadMetadataParser()
+    parser.feed(html_content)
+    return parser.result()
+
+
+async def _ensure_public_host(url: str) -> None:
+    """
+    사설/루프백 주소로 향하는 요청 차단 (사용자가 보낸 URL을 서버가 직접 요청하므로)
+
+    요청 전에 이름을 풀어 빨리 거르는 단계이며, 연결 시점에 다시 풀린 주소는 _check_peer_address가 확인합니다.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise HtmlFetchError(f"지원하지 않는 URL입니다: {url}")
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80), type=socket.SOCK_STREAM
+        )
+    except socket.gaierror as e:
+        raise HtmlFetchError(f"호스트를 찾을 수 없습니다: {parts.hostname}") from e
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0])
+        if not address.is_global:
+            raise HtmlFetchError(f"공개 주소가 아닌 호스트입니다: {parts.hostname}")
+
+
+async def _check_peer_address(event_name: str, info: Dict[str, Any]) -> None:
+    """
+    httpcore trace 콜백: TCP 연결이 맺어진 직후 실제 연결된 주소가 공개 주소인지 확인
+
+    _ensure_public_host의 확인과 httpx의 연결이 이름을 따로 풀기 때문에, 처음엔 공개 주소를
+    나중엔 사설 주소를 돌려주는 DNS rebinding 호스트는 앞 단계만으로는 막을 수 없습니다.
+    요청을 보내기 전에 연결을 닫고 HtmlFetchError를 발생시킵니다.
+    """
+    if event_name != 'connection.connect_tcp.complete':
+        return
+    stream = info['return_value']
+    server_addr = stream.get_extra_info('server_addr')
+    if server_addr is None or not ipaddress.ip_address(server_addr[0]).is_global:
+        await stream.aclose()
+        raise HtmlFetchError(f"공개 주소가 아닌 곳에 연결되었습니다: {server_addr}")
+
+
+async def _read_head(resp: httpx.Response, max_bytes: int) -> Dict[str, Optional[str]]:
+    """응답 본문을 조각 단위로 파싱하다가 </head>에 도달하거나 max_bytes를 넘으면 중단"""
+    try:
+        decoder = codecs.getincrementaldecoder(resp.charset_encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    parser = HeadMetadataParser()
+    received = 0
+    async for chunk in resp.aiter_bytes():
+        if received + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - received]
+        received += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or received >= max_bytes:
+            break
+    return parser.result()
+
+
+async def fetch_html_metadata(url: str, budget: Optional[RequestBudget] = None) -> Dict[str, Any]:
+    """
+    페이지를 직접 요청해 <head>의 메타데이터 반환 (JS 렌더링 없이 og 태그를 주는 사이트용)
+
+    본문은 HTML_FETCH_MAX_BYTES까지만 스트리밍으로 읽고, 리다이렉트는 호스트를 확인하며 직접 따라갑니다.
+
+    Returns:
+        description, og:image, title, og:site_name을 포함한 딕셔너리 (OpenGraph.io 응답의 루트 키와 같은 형식)
+
+    Raises:
+        HtmlFetchError: HTML이 아니거나 오류 응답인 경우
+        BudgetExhausted: 요청 시간 예산이 떨어진 경우
+    """
+    client = get_http_client("html")
+    timeout = stage_timeout(budget, settings.HTML_FETCH_TIMEOUT_SECONDS)
+    headers = {
+        'User-Agent': settings.HTML_FETCH_USER_AGENT,
+        'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.5',
+        'Accept-Language': 'ko-KR,ko;q=0.9,en;q=0.8',
+    }
+
+    async def fetch() -> Dict[str, Any]:
+        target = url
+        for _ in range(_MAX_REDIRECTS + 1):
+            await _ensure_public_host(target)
+            async with client.stream(
+                "GET", target, headers=headers, timeout=timeout, extensions={"trace": _check_peer_address}
+            ) as resp:
+                record_upstream_status("html", resp.status_code)
+                if resp.status_code in _REDIRECT_STATUS_CODES and resp.headers.get('location'):
+                    target = urljoin(target, resp.headers['location'])
+                    continue
+                if resp.status_code != 200:
+                    raise HtmlFetchError(f"status={resp.status_code}")
+                content_type = resp.headers.get('content-type', '').split(';')[0].strip().lower()
+                if content_type and content_type not in _HTML_CONTENT_TYPES:
+                    raise HtmlFetchError(f"HTML이 아닌 응답입니다: content-type={content_type}")
+                return await _read_head(resp, settings.HTML_FETCH_MAX_BYTES)
+        raise HtmlFetchError(f"리다이렉트가 {_MAX_REDIRECTS}번을 넘었습니다: {url}")
+
+    # httpx 타임아웃은 연결/읽기 단계별 값이므로 전체 시간은 wait_for로 제한
+    try:
+        return await asyncio.wait_for(fetch(), timeout)
+    except asyncio.TimeoutError as e:
+        record_upstream_status("html", "error")
+        raise HtmlFetchError(f"{timeout:.1f}초 안에 <head>를 받지 못했습니다.") from e
+    except httpx.HTTPError:
+        record_upstream_status("html", "error")
+        raise
@@ -0,0 +1,223 @@
+"""외부 호출용 공유 HTTP 클라이언트 관리"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SharedHttpClient:
+    """
+    httpx.AsyncClient를 감싼 공유 클라이언트.
+
+    커넥션 풀 전체 한도(max_connections)와 별개로 호스트별 동시 요청 수를 제한하고,
+    풀 크기 조정을 위한 사용량 통계를 집계합니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        timeout: float,
+        http2: bool,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        max_connections_per_host: int,
+    ):
+        self.name = name
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+        )
+
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+        self._host_in_flight: Dict[str, int] = {}
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._waiting = 0
+        self._total_requests = 0
+        self._total_errors = 0
+
+    @property
+    def is_closed(self) -> bool:
+        return self.client.is_closed
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        async with self._slot(url):
+            return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs: Any) -> AsyncIterator[httpx.Response]:
+        """응답 본문을 스트리밍으로 읽기 위한 컨텍스트 매니저"""
+        async with self._slot(url):
+            async with self.client.stream(method, url, **kwargs) as resp:
+                yield resp
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        """풀 사용량 통계"""
+        connections = self._pool_connections()
+        return {
+            "name": self.name,
+            "max_connections": self.max_connections,
+            "max_connections_per_host": self.max_connections_per_host,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "waiting": self._waiting,
+            "total_requests": self._total_requests,
+            "total_errors": self._total_errors,
+            "open_connections": len(connections),
+            "idle_connections": sum(1 for c in connections if c.is_idle()),
+            "hosts_in_flight": dict(self._host_in_flight),
+        }
+
+    # ---------- 내부 구현 ----------
+
+    @asynccontextmanager
+    async def _slot(self, url: str) -> AsyncIterator[None]:
+        host = httpx.URL(url).host
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+
+        self._waiting += 1
+        try:
+            await slot.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        self._host_in_flight[host] = self._host_in_flight.get(host, 0) + 1
+        self._total_requests += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            yield
+        except Exception:
+            self._total_errors += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._host_in_flight[host] -= 1
+            slot.release()
+
+    def _pool_connections(self) -> list:
+        # httpcore 커넥션 풀 내부 상태 조회 (구현이 바뀌어도 통계 때문에 실패하지 않도록 방어)
+        pool = getattr(getattr(self.client, "_transport", None), "_pool", None)
+        return list(getattr(pool, "connections", []) or [])
+
+
+def _client_options(name: str) -> Dict[str, Any]:
+    """클라이언트 이름별 풀 설정"""
+    if name == "gemini":
+        return {
+            "timeout": settings.GEMINI_TIMEOUT_SECONDS,
+            "http2": settings.GEMINI_HTTP2,
+            "max_connections": settings.GEMINI_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.GEMINI_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": settings.GEMINI_KEEPALIVE_EXPIRY_SECONDS,
+            "max_connections_per_host": settings.GEMINI_MAX_CONNECTIONS_PER_HOST,
+        }
+    if name == "opengraph":
+        return {
+            "timeout": settings.OPENGRAPH_TIMEOUT_SECONDS,
+            "http2": settings.OPENGRAPH_HTTP2,
+            "max_connections": settings.OPENGRAPH_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.OPENGRAPH_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": settings.OPENGRAPH_KEEPALIVE_EXPIRY_SECONDS,
+            "max_connections_per_host": settings.OPENGRAPH_MAX_CONNECTIONS_PER_HOST,
+        }
+    if name == "html":
+        return {
+            "timeout": settings.HTML_FETCH_TIMEOUT_SECONDS,
+            "http2": settings.HTML_FETCH_HTTP2,
+            "max_connections": settings.HTML_FETCH_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.HTML_FETCH_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry": settings.HTML_FETCH_KEEPALIVE_EXPIRY_SECONDS,
+            "max_connections_per_host": settings.HTML_FETCH_MAX_CONNECTIONS_PER_HOST,
+        }
+    raise KeyError(f"알 수 없는 HTTP 클라이언트: {name}")
+
+
+CLIENT_NAMES = ("gemini", "opengraph", "html")
+
+_clients: Dict[str, SharedHttpClient] = {}
+
+
+def get_http_client(name: str) -> SharedHttpClient:
+    """
+    이름에 해당하는 공유 클라이언트 반환
+
+    보통 서버 lifespan에서 init_http_clients()로 미리 만들어 두지만,
+    스크립트 등 lifespan 밖에서 호출되면 최초 사용 시 생성합니다.
+    """
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _clients[name] = SharedHttpClient(name, **_client_options(name))
+    return client
+
+
+def init_http_clients() -> None:
+    """모든 공유 클라이언트 생성 (서버 시작 시 호출)"""
+    for name in CLIENT_NAMES:
+        get_http_client(name)
+    logger.info(f"공유 HTTP 클라이언트 초기화 완료: {', '.join(CLIENT_NAMES)}")
+
+
+async def close_http_clients() -> None:
+    """모든 공유 클라이언트 종료 (서버 종료 시 호출)"""
+    for name, client in list(_clients.items()):
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"HTTP 클라이언트 종료 실패: name={name}, error={e}")
+    _clients.clear()
+
+
+def get_http_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """생성된 모든 공유 클라이언트의 풀 사용량 통계"""
+    return {name: client.stats() for name, client in _clients.items()}
+
+
+async def warm_up_http_clients(timeout: float = 3.0) -> Dict[str, Any]:
+    """
+    Gemini/OpenGraph 호스트에 미리 연결 (서버 시작 시 호출)
+
+    HEAD 요청 한 번으로 DNS 조회와 TLS(HTTP/2) 핸드셰이크를 끝내 두고 커넥션을 풀에 남겨,
+    첫 /extract 요청이 연결 수립 시간을 부담하지 않게 합니다. 응답 상태 코드는 상관없고,
+    연결에 실패해도 요청 시점에 다시 연결하므로 경고만 남깁니다. (사용량 통계에는 포함하지 않음)
+    """
+    targets = {"gemini": settings.GEMINI_API_BASE_URL}
+    if settings.OPENGRAPH_API_KEY:
+        targets["opengraph"] = settings.OPENGRAPH_API_BASE_URL
+
+    async def _preconnect(name: str, url: str) -> Any:
+        try:
+            resp = await get_http_client(name).client.head(url, timeout=timeout)
+            return resp.status_code
+        except Exception as e:
+            logger.warning(f"HTTP 사전 연결 실패: name={name}, url={url}, error={e}")
+            return "error"
+
+    results = await asyncio.gather(*(_preconnect(name, url) for name, url in targets.items()))
+    return dict(zip(targets, results))
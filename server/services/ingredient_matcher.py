@@ -0,0 +1,211 @@
+"""foodData 표준 재료명 매칭 인덱스"""
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from services.catalog_snapshot import CompactCatalog
+
+# '아보카도'와 '후숙된 아보카도' 같은 경우도 매칭되도록 낮게 설정된 유사도 기준
+DEFAULT_CUTOFF = 0.4
+
+
+def _normalize_key(name: str) -> str:
+    """
+    매칭용 키 정규화.
+
+    iOS 등에서 넘어온 텍스트는 한글이 자모 단위(NFD)로 분해되어 있는 경우가 있어,
+    NFC로 합쳐 음절 단위로 비교되도록 합니다.
+    """
+    return unicodedata.normalize("NFC", name)
+
+
+class IngredientMatcher:
+    """
+    foodData 이름 목록에 대한 재료명 매칭기.
+
+    difflib.get_close_matches(name, food_names, n=1, cutoff=0.4)와 같은 결과를 내면서
+    카탈로그 전체를 매번 훑지 않도록 다음 순서로 동작합니다.
+
+    1. 정확히 같은 이름은 해시 조회로 바로 반환
+    2. 음절(문자) 역색인으로 공통 문자가 있는 후보만 수집하고,
+       공통 문자 수로 계산한 유사도 상한(quick_ratio)이 cutoff 미만인 후보는 제외
+    3. 남은 후보에 대해서만 SequenceMatcher.ratio()로 최종 점수 계산
+
+    2단계의 상한은 실제 ratio보다 항상 크거나 같으므로 cutoff 이상인 후보를 놓치지 않습니다.
+    카탈로그 버전마다 한 번만 만들어 재사용합니다.
+    음식 문서 전체 대신 이름별 (food_id, category)만 보관하므로 카탈로그 객체를 붙잡지 않습니다.
+    """
+
+    def __init__(
+        self,
+        food_data: Union[CompactCatalog, Iterable[Dict[str, Any]]],
+        version: Optional[int] = None,
+    ):
+        self.version = version
+
+        # 이름 -> (food_id, category). 같은 이름이 여러 개면 마지막 항목을 사용 (기존 dict 구성 방식과 동일)
+        self._name_to_food: Dict[str, Tuple[str, Any]] = {}
+        if isinstance(food_data, CompactCatalog):
+            # 압축 카탈로그는 행 번호로 열을 바로 읽어 음식 딕셔너리를 만들지 않음
+            for row, name in enumerate(food_data.names()):
+                name = name.strip()
+                if name:
+                    self._name_to_food[name] = (food_data.food_id(row), food_data.category(row))
+        else:
+            for food in food_data:
+                name = (food.get("name") or "").strip()
+                if name:
+                    self._name_to_food[name] = (food.get("id", ""), food.get("category", ""))
+
+        self._names: List[str] = list(self._name_to_food)
+        self._keys: List[str] = [_normalize_key(name) for name in self._names]
+        self._exact: Dict[str, int] = {key: idx for idx, key in enumerate(self._keys)}
+
+        # 문자 -> [(이름 인덱스, 해당 문자 등장 횟수)]
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for idx, key in enumerate(self._keys):
+            for char, count in Counter(key).items():
+                self._postings[char].append((idx, count))
+        self._postings = dict(self._postings)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def best_match(self, raw_name: str, cutoff: float = DEFAULT_CUTOFF) -> Optional[str]:
+        """가장 유사한 foodData 이름 반환 (cutoff 미만이면 None)"""
+        query = _normalize_key(raw_name)
+        if not query:
+            return None
+
+        idx = self._exact.get(query)
+        if idx is not None:
+            return self._names[idx]
+
+        # 후보별 공통 문자 수 (multiset 교집합 크기) 집계
+        common: Dict[int, int] = defaultdict(int)
+        for char, query_count in Counter(query).items():
+            for idx, count in self._postings.get(char, ()):
+                common[idx] += min(query_count, count)
+
+        query_len = len(query)
+        matcher = SequenceMatcher()
+        matcher.set_seq2(query)
+
+        best: Optional[Tuple[float, str]] = None
+        for idx, shared in common.items():
+            key = self._keys[idx]
+            if 2.0 * shared / (len(key) + query_len) < cutoff:
+                continue
+            matcher.set_seq1(key)
+            score = matcher.ratio()
+            if score < cutoff:
+                continue
+            # 점수가 같으면 get_close_matches와 동일하게 이름이 큰 쪽을 선택
+            candidate = (score, self._names[idx])
+            if best is None or candidate > best:
+                best = candidate
+
+        return best[1] if best else None
+
+    def match(self, raw_name: str, cutoff: float = DEFAULT_CUTOFF) -> Optional[Dict[str, Any]]:
+        """가장 유사한 foodData 항목의 id, name, category 반환 (없으면 None)"""
+        best_name = self.best_match(raw_name, cutoff)
+        if best_name is None:
+            return None
+        food_id, category = self._name_to_food[best_name]
+        return {"id": food_id, "name": best_name, "category": category}
+
+    def match_ingredients(self, ingredients: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Gemini가 추출한 재료 리스트를 표준화된 재료 리스트로 변환
+
+        Returns:
+            standard_name, food_id, category, amount, unit을 포함한 딕셔너리 리스트
+        """
+        matched_ingredients: List[Dict[str, Any]] = []
+
+        for ing in ingredients:
+            if not isinstance(ing, dict):
+                continue
+
+            raw_name = ing.get("name") or ""
+            if not isinstance(raw_name, str):
+                continue
+            raw_name = raw_name.strip()
+            if not raw_name:
+                continue
+
+            best_name = self.best_match(raw_name)
+            if best_name is None:
+                # 매칭이 불확실하면 제외
+                continue
+
+            food_id, category = self._name_to_food[best_name]
+            matched_ingredients.append(
+                {
+                    "standard_name": best_name,
+                    "food_id": food_id,
+                    "category": category,
+                    "amount": ing.get("amount"),
+                    "unit": ing.get("unit", ""),
+                }
+            )
+
+        return matched_ingredients
+
+
+_matcher: Optional[IngredientMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+# 공유 캐시에 매칭 인덱스를 저장하는 키 (카탈로그 스냅샷 revision과 같은 revision으로 저장)
+SHARED_MATCHER_KEY = 'ingredient_matcher'
+
+
+def get_ingredient_matcher(food_catalog) -> IngredientMatcher:
+    """
+    카탈로그 버전별로 한 번만 만들어진 IngredientMatcher 반환
+
+    카탈로그가 공유 스냅샷에서 왔으면(SharedFoodCatalog) 다른 워커가 만들어 둔 인덱스를
+    공유 캐시에서 읽어 재사용하고, 없으면 만들어서 저장합니다.
+    """
+    global _matcher
+
+    version, food_data = food_catalog.snapshot()
+    matcher = _matcher
+    if matcher is not None and matcher.version == version:
+        return matcher
+
+    with _matcher_lock:
+        if _matcher is None or _matcher.version != version:
+            _matcher = _load_shared_matcher(food_catalog, version) or IngredientMatcher(food_data, version=version)
+            _store_shared_matcher(food_catalog, _matcher)
+        return _matcher
+
+
+def _load_shared_matcher(food_catalog, version: int) -> Optional[IngredientMatcher]:
+    store = getattr(food_catalog, 'shared_store', None)
+    revision = getattr(food_catalog, 'shared_revision', 0)
+    if store is None or not revision:
+        return None
+    meta = store.revision(SHARED_MATCHER_KEY)
+    if meta is None or meta[0] != revision:
+        return None
+    loaded = store.get(SHARED_MATCHER_KEY)
+    if loaded is None or loaded[0] != revision:
+        return None
+    matcher = loaded[1]
+    matcher.version = version
+    return matcher
+
+
+def _store_shared_matcher(food_catalog, matcher: IngredientMatcher) -> None:
+    store = getattr(food_catalog, 'shared_store', None)
+    revision = getattr(food_catalog, 'shared_revision', 0)
+    if store is None or not revision:
+        return
+    meta = store.revision(SHARED_MATCHER_KEY)
+    if meta is None or meta[0] != revision:
+        store.set(SHARED_MATCHER_KEY, matcher, revision=revision)
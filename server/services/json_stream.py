@@ -0,0 +1,91 @@
+"""LLM 응답용 증분 JSON 배열 파서"""
+import json
+from typing import Any, Dict, List
+
+
+class IncrementalJsonArrayParser:
+    """
+    JSON 배열 텍스트를 조각 단위로 받아, 최상위 배열의 객체 원소가 닫힐 때마다 반환합니다.
+
+    - 객체가 아닌 원소(중첩 배열, 문자열, 숫자 등)는 건너뜁니다.
+    - 첫 번째 '[' 이전의 텍스트(코드 블록 표시, 설명 문장 등)는 무시합니다.
+    - 응답이 중간에 끊겨도 그때까지 완전히 닫힌 객체는 모두 얻을 수 있으므로,
+      끊긴 문자열에 괄호를 덧붙여 복구하는 방식이 필요 없습니다.
+    """
+
+    def __init__(self):
+        self.started = False
+        self.finished = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item: List[str] = []
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """텍스트 조각을 넣고, 이번 조각에서 완성된 객체 원소 리스트를 반환"""
+        completed: List[Dict[str, Any]] = []
+
+        for char in chunk:
+            if self.finished:
+                break
+
+            if not self.started:
+                if char == '[':
+                    self.started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._depth >= 2:
+                    self._item.append(char)
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in '[{':
+                self._depth += 1
+            elif char in ']}':
+                self._depth -= 1
+                if self._depth == 0:
+                    # 최상위 배열 종료
+                    self.finished = True
+                    break
+
+            if self._depth >= 2 or (self._depth == 1 and char in ']}'):
+                self._item.append(char)
+
+            if self._depth == 1 and char in ']}':
+                # 원소 종료 (중첩 배열 등 객체가 아닌 원소는 버퍼만 비우고 건너뜀)
+                item = self._decode_item()
+                if item is not None:
+                    completed.append(item)
+
+        return completed
+
+    def _decode_item(self) -> Any:
+        text = ''.join(self._item).strip()
+        self._item = []
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, dict) else None
+
+
+def parse_completed_array_items(text: str) -> List[Dict[str, Any]]:
+    """
+    (끊겼을 수 있는) JSON 배열 텍스트에서 완전히 닫힌 객체 원소만 추출
+
+    배열 시작 '['를 찾지 못하면 ValueError를 발생시킵니다.
+    """
+    parser = IncrementalJsonArrayParser()
+    items = parser.feed(text)
+    if not parser.started:
+        raise ValueError("JSON 배열 시작을 찾지 못했습니다.")
+    return items
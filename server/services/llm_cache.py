@@ -0,0 +1,246 @@
+"""설명 텍스트 내용 기준 Gemini 원본 재료 응답 캐시"""
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from config import settings
+from services.extraction_cache import resolve_cache_path
+
+logger = logging.getLogger(__name__)
+
+# 조회 시각(last_access) 갱신을 모아 두었다가 한 번에 기록하는 개수
+_TOUCH_FLUSH_SIZE = 64
+
+# 이모지 및 이모지 조합용 문자 (ZWJ, variation selector, 피부색 수식자, 국기 문자 등)
+EMOJI_PATTERN = re.compile(
+    '['
+    '\U0001F000-\U0001FAFF'
+    '\U00002600-\U000027BF'
+    '\U00002B00-\U00002BFF'
+    '\U0001F1E6-\U0001F1FF'
+    '\U0000FE00-\U0000FE0F'
+    '\U0000200D'
+    '\U000020E3'
+    '\U000E0020-\U000E007F'
+    ']+'
+)
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_description(description: str) -> str:
+    """
+    캐시 키용 설명 텍스트 정규화
+
+    같은 캡션이 리포스트·단축 링크 등으로 다시 들어올 때 공백이나 이모지 차이로
+    키가 달라지지 않도록 NFC 정규화 후 이모지를 제거하고 연속 공백을 하나로 합칩니다.
+    """
+    text = unicodedata.normalize('NFC', description)
+    text = EMOJI_PATTERN.sub(' ', text)
+    return _WHITESPACE_PATTERN.sub(' ', text).strip()
+
+
+def llm_cache_key(description: str, model: str, prompt_version: str) -> str:
+    """정규화된 설명 텍스트 + 모델 이름 + 프롬프트 버전의 SHA-256 해시"""
+    payload = '\x00'.join((prompt_version, model, normalize_description(description)))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LlmResponseCache:
+    """
+    Gemini가 추출한 원본 재료 배열(name, amount, unit)을 로컬 SQLite 파일에 저장하는 캐시
+
+    URL이 아니라 설명 텍스트 내용으로 키를 만들기 때문에 다른 URL로 들어온 같은 캡션도 적중합니다.
+    저장된 값은 foodData 매칭 전 원본이므로 카탈로그가 바뀌어도 다시 호출할 필요가 없고,
+    저장된 값의 총 크기가 max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+
+    SQLite 호출은 전용 스레드 하나에서 실행하므로 다른 워커가 쓰기 잠금을 잡고 있어도
+    이벤트 루프가 멈추지 않습니다. 조회 시각 갱신은 모아 두었다가 저장할 때 함께 기록합니다.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='llm-cache')
+        # 아직 기록하지 않은 조회 시각 (key -> last_access)
+        self._touched: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_access REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)')
+        self._conn.commit()
+        # 저장된 값의 총 크기 (저장할 때마다 전체를 합산하지 않도록 추적하고, 제거할 때 다시 맞춤)
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    async def _run(self, func, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def get(
+        self,
+        description: str,
+        models: Sequence[str],
+        prompt_version: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        models 순서대로 캐시된 원본 재료 배열을 찾아 처음 적중한 값을 반환 (없으면 None)
+
+        모델 후보 중 어느 모델이 응답했는지는 호출 전에는 알 수 없으므로 후보를 모두 확인합니다.
+        """
+        keys = [llm_cache_key(description, model, prompt_version) for model in models]
+        try:
+            value = await self._run(self._get_sync, keys)
+        except Exception as e:
+            # 캐시 장애가 추출 자체를 막지 않도록 미스로 처리
+            logger.warning(f"LLM 응답 캐시 조회 실패: error={e}")
+            value = None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(
+        self,
+        description: str,
+        model: str,
+        prompt_version: str,
+        ingredients: List[Dict[str, Any]]
+    ) -> None:
+        key = llm_cache_key(description, model, prompt_version)
+        payload = json.dumps(ingredients, ensure_ascii=False)
+        try:
+            await self._run(self._set_sync, key, payload)
+        except Exception as e:
+            logger.warning(f"LLM 응답 캐시 저장 실패: error={e}")
+
+    def _get_sync(self, keys: List[str]) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            for key in keys:
+                row = self._conn.execute('SELECT value FROM responses WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    self._touched[key] = time.time()
+                    if len(self._touched) >= _TOUCH_FLUSH_SIZE:
+                        self._flush_touched()
+                        self._conn.commit()
+                    return json.loads(row[0])
+        return None
+
+    def _set_sync(self, key: str, payload: str) -> None:
+        size = len(payload.encode('utf-8'))
+        with self._lock:
+            row = self._conn.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, payload, size, time.time()),
+            )
+            self._touched.pop(key, None)
+            self._total_bytes += size - (row[0] if row else 0)
+            self._flush_touched()
+            if self._total_bytes > self._max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                'UPDATE responses SET last_access = ? WHERE key = ?',
+                [(last_access, key) for key, last_access in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _evict(self) -> None:
+        """최근 사용 순으로 누적한 크기가 max_bytes를 넘는 항목부터 제거하고 총 크기를 다시 맞춤"""
+        cursor = self._conn.execute(
+            'DELETE FROM responses WHERE key IN ('
+            ' SELECT key FROM ('
+            '  SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running'
+            '  FROM responses)'
+            ' WHERE running > ?)',
+            (self._max_bytes,),
+        )
+        self.evictions += max(cursor.rowcount, 0)
+        # 같은 파일을 쓰는 다른 워커가 저장한 항목까지 반영
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()
+        return {
+            'entries': entries,
+            'bytes': total_bytes,
+            'max_bytes': self._max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+class _DisabledLlmCache:
+    """LLM_CACHE_ENABLED=false일 때 사용하는 빈 캐시"""
+
+    async def get(
+        self,
+        description: str,
+        models: Sequence[str],
+        prompt_version: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        return None
+
+    async def set(
+        self,
+        description: str,
+        model: str,
+        prompt_version: str,
+        ingredients: List[Dict[str, Any]]
+    ) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {'enabled': False}
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """설정(LLM_CACHE_ENABLED)에 맞는 프로세스 전역 LLM 응답 캐시 반환"""
+    global _llm_cache
+
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                if settings.LLM_CACHE_ENABLED:
+                    _llm_cache = LlmResponseCache(
+                        resolve_cache_path(settings.LLM_CACHE_PATH),
+                        settings.LLM_CACHE_MAX_BYTES,
+                    )
+                else:
+                    _llm_cache = _DisabledLlmCache()
+    return _llm_cache
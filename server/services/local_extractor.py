@@ -0,0 +1,244 @@
+"""정형화된 재료 목록 캡션용 규칙·사전 기반 재료 추출기 (Gemini 호출 전 단계)"""
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from services.ingredient_matcher import IngredientMatcher
+
+# 원문 단위 -> 저장할 단위 (긴 표기부터 매칭되도록 정렬해서 사용)
+_UNIT_ALIASES = {
+    '큰술': '큰술', '큰스푼': '큰술', '밥숟가락': '큰술', '숟가락': '큰술', '스푼': '큰술',
+    '테이블스푼': '큰술', 'tbsp': '큰술', 'Tbsp': '큰술', 'T': '큰술',
+    '작은술': '작은술', '작은스푼': '작은술', '티스푼': '작은술', 'tsp': '작은술', 't': '작은술',
+    '종이컵': '컵', '컵': '컵',
+    'kg': 'kg', 'g': 'g', '그램': 'g',
+    'ml': 'ml', 'mL': 'ml', 'cc': 'ml', 'L': 'L', 'l': 'L', '리터': 'L',
+    '개': '개', '알': '알', '쪽': '쪽', '줌': '줌', '장': '장', '마리': '마리', '모': '모',
+    '봉지': '봉지', '봉': '봉', '팩': '팩', '캔': '캔', '대': '대', '뿌리': '뿌리', '톨': '톨',
+    '꼬집': '꼬집', '공기': '공기', '줄기': '줄기', '송이': '송이', '포기': '포기', '통': '통',
+    '토막': '토막', '조각': '조각', '덩이': '덩이', '단': '단',
+}
+_UNIT_PATTERN = '|'.join(sorted(map(re.escape, _UNIT_ALIASES), key=len, reverse=True))
+
+_UNICODE_FRACTIONS = {'½': 0.5, '⅓': 1 / 3, '⅔': 2 / 3, '¼': 0.25, '¾': 0.75}
+# 단위가 바로 뒤에 올 때만 수량으로 보는 한글 수 표현 (예: "반 개", "한 줌")
+_KOREAN_NUMBERS = {'반': 0.5, '한': 1, '두': 2, '세': 3, '네': 4}
+
+_AMOUNT_PATTERN = (
+    r'\d+\s*(?:과|와|\s)\s*\d+\s*/\s*\d+'           # 대분수 (1 1/2, 1과 1/2)
+    r'|\d+\s*/\s*\d+'                             # 분수 (1/4)
+    r'|\d+(?:\.\d+)?(?:\s*[~\-]\s*\d+(?:\.\d+)?)?'  # 정수/소수/범위 (2~3)
+    r'|[½⅓⅔¼¾]'
+)
+_QUANTITY = re.compile(
+    rf'(?P<amount>{_AMOUNT_PATTERN})\s*(?P<unit>{_UNIT_PATTERN})?(?![A-Za-z])'
+    rf'|(?P<word>[반한두세네])\s*(?P<word_unit>{_UNIT_PATTERN})(?![A-Za-z가-힣])'
+)
+# 수량 없이 쓰이는 표현 (amount는 null)
+_QUALITATIVE = re.compile(r'약간|조금|적당량|적당히|소량|취향껏|기호에\s*따라|선택')
+
+# "재료:", "[재료]", "■ 주재료 (2인분)", "양념 -" 같은 재료 구역 제목
+SECTION_HEADER = re.compile(
+    r'^[\s\W_]*(?:주\s*재료|부\s*재료|기본\s*재료|재료|양념장?|소스|드레싱)'
+    r'\s*(?:\([^)]*\))?\s*(?:[\]】>)]\s*[:：]?|[:：]|\s[-–]\s|$)\s*(?P<rest>.*)$'
+)
+# 조리 순서가 시작되면 재료 구역 종료
+SECTION_END = re.compile(r'만드는\s*(?:법|방법)|조리\s*(?:법|방법|순서)|레시피\s*순서|how\s*to', re.IGNORECASE)
+STEP_LINE = re.compile(r'^\s*(?:\d+\s*[.)]|[①-⑳]|step\s*\d+).*(?:다|요|세요|줍니다)[.!~\s]*$', re.IGNORECASE)
+# 항목 앞의 번호/글머리표 ("1. ", "2) ", "- ", "• ")
+_LIST_MARKER = re.compile(r'^\s*(?:\d+\s*[.)]\s+|[-*•▪◦►▶✔✓]\s*)')
+_SEGMENT_SPLIT = re.compile(r'[,，、·•ㆍ|\n]+')
+_PARENTHESES = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+_EDGE_NOISE = re.compile(r'^[\W\d_]+|[\W_]+$')
+
+# 재료 구역 제목 없이 찾은 목록은 구조를 확신할 수 없으므로 신뢰도를 낮춤
+_NO_HEADER_PENALTY = 0.6
+
+
+@dataclass
+class LocalExtraction:
+    """규칙 기반 추출 결과"""
+    ingredients: List[Dict[str, Any]] = field(default_factory=list)
+    confidence: float = 0.0
+    recognized: int = 0
+    segments: int = 0
+    has_header: bool = False
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """수량 표기를 숫자로 변환 (1과 1/2 -> 1.5, 1/4 -> 0.25, 2~3 -> 2)"""
+    if text in _UNICODE_FRACTIONS:
+        return _UNICODE_FRACTIONS[text]
+    mixed = re.match(r'^(\d+)\s*(?:과|와|\s)\s*(\d+)\s*/\s*(\d+)$', text)
+    if mixed:
+        whole, numerator, denominator = (int(group) for group in mixed.groups())
+        return whole + numerator / denominator if denominator else None
+    # 범위(2~3)는 작은 값을 사용
+    text = re.split(r'[~\-]', text.replace(' ', ''))[0]
+    if '/' in text:
+        numerator, denominator = text.split('/', 1)
+        return int(numerator) / int(denominator) if int(denominator) else None
+    return float(text)
+
+
+def to_number(value: Optional[float]) -> Optional[float]:
+    if value is None:
+        return None
+    value = round(value, 3)
+    return int(value) if value == int(value) else value
+
+
+def parse_segment(segment: str) -> Optional[Dict[str, Any]]:
+    """
+    "배추 1/4개", "간장 2큰술", "소금 약간" 같은 재료 항목 하나를 name/amount/unit으로 변환
+
+    재료명으로 볼 텍스트가 남지 않으면 None
+    """
+    text = unicodedata.normalize('NFKC', segment).strip()
+    # NFKC가 ½ 같은 문자를 "1⁄2"로 바꾸므로 분수 슬래시를 일반 슬래시로 통일
+    text = _LIST_MARKER.sub('', text.replace('⁄', '/'))
+
+    amount: Optional[float] = None
+    unit = ''
+    match = _QUANTITY.search(text)
+    if match:
+        if match.group('amount'):
+            amount = parse_amount(match.group('amount'))
+            unit = _UNIT_ALIASES.get(match.group('unit') or '', '')
+        else:
+            amount = _KOREAN_NUMBERS[match.group('word')]
+            unit = _UNIT_ALIASES[match.group('word_unit')]
+        text = text[:match.start()] + ' ' + text[match.end():]
+
+    text = _QUALITATIVE.sub(' ', text)
+    text = _PARENTHESES.sub(' ', text)
+    name = _EDGE_NOISE.sub('', ' '.join(text.split()))
+    if not name:
+        return None
+    return {'name': name, 'amount': to_number(amount), 'unit': unit}
+
+
+def has_measurement(text: str) -> bool:
+    """"200ml", "1/4포기", "반 모"처럼 수량과 단위가 함께 쓰인 표기가 있는지 여부"""
+    text = unicodedata.normalize('NFKC', text).replace('⁄', '/')
+    return any(match.group('unit') or match.group('word_unit') for match in _QUANTITY.finditer(text))
+
+
+def _find_ingredient_lines(description: str) -> Tuple[List[str], bool]:
+    """재료 구역의 줄 목록과 재료 구역 제목을 찾았는지 여부 반환"""
+    lines = unicodedata.normalize('NFC', description).splitlines()
+    section: List[str] = []
+    in_section = False
+    has_header = False
+
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if SECTION_END.search(stripped) or (in_section and STEP_LINE.match(stripped)):
+            in_section = False
+            continue
+        header = SECTION_HEADER.match(stripped)
+        if header:
+            in_section = True
+            has_header = True
+            if header.group('rest'):
+                section.append(header.group('rest'))
+            continue
+        if in_section:
+            if stripped.startswith('#'):
+                # 해시태그 줄에서 재료 구역 종료
+                in_section = False
+                continue
+            section.append(stripped)
+
+    if has_header:
+        return section, True
+
+    # 제목이 없으면 수량 표기가 있는 짧은 줄만 재료 후보로 사용
+    candidates = [
+        line.strip() for line in lines
+        if line.strip() and not line.strip().startswith('#')
+        and len(line.strip()) <= 80 and _QUANTITY.search(line)
+        and not STEP_LINE.match(line.strip())
+    ]
+    return candidates, False
+
+
+class LocalIngredientExtractor:
+    """
+    "재료: 닭다리살 300g, 배추 1/4개, 간장 2큰술"처럼 재료가 정형화된 캡션을 Gemini 없이 추출합니다.
+
+    재료 구역을 찾아 항목별로 수량·단위를 규칙으로 분리하고, 재료명은 foodData 카탈로그를 사전으로
+    확인합니다. 카탈로그에서 확인된 항목 비율을 신뢰도로 사용하며, min_confidence 미만이면
+    호출자가 Gemini로 넘기도록 None을 반환합니다.
+    """
+
+    def __init__(self, min_confidence: float, match_cutoff: float, min_items: int = 2):
+        self._min_confidence = min_confidence
+        self._match_cutoff = match_cutoff
+        self._min_items = min_items
+        self.attempts = 0
+        self.served_locally = 0
+        self.escalated = 0
+
+    def analyze(self, description: str, matcher: IngredientMatcher) -> LocalExtraction:
+        """description을 규칙으로 분석한 결과와 신뢰도 반환 (통계에는 반영하지 않음)"""
+        lines, has_header = _find_ingredient_lines(description)
+        result = LocalExtraction(has_header=has_header)
+
+        for line in lines:
+            for segment in _SEGMENT_SPLIT.split(line):
+                item = parse_segment(segment)
+                if item is None:
+                    continue
+                result.segments += 1
+                if matcher.best_match(item['name'], cutoff=self._match_cutoff) is not None:
+                    result.recognized += 1
+                result.ingredients.append(item)
+
+        if result.segments >= self._min_items:
+            result.confidence = result.recognized / result.segments
+            if not has_header:
+                result.confidence *= _NO_HEADER_PENALTY
+        return result
+
+    def extract(self, description: str, matcher: IngredientMatcher) -> Optional[List[Dict[str, Any]]]:
+        """
+        신뢰도가 충분하면 원본 재료 리스트(name, amount, unit)를, 아니면 None 반환
+
+        반환 형식은 Gemini 원본 결과와 같으므로 이후 매칭 단계는 그대로 사용합니다.
+        """
+        self.attempts += 1
+        result = self.analyze(description, matcher)
+        if result.confidence >= self._min_confidence:
+            self.served_locally += 1
+            return result.ingredients
+        self.escalated += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'attempts': self.attempts,
+            'served_locally': self.served_locally,
+            'escalated': self.escalated,
+        }
+
+
+_local_extractor: Optional[LocalIngredientExtractor] = None
+
+
+def get_local_extractor() -> Optional[LocalIngredientExtractor]:
+    """프로세스 전역 규칙 기반 추출기 반환 (LOCAL_EXTRACT_ENABLED=false면 None)"""
+    global _local_extractor
+
+    if not settings.LOCAL_EXTRACT_ENABLED:
+        return None
+    if _local_extractor is None:
+        _local_extractor = LocalIngredientExtractor(
+            min_confidence=settings.LOCAL_EXTRACT_MIN_CONFIDENCE,
+            match_cutoff=settings.LOCAL_EXTRACT_MATCH_CUTOFF,
+        )
+    return _local_extractor
@@ -0,0 +1,215 @@
+"""단계별 지연 시간 히스토그램, 폴백/upstream 응답 카운터와 Prometheus 텍스트 형식 출력"""
+import bisect
+import math
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# 초 단위 기본 버킷 (OpenGraph full_render, Gemini 호출이 수 초~수십 초까지 걸리므로 60초까지)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """레이블 조합별 값을 갖는 메트릭 (스레드 안전)"""
+
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: 레이블은 {self.labelnames}이어야 합니다. (받은 값: {tuple(labels)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """단조 증가 카운터"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for values, total in items:
+            yield f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(total)}"
+
+
+class Histogram(_Metric):
+    """누적 버킷 히스토그램 (초 단위 지연 시간용)"""
+
+    kind = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        # 레이블 조합 -> (버킷별 개수(+Inf 포함, 비누적), 합계)
+        self._values: Dict[LabelValues, Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self._buckets) + 1), 0.0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def _samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        bucket_labels = self.labelnames + ('le',)
+        for values, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self._buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(bucket_labels, values + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, values)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, values)} {cumulative}"
+
+
+class MetricsRegistry:
+    """이름 순으로 메트릭을 모아 Prometheus 텍스트 형식(0.0.4)으로 출력"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"이미 등록된 메트릭입니다: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return '\n'.join(lines) + '\n'
+
+
+# Prometheus 텍스트 형식 Content-Type (charset은 Starlette 응답이 붙임)
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+_registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS: Histogram = _registry.register(Histogram(
+    'recipe_http_request_duration_seconds',
+    'API 요청 처리 시간 (경로, 메서드, 상태 코드별)',
+    ('method', 'path', 'status'),
+))
+STAGE_SECONDS: Histogram = _registry.register(Histogram(
+    'recipe_extraction_stage_duration_seconds',
+    '레시피 추출 단계별 소요 시간 (opengraph, gemini, catalog, save 등)',
+    ('stage',),
+))
+STARTUP_SECONDS: Histogram = _registry.register(Histogram(
+    'recipe_startup_duration_seconds',
+    '서버 시작 단계별 소요 시간 (import, firebase, http, catalog, ready)',
+    ('step',),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+))
+CAPTION_TOKENS: Counter = _registry.register(Counter(
+    'recipe_caption_tokens_total',
+    'Gemini에 보낸 캡션의 추정 토큰 수 합계 (전처리 전 before, 후 after)',
+    ('stage',),
+))
+FALLBACKS: Counter = _registry.register(Counter(
+    'recipe_extraction_fallbacks_total',
+    '추출 경로 폴백 횟수 (dummy_metadata, metadata_budget_exhausted, opengraph_api, opengraph_title_only, '
+    'opengraph_secondary, gemini_model_fallthrough, json_repair 등)',
+    ('kind',),
+))
+GEMINI_PARSES: Counter = _registry.register(Counter(
+    'recipe_gemini_parses_total',
+    'Gemini 재료 응답 파싱 결과 (mode: structured/prompt, outcome: ok/repaired/failed)',
+    ('mode', 'outcome'),
+))
+UPSTREAM_RESPONSES: Counter = _registry.register(Counter(
+    'recipe_upstream_responses_total',
+    'upstream 응답 상태 코드별 횟수 (타임아웃/연결 오류는 status="error")',
+    ('upstream', 'status'),
+))
+
+
+def record_fallback(kind: str) -> None:
+    """폴백 경로를 탄 횟수 기록"""
+    FALLBACKS.inc(kind=kind)
+
+
+def record_upstream_status(upstream: str, status: object) -> None:
+    """upstream 응답 상태 코드(또는 'error') 기록"""
+    UPSTREAM_RESPONSES.inc(upstream=upstream, status=str(status))
+
+
+def record_gemini_parse(mode: str, outcome: str) -> None:
+    """Gemini 응답 파싱 결과 기록 (repaired는 닫힌 객체만 골라낸 경우)"""
+    GEMINI_PARSES.inc(mode=mode, outcome=outcome)
+
+
+def record_caption_tokens(before: int, after: int) -> None:
+    """캡션 전처리 전후 추정 토큰 수 기록"""
+    CAPTION_TOKENS.inc(before, stage='before')
+    CAPTION_TOKENS.inc(after, stage='after')
+
+
+def record_startup_step(step: str, seconds: float) -> None:
+    """서버 시작 단계 소요 시간 기록"""
+    STARTUP_SECONDS.observe(seconds, step=step)
+
+
+def render_metrics() -> str:
+    """현재 프로세스의 모든 메트릭을 Prometheus 텍스트 형식으로 반환"""
+    return _registry.render()
@@ -1,12 +1,28 @@
 """OpenGraph.io를 통한 메타데이터 추출 서비스"""
+import asyncio
 import logging
+import time
 import httpx
 import urllib.parse
 from typing import Dict, Optional, Any
 from config import settings
+from services.http_clients import get_http_client
+from services.upstream_limiter import THROTTLE_STATUS_CODES, get_upstream_limiter
+from services.budget import BudgetExhausted, RequestBudget, stage_timeout
+from services.host_policy import get_host_policy, host_key
+from services.html_metadata import HtmlFetchError, fetch_html_metadata, parse_head_metadata
+from services.metrics import record_fallback
 
 logger = logging.getLogger(__name__)
 
+# variant 이름 -> (full_render, use_proxy)
+_VARIANTS = {
+    "full": (True, True),
+    "cheap": (False, False),
+}
+
+_stats = {"direct": 0, "hedged": 0, "secondary_wins": 0, "policy_cheap_first": 0}
+
 
 def _log_error_response(resp: httpx.Response, context: str = "") -> None:
     """에러 발생 시 응답 헤더/바디를 로그로 출력 (쿼터 등 확인용)"""
@@ -17,86 +33,227 @@ def _log_error_response(resp: httpx.Response, context: str = "") -> None:
     )
 
 
-async def _fetch_with_params(url: str, encoded_url: str, full_render: bool, use_proxy: bool) -> Dict[str, Any]:
-    """지정된 파라미터로 OpenGraph API 호출"""
+async def _fetch_with_params(
+    url: str,
+    encoded_url: str,
+    full_render: bool,
+    use_proxy: bool,
+    budget: Optional[RequestBudget] = None
+) -> Dict[str, Any]:
+    """지정된 파라미터로 OpenGraph API 호출 (budget이 있으면 타임아웃과 대기 기한을 남은 예산으로 제한)"""
     api_key = (settings.OPENGRAPH_API_KEY or "").strip()
     api_url = (
-        f"https://opengraph.io/api/1.1/site/{encoded_url}"
+        f"{settings.OPENGRAPH_API_BASE_URL}/api/1.1/site/{encoded_url}"
         f"?app_id={api_key}&full_render={str(full_render).lower()}&use_proxy={str(use_proxy).lower()}"
     )
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(api_url, timeout=30.0)
-        if resp.status_code != 200:
-            _log_error_response(resp, f"full_render={full_render}, use_proxy={use_proxy}")
-            resp.raise_for_status()
-        return resp.json()
+    # 공유 클라이언트의 keep-alive 커넥션을 재사용 (타임아웃은 OPENGRAPH_TIMEOUT_SECONDS, 기본 30초)
+    client = get_http_client("opengraph")
+    timeout = stage_timeout(budget, settings.OPENGRAPH_TIMEOUT_SECONDS)
+    # 429/503은 Retry-After만큼 기다렸다가 대기 기한 안에서 재시도하고, 한도를 넘는 호출은 대기열에서 기다림
+    limiter = get_upstream_limiter("opengraph")
+    deadline = limiter.deadline()
+    if budget is not None:
+        deadline = budget.cap_deadline(deadline)
+    # httpx 타임아웃은 연결/읽기 단계별 값이므로 전체 응답 시간은 wait_for로 한 번 더 제한
+    resp = await limiter.call(
+        lambda: asyncio.wait_for(client.get(api_url, timeout=timeout), timeout), deadline
+    )
+    if resp.status_code != 200:
+        _log_error_response(resp, f"full_render={full_render}, use_proxy={use_proxy}")
+        resp.raise_for_status()
+    return resp.json()
+
+
+def _has_usable_metadata(data: Dict[str, Any]) -> bool:
+    """응답에 레시피 분석에 쓸 title 또는 description이 있는지"""
+    for graph in (data.get('hybridGraph'), data.get('openGraph'), data):
+        if isinstance(graph, dict) and (graph.get('title') or graph.get('description')):
+            return True
+    return False
+
+
+async def _fetch_variant(
+    url: str,
+    encoded_url: str,
+    host: str,
+    variant: str,
+    budget: Optional[RequestBudget]
+) -> Dict[str, Any]:
+    """variant 파라미터로 호출하고 결과를 호스트 정책에 기록"""
+    full_render, use_proxy = _VARIANTS[variant]
+    try:
+        data = await _fetch_with_params(
+            url, encoded_url, full_render=full_render, use_proxy=use_proxy, budget=budget
+        )
+    except httpx.HTTPStatusError as e:
+        # 429/503은 호출량 문제이므로 variant 적합성 판단에서 제외
+        if e.response.status_code not in THROTTLE_STATUS_CODES:
+            get_host_policy().record(host, variant, usable=False)
+        raise
+    get_host_policy().record(host, variant, usable=_has_usable_metadata(data))
+    return data
 
 
-async def fetch_opengraph_data(url: str) -> Dict[str, Any]:
+async def _fetch_direct(url: str, host: str, budget: Optional[RequestBudget]) -> Optional[Dict[str, Any]]:
+    """페이지 <head>를 직접 받아 파싱하고 결과를 호스트 정책에 기록 (실패하면 None)"""
+    try:
+        data = await fetch_html_metadata(url, budget)
+    except BudgetExhausted:
+        raise
+    except Exception as e:
+        logger.info(f"페이지 직접 조회 실패, OpenGraph.io로 넘어갑니다: host={host}, error={e!r}")
+        get_host_policy().record(host, "direct", usable=False)
+        return None
+    usable = bool(data.get('description'))
+    get_host_policy().record(host, "direct", usable=usable)
+    if not usable:
+        logger.info(f"페이지 <head>에 description이 없어 OpenGraph.io로 넘어갑니다: host={host}")
+    return data
+
+
+async def fetch_opengraph_data(url: str, budget: Optional[RequestBudget] = None) -> Dict[str, Any]:
     """
-    OpenGraph.io API를 통해 메타데이터 추출.
-    403 등 실패 시 full_render/use_proxy=false로 폴백 재시도.
+    레시피 페이지 메타데이터 추출.
+
+    먼저 페이지 <head>를 직접 받아 og 태그를 파싱하고(direct), description이 없거나 실패하면
+    OpenGraph.io API로 넘어갑니다. direct가 연속으로 실패한 호스트(JS 렌더링이 필요한 사이트 등)는
+    바로 OpenGraph.io를 호출합니다. OPENGRAPH_API_KEY가 없으면 direct 결과만 사용합니다.
+
+    full_render/use_proxy=true 호출(full)을 먼저 시작하고, OPENGRAPH_HEDGE_DELAY_SECONDS 안에
+    사용 가능한 결과가 없으면 full_render/use_proxy=false 호출(cheap)을 동시에 시작해
+    title/description이 있는 결과를 먼저 준 쪽을 사용하고 나머지는 취소합니다.
+    호스트 정책에서 cheap이 통하는 호스트는 cheap만 먼저 호출하고,
+    cheap이 연속으로 실패한 호스트는 full이 실패했을 때만 cheap으로 폴백합니다.
+    budget이 주어지면 모든 호출을 남은 예산 안에서만 실행합니다.
+    (예산이 떨어지면 title이 있는 direct 결과를 반환하고, 그마저 없으면 BudgetExhausted)
     """
     encoded_url = urllib.parse.quote(url, safe='')
+    host = host_key(url)
+    policy = get_host_policy()
+    api_key = (settings.OPENGRAPH_API_KEY or "").strip()
+
+    direct: Optional[Dict[str, Any]] = None
+    tried_direct = settings.HTML_FETCH_ENABLED and (not api_key or not policy.avoids(host, "direct"))
+    if tried_direct:
+        direct = await _fetch_direct(url, host, budget)
+        if direct is not None and direct.get('description'):
+            _stats["direct"] += 1
+            return direct
+    if not api_key:
+        if direct is None:
+            raise HtmlFetchError("OPENGRAPH_API_KEY가 없고 페이지에서 메타데이터를 읽지 못했습니다.")
+        return direct
 
-    # 1차: full_render=true, use_proxy=true
+    if tried_direct:
+        # 직접 조회로 description을 얻지 못해 OpenGraph.io로 넘어감
+        record_fallback("opengraph_api")
     try:
-        return await _fetch_with_params(url, encoded_url, full_render=True, use_proxy=True)
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code in (403, 429):
-            logger.warning(
-                f"OpenGraph 1차 호출 실패 (status={e.response.status_code}), "
-                "full_render=false, use_proxy=false로 폴백 재시도"
-            )
-            _log_error_response(e.response, "1차 실패")
-        try:
-            return await _fetch_with_params(url, encoded_url, full_render=False, use_proxy=False)
-        except httpx.HTTPStatusError as e2:
-            _log_error_response(e2.response, "폴백 실패")
-            raise
+        if policy.prefers(host, "cheap"):
+            _stats["policy_cheap_first"] += 1
+            return await _race_variants(url, encoded_url, host, "cheap", "full", None, budget)
+        if not settings.OPENGRAPH_HEDGE_ENABLED or policy.avoids(host, "cheap"):
+            return await _race_variants(url, encoded_url, host, "full", "cheap", None, budget)
+        return await _race_variants(
+            url, encoded_url, host, "full", "cheap", settings.OPENGRAPH_HEDGE_DELAY_SECONDS, budget
+        )
+    except Exception as e:
+        # OpenGraph.io도 실패하거나 예산이 떨어지면 description 없이 title만 있는 direct 결과라도 사용
+        if direct is not None and direct.get('title'):
+            reason = "예산 소진" if isinstance(e, BudgetExhausted) else "호출 실패"
+            logger.warning(f"OpenGraph.io {reason}, 페이지 <head>의 title만 사용합니다: host={host}")
+            record_fallback("opengraph_title_only")
+            return direct
+        raise
+
+
+async def _race_variants(
+    url: str,
+    encoded_url: str,
+    host: str,
+    primary: str,
+    secondary: str,
+    hedge_delay: Optional[float],
+    budget: Optional[RequestBudget]
+) -> Dict[str, Any]:
+    """
+    primary를 시작하고, 실패하거나 hedge_delay가 지나면 secondary를 시작해
+    사용 가능한 결과를 먼저 준 쪽을 반환 (hedge_delay가 None이면 primary 실패 시에만 secondary 시작)
+
+    둘 다 사용 가능한 결과를 주지 못하면 마지막으로 받은 응답을, 응답이 없으면 마지막 예외를 던집니다.
+    """
+    tasks: Dict[asyncio.Task, str] = {
+        asyncio.ensure_future(_fetch_variant(url, encoded_url, host, primary, budget)): primary
+    }
+    secondary_started = False
+    hedge_at = None if hedge_delay is None else time.monotonic() + hedge_delay
+    fallback: Optional[Dict[str, Any]] = None
+    last_error: Optional[BaseException] = None
+
+    def start_secondary(reason: str) -> None:
+        nonlocal secondary_started
+        secondary_started = True
+        logger.info(f"OpenGraph {secondary} 호출 시작 ({reason}): host={host}")
+        tasks[asyncio.ensure_future(_fetch_variant(url, encoded_url, host, secondary, budget))] = secondary
+
+    try:
+        while tasks:
+            timeout = None
+            if not secondary_started and hedge_at is not None:
+                timeout = max(0.0, hedge_at - time.monotonic())
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                _stats["hedged"] += 1
+                start_secondary(f"{primary} 응답 지연")
+                continue
+
+            for task in done:
+                variant = tasks.pop(task)
+                try:
+                    data = task.result()
+                except Exception as e:
+                    # 오류 응답 본문은 _fetch_with_params에서 이미 기록됨
+                    last_error = e
+                    logger.warning(f"OpenGraph {variant} 호출 실패: host={host}, error={e!r}")
+                else:
+                    if _has_usable_metadata(data):
+                        if secondary_started and variant == secondary:
+                            _stats["secondary_wins"] += 1
+                            record_fallback("opengraph_secondary")
+                        return data
+                    logger.warning(f"OpenGraph {variant} 응답에 title/description이 없습니다: host={host}")
+                    fallback = fallback or data
+                if not secondary_started and (budget is None or not budget.expired()):
+                    start_secondary(f"{primary} 실패")
+    finally:
+        # 진 쪽 호출은 취소 (취소된 호출도 제한기 슬롯은 반납됨)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    if fallback is not None:
+        return fallback
+    raise last_error
+
+
+def get_opengraph_stats() -> Dict[str, Any]:
+    """
+    direct: OpenGraph.io 없이 페이지 <head>만으로 처리한 횟수
+    hedged: full 응답 지연으로 cheap 호출을 동시에 시작한 횟수
+    secondary_wins: 나중에 시작한 호출의 결과를 사용한 횟수
+    policy_cheap_first: 호스트 정책에 따라 cheap을 먼저 호출한 횟수
+    """
+    return {**_stats, "host_policy": get_host_policy().stats()}
 
 
 def _parse_html_metadata(html_content: str) -> Dict[str, Optional[str]]:
     """
-    HTML에서 메타 태그 직접 파싱 (간단한 버전)
-    
+    HTML에서 메타 태그 직접 파싱
+
     Args:
         html_content: HTML 문자열
-    
+
     Returns:
-        description, og:image, title을 포함한 딕셔너리
+        description, og:image, title, og:site_name을 포함한 딕셔너리
     """
-    import re
-    
-    result = {
-        'description': None,
-        'og:image': None,
-        'title': None,
-    }
-    
-    # og:description 추출
-    og_desc_match = re.search(r'<meta\s+property=["\']og:description["\']\s+content=["\']([^"\']+)["\']', html_content, re.IGNORECASE)
-    if og_desc_match:
-        result['description'] = og_desc_match.group(1)
-    else:
-        # 일반 description 메타 태그 추출
-        desc_match = re.search(r'<meta\s+name=["\']description["\']\s+content=["\']([^"\']+)["\']', html_content, re.IGNORECASE)
-        if desc_match:
-            result['description'] = desc_match.group(1)
-    
-    # og:image 추출
-    og_image_match = re.search(r'<meta\s+property=["\']og:image["\']\s+content=["\']([^"\']+)["\']', html_content, re.IGNORECASE)
-    if og_image_match:
-        result['og:image'] = og_image_match.group(1)
-    
-    # og:title 또는 title 추출
-    og_title_match = re.search(r'<meta\s+property=["\']og:title["\']\s+content=["\']([^"\']+)["\']', html_content, re.IGNORECASE)
-    if og_title_match:
-        result['title'] = og_title_match.group(1)
-    else:
-        title_match = re.search(r'<title>([^<]+)</title>', html_content, re.IGNORECASE)
-        if title_match:
-            result['title'] = title_match.group(1).strip()
-    
-    return result
-
+    return parse_head_metadata(html_content)
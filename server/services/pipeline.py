@@ -0,0 +1,95 @@
+"""추출 파이프라인용 스테이지 그래프 및 단계별 시간 측정"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Sequence
+
+from services.metrics import STAGE_SECONDS
+
+
+class StageTimer:
+    """요청 단위 단계별 소요 시간 기록 (요청 시작 시점 기준 ms, 단계별 히스토그램에도 반영)"""
+
+    def __init__(self):
+        self._origin = time.perf_counter()
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter())
+
+    def record(self, name: str, started: float, finished: float) -> None:
+        STAGE_SECONDS.observe(finished - started, stage=name)
+        self.stages[name] = {
+            'start_ms': round((started - self._origin) * 1000, 1),
+            'duration_ms': round((finished - started) * 1000, 1),
+        }
+
+    def elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self._origin) * 1000, 1)
+
+    def summary(self) -> Dict[str, float]:
+        """단계 이름 -> 소요 시간(ms), 전체 소요 시간은 'total'"""
+        result = {name: stage['duration_ms'] for name, stage in self.stages.items()}
+        result['total'] = self.elapsed_ms()
+        return result
+
+    def format(self) -> str:
+        return ', '.join(f"{name}={ms:.0f}ms" for name, ms in self.summary().items())
+
+
+class StageGraph:
+    """
+    의존 관계가 있는 비동기 스테이지 묶음.
+
+    add() 시점에 스테이지를 바로 Task로 시작하며, 각 스테이지는 의존 스테이지의 결과가
+    모두 준비되는 즉시 실행됩니다. 서로 의존하지 않는 스테이지는 동시에 진행됩니다.
+    """
+
+    def __init__(self, timer: Optional[StageTimer] = None):
+        self.timer = timer or StageTimer()
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        deps: Sequence[str] = (),
+    ) -> None:
+        """
+        스테이지 추가
+
+        Args:
+            name: 스테이지 이름 (시간 측정 키로도 사용)
+            func: 의존 스테이지 결과를 deps 순서대로 인자로 받는 코루틴 함수
+            deps: 먼저 끝나야 하는 스테이지 이름 목록 (이미 add된 스테이지여야 함)
+        """
+        dep_tasks = [self._tasks[dep] for dep in deps]
+
+        async def _run_stage() -> Any:
+            dep_results = [await task for task in dep_tasks]
+            with self.timer.span(name):
+                return await func(*dep_results)
+
+        self._tasks[name] = asyncio.ensure_future(_run_stage())
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        모든 스테이지 완료 대기 후 스테이지 이름 -> 결과 반환
+
+        한 스테이지라도 실패하면 남은 스테이지를 취소하고 예외를 그대로 전달합니다.
+        """
+        names = list(self._tasks)
+        try:
+            results = await asyncio.gather(*self._tasks.values())
+        except BaseException:
+            for task in self._tasks.values():
+                task.cancel()
+            # 취소된 스테이지 정리 (예외 회수)
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            raise
+        return dict(zip(names, results))
@@ -1,149 +1,459 @@
 """레시피 추출 메인 로직"""
-from typing import Dict, List, Any
+from typing import AsyncIterator, Dict, List, Any, Optional
+import asyncio
 import logging
 from urllib.parse import urlparse
-from services.opengraph_service import fetch_opengraph_data
-from services.gemini_service import extract_ingredients_with_gemini
-from firebase_config import get_food_data, save_recipe_to_firestore
+from services.opengraph_service import fetch_opengraph_data, get_opengraph_stats
+from services.gemini_batcher import extract_raw_ingredients, get_gemini_batcher
+from services.gemini_service import stream_raw_ingredients_with_gemini
+from services.json_stream import IncrementalJsonArrayParser
+from services.extraction_cache import canonicalize_url, get_extraction_cache
+from services.llm_cache import get_llm_cache
+from services.local_extractor import get_local_extractor
+from services.caption_preprocessor import get_caption_preprocessor
+from services.budget import BudgetExhausted, RequestBudget
+from services.single_flight import SingleFlight
+from services.pipeline import StageGraph, StageTimer
+from services.metrics import record_fallback
+from services.food_catalog import get_food_catalog
+from services.ingredient_matcher import IngredientMatcher, get_ingredient_matcher
+from config import settings
+from services.extraction_jobs import PRIORITIES, ExtractionJob, JobQueueFull, get_extraction_job_queue
+from firebase_config import (
+    complete_recipe_in_firestore_async,
+    mark_recipe_extraction_failed_async,
+    save_recipe_to_firestore_async,
+    save_recipes_batch_to_firestore_async,
+)
 
 logger = logging.getLogger(__name__)
 
+# 같은 게시물에 대한 동시 추출 요청을 하나의 OpenGraph/Gemini 호출로 합치기 위한 single-flight
+_content_flight = SingleFlight()
 
-async def extract_recipe(url: str, uid: str) -> Dict[str, Any]:
+
+# OpenGraph 실패 시 사용할 더미 데이터 (프론트엔드 디자인 작업용)
+_DUMMY_METADATA = {
+    'hybridGraph': {
+        'title': '닭다리살 배추 우동',
+        'description': '',
+        'image': 'https://images.unsplash.com/photo-1569718212165-3a2454018c15?w=200',
+        'site_name': 'Instagram',
+    },
+    'openGraph': {
+        'title': '닭다리살 배추 우동',
+        'image': 'https://images.unsplash.com/photo-1569718212165-3a2454018c15?w=200',
+        'site_name': 'instagram.com',
+    },
+    'title': '닭다리살 배추 우동',
+    'og:image': 'https://images.unsplash.com/photo-1569718212165-3a2454018c15?w=200',
+    'site_name': 'instagram.com',
+}
+
+
+async def _fetch_metadata(
+    url: str,
+    timer: StageTimer,
+    budget: Optional[RequestBudget] = None
+) -> Dict[str, Any]:
+    """
+    OpenGraph 메타데이터에서 title, thumbnail, source_name, 분석할 description 결정
+
+    Returns:
+        title, thumbnail, source_name, description, cacheable, pending을 포함한 딕셔너리.
+        더미 메타데이터로 대체한 경우 cacheable은 False.
+        메타데이터를 얻기 전에 예산이 떨어진 경우 빈 메타데이터에 pending=True (더미로 대체하지 않음)
+    """
+    cacheable = True
+
+    # 1. OpenGraph를 통해 메타데이터 추출
+    logger.info(f"1단계: OpenGraph 메타데이터 추출 시작 - {url}")
+    try:
+        with timer.span('opengraph'):
+            # 한 번의 느린 OpenGraph 호출이 예산을 다 써 버리지 않도록 Gemini 몫을 남겨 둠
+            og_budget = budget.reserve(settings.GEMINI_TIMEOUT_SECONDS) if budget is not None else None
+            metadata = await fetch_opengraph_data(url, og_budget)
+    except BudgetExhausted as og_error:
+        # 가짜 레시피가 저장되지 않도록 URL만 남기고 '추출 대기'로 표시
+        logger.warning(f"메타데이터 조회 중 예산이 떨어져 URL만 저장합니다: error={og_error}")
+        record_fallback("metadata_budget_exhausted")
+        return {
+            'title': '',
+            'thumbnail': '',
+            'source_name': '',
+            'description': '',
+            'cacheable': False,
+            'pending': True,
+        }
+    except Exception as og_error:
+        logger.warning(
+            f"OpenGraph 호출 실패, 더미 데이터로 대체합니다. (디자인 작업용) error={og_error}"
+        )
+        metadata = _DUMMY_METADATA
+        cacheable = False
+        record_fallback("dummy_metadata")
+    logger.info(
+        f"메타데이터 추출 완료: raw_title={metadata.get('title')}, "
+        f"has_hybridGraph={'hybridGraph' in metadata}, "
+        f"has_openGraph={'openGraph' in metadata}"
+    )
+    
+    # OpenGraph 응답 구조에 따라 title을 우선순위대로 조회
+    # 인스타그램의 경우 hybridGraph 내부에 본문이 들어오는 경우가 많음
+    hybrid = metadata.get('hybridGraph') or {}
+    open_graph = metadata.get('openGraph') or {}
+    title = (
+        hybrid.get('title')
+        or open_graph.get('title')
+        or metadata.get('title')
+        or '레시피'
+    )
+    logger.info(f"결정된 타이틀: {title}")
+    # OpenGraph 응답 구조에 따라 thumbnail(이미지 URL)을 우선순위대로 조회
+    # hybridGraph['image'] 또는 openGraph['image'] 사용, 없으면 루트 og:image
+    thumbnail = (
+        hybrid.get('image')
+        or open_graph.get('image')
+        or metadata.get('og:image')
+        or metadata.get('image')
+        or ''
+    )
+    if thumbnail:
+        logger.info(f"썸네일 이미지 URL 추출 완료: {thumbnail[:80]}...")
+    else:
+        logger.info("썸네일 이미지 URL을 찾지 못했습니다. 빈 문자열로 저장합니다.")
+    # source_name: site_name 또는 URL에서 도메인 추출
+    source_name = (
+        hybrid.get('site_name')
+        or open_graph.get('site_name')
+        or metadata.get('site_name')
+        or metadata.get('og:site_name')
+    )
+    if not source_name:
+        try:
+            parsed = urlparse(url)
+            source_name = parsed.netloc or parsed.path or ''
+            if source_name.startswith('www.'):
+                source_name = source_name[4:]
+        except Exception:
+            source_name = ''
+    source_name = source_name or ''
+    logger.info(f"source_name: {source_name}")
+    # OpenGraph 응답 구조에 따라 description을 우선순위대로 조회
+    description = (
+        metadata.get('hybridGraph', {}).get('description')
+        or metadata.get('openGraph', {}).get('description')
+        or metadata.get('description')
+        or ''
+    )
+    # 인스타그램 본문이 title에 몰려 있는 경우를 대비해 fallback 적용
+    if not description and title:
+        logger.info("description이 비어 있어 title 내용을 분석 본문으로 사용합니다.")
+        description = title
+
+    return {
+        'title': title,
+        'thumbnail': thumbnail,
+        'source_name': source_name,
+        'description': description,
+        'cacheable': cacheable,
+        'pending': False,
+    }
+
+
+def _extract_local_ingredients(
+    description: str,
+    matcher: IngredientMatcher,
+    timer: StageTimer
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    재료 목록이 정형화된 캡션이면 Gemini 없이 규칙 기반으로 원본 재료 추출
+
+    foodData 카탈로그 매칭 인덱스를 사전으로 사용하며,
+    신뢰도가 낮거나 비활성화된 경우 None (호출자가 Gemini로 넘김)
+    """
+    local_extractor = get_local_extractor()
+    if local_extractor is None:
+        return None
+
+    with timer.span('local_extract'):
+        extracted = local_extractor.extract(description, matcher)
+    if extracted is not None:
+        logger.info(f"규칙 기반 재료 추출 완료: {len(extracted)}개 재료 (Gemini 호출 생략)")
+    return extracted
+
+
+def _loaded_matcher() -> Optional[IngredientMatcher]:
+    """
+    이미 적재된 foodData 카탈로그의 매칭 인덱스 (적재 전이면 None)
+
+    TTL 갱신을 기다리지 않으므로 Firestore 호출 없이 바로 반환됩니다.
+    규칙 기반 추출의 신뢰도 판단용이라 갱신 직전의 카탈로그여도 충분하고,
+    최종 매칭은 catalog 단계에서 최신화한 인덱스로 수행합니다.
+    """
+    food_catalog = get_food_catalog()
+    if not food_catalog.is_loaded:
+        return None
+    return get_ingredient_matcher(food_catalog)
+
+
+async def _extract_with_gemini(
+    description: str,
+    timer: StageTimer,
+    budget: Optional[RequestBudget]
+) -> Optional[List[Dict[str, Any]]]:
+    """캡션을 전처리해 Gemini로 원본 재료 추출 (전처리 후 남은 본문이 없으면 빈 리스트)"""
+    caption = _prepare_caption(description, timer)
+    if not caption:
+        logger.warning("전처리 후 남은 본문이 없어 Gemini 호출을 건너뜁니다.")
+        return []
+    with timer.span('gemini'):
+        return await extract_raw_ingredients(caption, budget)
+
+
+async def _extract_raw_ingredients(
+    description: str,
+    timer: StageTimer,
+    budget: Optional[RequestBudget]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    규칙 기반 추출을 먼저 시도하고, 신뢰도가 낮으면 Gemini로 원본 재료 추출
+
+    카탈로그가 아직 적재되지 않았으면 적재를 기다리지 않고 Gemini 호출을 바로 시작하며,
+    적재가 먼저 끝나 규칙 기반 추출이 성공하면 Gemini 호출을 취소합니다.
+    (카탈로그 적재가 Gemini 호출 앞을 막지 않도록)
+    """
+    matcher = _loaded_matcher()
+    if matcher is not None or get_local_extractor() is None:
+        extracted = _extract_local_ingredients(description, matcher, timer) if matcher is not None else None
+        if extracted is not None:
+            return extracted
+        return await _extract_with_gemini(description, timer, budget)
+
+    gemini_task = asyncio.ensure_future(_extract_with_gemini(description, timer, budget))
+    matcher_task = asyncio.ensure_future(_load_matcher())
+    try:
+        await asyncio.wait((gemini_task, matcher_task), return_when=asyncio.FIRST_COMPLETED)
+        if not gemini_task.done() and not matcher_task.exception():
+            extracted = _extract_local_ingredients(description, matcher_task.result(), timer)
+            if extracted is not None:
+                gemini_task.cancel()
+                return extracted
+        return await gemini_task
+    finally:
+        gemini_task.cancel()
+        # catalog 단계도 같은 적재를 기다리므로 여기서는 결과만 버림
+        matcher_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+
+
+def _prepare_caption(description: str, timer: StageTimer) -> str:
+    """
+    Gemini에 보낼 텍스트로 캡션 전처리 (해시태그/멘션/이모지/홍보 문구 제거, 재료 구역 분리, 토큰 예산)
+
+    전처리가 비활성화되어 있으면 원문을 그대로 반환하고, 남은 텍스트가 없으면 빈 문자열
+    """
+    caption_preprocessor = get_caption_preprocessor()
+    if caption_preprocessor is None:
+        return description
+
+    with timer.span('preprocess'):
+        prepared = caption_preprocessor.prepare(description)
+    logger.info(
+        f"캡션 전처리: 추정 토큰 {prepared.tokens_before} -> {prepared.tokens_after}, "
+        f"재료 구역 분리={prepared.section_isolated}, 잘림={prepared.truncated}"
+    )
+    return prepared.text
+
+
+async def _extract_content(
+    url: str,
+    timer: Optional[StageTimer] = None,
+    budget: Optional[RequestBudget] = None
+) -> Dict[str, Any]:
+    """
+    URL에서 사용자와 무관한 레시피 콘텐츠 추출 (OpenGraph 메타데이터 + Gemini 원본 재료)
+
+    timer가 주어지면 opengraph, gemini 단계 소요 시간을 기록합니다.
+    budget이 주어지면 각 단계의 타임아웃을 남은 예산으로 줄이고, 재료 추출 전에 예산이 떨어지면
+    메타데이터만, 메타데이터 조회 중에 떨어지면 빈 메타데이터만 반환합니다. (ingredients_pending=True)
+
+    Returns:
+        title, thumbnail, source_name, raw_ingredients, ingredients_pending, cacheable을 포함한 딕셔너리.
+        더미 메타데이터로 대체했거나 Gemini 호출에 실패한 경우 cacheable은 False
+    """
+    timer = timer or StageTimer()
+    metadata = await _fetch_metadata(url, timer, budget)
+    description = metadata.pop('description')
+    cacheable = metadata.pop('cacheable')
+    # 메타데이터 단계에서 예산이 떨어진 경우 재료도 '추출 대기'
+    ingredients_pending = metadata.pop('pending')
+
+    # 2. 규칙 기반 추출 또는 Gemini를 사용하여 재료 추출 (foodData 매칭 전 원본)
+    logger.info("2단계: 재료 추출")
+    raw_ingredients: List[Dict[str, Any]] = []
+    if description:
+        extracted = await _extract_raw_ingredients(description, timer, budget)
+        if extracted is None:
+            cacheable = False
+            # 예산 소진으로 재료를 얻지 못한 경우 실패가 아니라 '추출 대기'로 표시
+            ingredients_pending = budget is not None and budget.expired()
+        else:
+            raw_ingredients = extracted
+        logger.info(f"재료 추출 완료: {len(raw_ingredients)}개 재료, 대기 여부={ingredients_pending}")
+    elif not ingredients_pending:
+        logger.warning("description이 없어 재료 추출을 건너뜁니다.")
+
+    return {
+        **metadata,
+        'raw_ingredients': raw_ingredients,
+        'ingredients_pending': ingredients_pending,
+        'cacheable': cacheable,
+    }
+
+
+async def _load_content(
+    url: str,
+    timer: Optional[StageTimer] = None,
+    budget: Optional[RequestBudget] = None
+) -> Dict[str, Any]:
+    """
+    URL 캐시를 확인하고, 없으면 콘텐츠를 추출해 캐시에 저장
+
+    같은 정규화 URL에 대한 동시 호출은 하나의 추출 작업에 합류하므로,
+    반환된 딕셔너리는 여러 요청이 공유합니다. (수정 금지)
+    합류한 요청은 먼저 시작한 요청의 예산(budget)으로 진행 중인 추출 결과를 함께 받습니다.
+    """
+    extraction_cache = get_extraction_cache()
+    content = await extraction_cache.get(url)
+    if content is not None:
+        logger.info(f"추출 캐시 적중: {url}")
+        return content
+
+    async def _extract_and_cache() -> Dict[str, Any]:
+        extracted = await _extract_content(url, timer, budget)
+        if extracted.pop('cacheable'):
+            await extraction_cache.set(url, extracted)
+        return extracted
+
+    return await _content_flight.do(canonicalize_url(url), _extract_and_cache)
+
+
+async def _load_matcher() -> IngredientMatcher:
+    """foodData 카탈로그 캐시를 최신화하고 현재 버전의 매칭 인덱스 반환"""
+    food_catalog = get_food_catalog()
+    await food_catalog.get_foods_async()
+    matcher = get_ingredient_matcher(food_catalog)
+    logger.info(f"foodData 로드 완료: {len(matcher)}개 항목, version={matcher.version}")
+    return matcher
+
+
+def warm_up_ingredient_matcher() -> IngredientMatcher:
+    """
+    foodData 카탈로그와 매칭 인덱스를 미리 적재 (동기)
+
+    멀티 워커 실행 시 워커를 띄우기 전에 상위 프로세스에서 한 번 호출하면 공유 캐시에
+    스냅샷과 인덱스가 저장되어, 각 워커는 Firestore 조회와 인덱스 빌드 없이 읽어서 시작합니다.
+    """
+    food_catalog = get_food_catalog()
+    food_catalog.get_foods()
+    matcher = get_ingredient_matcher(food_catalog)
+    logger.info(f"foodData 미리 적재 완료: {len(matcher)}개 항목, version={matcher.version}")
+    return matcher
+
+
+def get_extraction_stats() -> Dict[str, Any]:
+    """추출 캐시, LLM 응답 캐시, 규칙 기반 추출, OpenGraph 헤징 및 single-flight 합류 통계"""
+    local_extractor = get_local_extractor()
+    caption_preprocessor = get_caption_preprocessor()
+    return {
+        'cache': get_extraction_cache().stats(),
+        'llm_cache': get_llm_cache().stats(),
+        'local_extractor': local_extractor.stats() if local_extractor else {'enabled': False},
+        'caption_preprocessor': caption_preprocessor.stats() if caption_preprocessor else {'enabled': False},
+        'single_flight': _content_flight.stats(),
+        'gemini_batcher': get_gemini_batcher().stats(),
+        'opengraph': get_opengraph_stats(),
+    }
+
+
+async def extract_recipe(
+    url: str,
+    uid: str,
+    budget: Optional[RequestBudget] = None,
+    document_id: Optional[str] = None
+) -> Dict[str, Any]:
     """
     레시피 URL에서 정보를 추출하고 Firestore에 저장
     
+    같은 게시물(정규화 URL 기준)의 콘텐츠가 캐시에 있거나 다른 요청이 추출 중이면
+    OpenGraph/Gemini 호출 없이 재료 매칭과 사용자별 recipeLog 저장만 수행합니다.
+    
     Args:
         url: 레시피 URL
         uid: 사용자 ID
+        budget: 요청 시간 예산. 재료 추출 전에 예산이 떨어지면 메타데이터만(메타데이터 조회 중이면 URL만)
+            저장하고 재료는 '추출 대기'(ingredients_status='pending')로 표시합니다.
+        document_id: 'extracting' 상태로 먼저 만들어 둔 recipeLog 문서 ID (백그라운드 작업용).
+            주어지면 새 문서를 만들지 않고 이 문서를 추출 결과로 채웁니다.
     
     Returns:
         저장된 문서 ID와 추출된 재료 리스트를 포함한 딕셔너리
     """
-    # OpenGraph 실패 시 사용할 더미 데이터 (프론트엔드 디자인 작업용)
-    DUMMY_METADATA = {
-        'hybridGraph': {
-            'title': '닭다리살 배추 우동',
-            'description': '',
-            'image': 'https://images.unsplash.com/photo-1569718212165-3a2454018c15?w=200',
-            'site_name': 'Instagram',
-        },
-        'openGraph': {
-            'title': '닭다리살 배추 우동',
-            'image': 'https://images.unsplash.com/photo-1569718212165-3a2454018c15?w=200',
-            'site_name': 'instagram.com',
-        },
-        'title': '닭다리살 배추 우동',
-        'og:image': 'https://images.unsplash.com/photo-1569718212165-3a2454018c15?w=200',
-        'site_name': 'instagram.com',
-    }
-
+    timer = StageTimer()
     try:
-        # 1. OpenGraph를 통해 메타데이터 추출
-        logger.info(f"1단계: OpenGraph 메타데이터 추출 시작 - {url}")
-        try:
-            metadata = await fetch_opengraph_data(url)
-        except Exception as og_error:
-            logger.warning(
-                f"OpenGraph 호출 실패, 더미 데이터로 대체합니다. (디자인 작업용) error={og_error}"
-            )
-            metadata = DUMMY_METADATA
-        logger.info(
-            f"메타데이터 추출 완료: raw_title={metadata.get('title')}, "
-            f"has_hybridGraph={'hybridGraph' in metadata}, "
-            f"has_openGraph={'openGraph' in metadata}"
-        )
+        # 콘텐츠 추출(OpenGraph → Gemini)과 foodData 카탈로그 적재는 서로 독립적이므로 동시에 시작하고,
+        # 매칭은 두 결과가 모두 준비되는 즉시, 저장은 매칭이 끝나는 즉시 실행
+        graph = StageGraph(timer)
         
-        # OpenGraph 응답 구조에 따라 title을 우선순위대로 조회
-        # 인스타그램의 경우 hybridGraph 내부에 본문이 들어오는 경우가 많음
-        hybrid = metadata.get('hybridGraph') or {}
-        open_graph = metadata.get('openGraph') or {}
-        title = (
-            hybrid.get('title')
-            or open_graph.get('title')
-            or metadata.get('title')
-            or '레시피'
-        )
-        logger.info(f"결정된 타이틀: {title}")
-        # OpenGraph 응답 구조에 따라 thumbnail(이미지 URL)을 우선순위대로 조회
-        # hybridGraph['image'] 또는 openGraph['image'] 사용, 없으면 루트 og:image
-        thumbnail = (
-            hybrid.get('image')
-            or open_graph.get('image')
-            or metadata.get('og:image')
-            or metadata.get('image')
-            or ''
-        )
-        if thumbnail:
-            logger.info(f"썸네일 이미지 URL 추출 완료: {thumbnail[:80]}...")
-        else:
-            logger.info("썸네일 이미지 URL을 찾지 못했습니다. 빈 문자열로 저장합니다.")
-        # source_name: site_name 또는 URL에서 도메인 추출
-        source_name = (
-            hybrid.get('site_name')
-            or open_graph.get('site_name')
-            or metadata.get('site_name')
-            or metadata.get('og:site_name')
-        )
-        if not source_name:
-            try:
-                parsed = urlparse(url)
-                source_name = parsed.netloc or parsed.path or ''
-                if source_name.startswith('www.'):
-                    source_name = source_name[4:]
-            except Exception:
-                source_name = ''
-        source_name = source_name or ''
-        logger.info(f"source_name: {source_name}")
-        # OpenGraph 응답 구조에 따라 description을 우선순위대로 조회
-        description = (
-            metadata.get('hybridGraph', {}).get('description')
-            or metadata.get('openGraph', {}).get('description')
-            or metadata.get('description')
-            or ''
-        )
-        # 인스타그램 본문이 title에 몰려 있는 경우를 대비해 fallback 적용
-        if not description and title:
-            logger.info("description이 비어 있어 title 내용을 분석 본문으로 사용합니다.")
-            description = title
+        # 1~2. 콘텐츠 추출 (URL 캐시 → 진행 중인 동일 추출 합류 → 새 추출)
+        graph.add('content', lambda: _load_content(url, timer, budget))
         
-        # 2. foodData 컬렉션에서 표준 음식 데이터 가져오기
-        logger.info("2단계: foodData 컬렉션에서 음식 데이터 가져오기")
-        food_data = get_food_data()
-        logger.info(f"foodData 로드 완료: {len(food_data)}개 항목")
+        # 3. foodData 카탈로그 캐시에서 매칭 인덱스 준비
+        graph.add('catalog', _load_matcher)
         
-        # 3. Gemini를 사용하여 재료 추출 및 표준화
-        logger.info("3단계: Gemini를 통한 재료 추출 및 표준화")
-        ai_extracted_ingredients = []
-        if description:
-            ai_extracted_ingredients = extract_ingredients_with_gemini(
-                description,
-                food_data
-            )
-            logger.info(f"재료 추출 완료: {len(ai_extracted_ingredients)}개 재료")
-        else:
-            logger.warning("description이 없어 재료 추출을 건너뜁니다.")
+        # 4. 카탈로그 매칭으로 재료 표준화
+        async def _match(content: Dict[str, Any], matcher: IngredientMatcher) -> List[Dict[str, Any]]:
+            ingredients = matcher.match_ingredients(content['raw_ingredients'])
+            logger.info(f"재료 표준화 완료: {len(ingredients)}개 재료")
+            return ingredients
         
-        # 4. Firestore에 저장
-        logger.info("4단계: Firestore에 레시피 저장")
-        doc_id = save_recipe_to_firestore(
-            uid=uid,
-            original_url=url,
-            title=title,
-            thumbnail=thumbnail,
-            source_name=source_name,
-            ai_extracted_ingredients=ai_extracted_ingredients,
-            final_ingredients=None  # 초기값은 ai_extracted_ingredients와 동일
-        )
-        logger.info(f"Firestore 저장 완료: document_id={doc_id}")
+        graph.add('match', _match, deps=('content', 'catalog'))
+        
+        # 5. Firestore에 저장
+        async def _save(content: Dict[str, Any], ai_extracted_ingredients: List[Dict[str, Any]]) -> str:
+            recipe = {
+                'uid': uid,
+                'original_url': url,
+                'title': content['title'],
+                'thumbnail': content['thumbnail'],
+                'source_name': content['source_name'],
+                'ai_extracted_ingredients': ai_extracted_ingredients,
+                'final_ingredients': None,  # 초기값은 ai_extracted_ingredients와 동일
+                'ingredients_status': 'pending' if content.get('ingredients_pending') else 'complete',
+            }
+            if document_id:
+                await complete_recipe_in_firestore_async(document_id=document_id, **recipe)
+                doc_id = document_id
+            else:
+                doc_id = await save_recipe_to_firestore_async(**recipe)
+            logger.info(f"Firestore 저장 완료: document_id={doc_id}")
+            return doc_id
+        
+        graph.add('save', _save, deps=('content', 'match'))
+        
+        results = await graph.run()
+        content = results['content']
+        logger.info(f"레시피 추출 단계별 소요 시간: {timer.format()}")
         
         return {
             'success': True,
-            'document_id': doc_id,
-            'title': title,
-            'thumbnail': thumbnail,
-            'source_name': source_name,
-            'ingredients': ai_extracted_ingredients,
+            'document_id': results['save'],
+            'title': content['title'],
+            'thumbnail': content['thumbnail'],
+            'source_name': content['source_name'],
+            'ingredients': results['match'],
+            'ingredients_pending': bool(content.get('ingredients_pending')),
+            'timings': timer.summary(),
         }
         
     except Exception as e:
@@ -155,3 +465,275 @@ async def extract_recipe(url: str, uid: str) -> Dict[str, Any]:
             'error': str(e),
         }
 
+
+async def submit_extraction_job(url: str, uid: str, priority: str = 'normal') -> str:
+    """
+    recipeLog 문서를 'extracting' 상태로 바로 만들고 추출은 백그라운드 작업 큐에 넘깁니다.
+
+    작업 워커가 추출을 마치면 같은 문서를 결과로 채워 'planned'로 바꾸고,
+    재시도 후에도 실패하면 'failed'로 바꿉니다. (앱은 Firestore 문서 변경으로 결과를 받음)
+
+    Returns:
+        만든 recipeLog 문서 ID (작업 ID)
+
+    Raises:
+        JobQueueFull: 대기 중인 작업이 너무 많은 경우
+    """
+    queue = get_extraction_job_queue()
+    if queue is None or not queue.has_capacity():
+        raise JobQueueFull("추출 대기 작업이 가득 찼습니다.")
+
+    document_id = await save_recipe_to_firestore_async(
+        uid=uid,
+        original_url=url,
+        title='',
+        thumbnail='',
+        source_name='',
+        ai_extracted_ingredients=[],
+        ingredients_status='pending',
+        status='extracting',
+    )
+    try:
+        await queue.submit(ExtractionJob(job_id=document_id, uid=uid, url=url, priority=PRIORITIES[priority]))
+    except JobQueueFull as e:
+        # 문서를 만드는 사이 대기열이 찬 경우: 'extracting'으로 남지 않도록 실패로 표시
+        await mark_recipe_extraction_failed_async(uid, document_id, str(e))
+        raise
+    logger.info(f"추출 작업 등록: document_id={document_id}, priority={priority}")
+    return document_id
+
+
+async def run_extraction_job(job: ExtractionJob) -> None:
+    """작업 큐 워커가 호출하는 추출 작업 (실패하면 예외를 던져 재시도하게 함)"""
+    logger.info(f"추출 작업 시작: document_id={job.job_id}, url={job.url}, attempt={job.attempts}")
+    result = await extract_recipe(job.url, job.uid, document_id=job.job_id)
+    if not result.get('success'):
+        raise RuntimeError(result.get('error') or '레시피 추출 실패')
+
+
+async def fail_extraction_job(job: ExtractionJob, error: str) -> None:
+    """재시도 후에도 실패한 작업의 recipeLog 문서를 'failed'로 표시"""
+    await mark_recipe_extraction_failed_async(job.uid, job.job_id, error)
+
+
+async def extract_recipe_stream(
+    url: str,
+    uid: str,
+    budget: Optional[RequestBudget] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    레시피를 추출하면서 진행 상황을 이벤트로 하나씩 반환 (/extract/stream용)
+
+    이벤트 종류:
+        - metadata: title, thumbnail, source_name이 결정되는 즉시
+        - ingredient: Gemini 스트리밍 응답에서 재료 객체가 닫히고 foodData와 매칭되는 즉시
+        - done: Firestore 저장 후 document_id, 전체 ingredients, ingredients_pending, timings
+        - error: 오류 메시지
+
+    URL 캐시에 있으면 캐시된 원본 재료로 같은 이벤트를 만들어 반환하며,
+    스트림이 끝까지 완성된 경우에만 결과를 캐시에 저장합니다.
+    budget이 떨어지면 그때까지 받은 재료만 저장하고 ingredients_pending=True로 표시합니다.
+    """
+    timer = StageTimer()
+
+    async def _timed_load_matcher() -> IngredientMatcher:
+        with timer.span('catalog'):
+            return await _load_matcher()
+
+    # 카탈로그 적재는 메타데이터 추출과 동시에 시작
+    matcher_task = asyncio.ensure_future(_timed_load_matcher())
+    try:
+        extraction_cache = get_extraction_cache()
+        content = await extraction_cache.get(url)
+        ai_extracted_ingredients: List[Dict[str, Any]] = []
+        ingredients_pending = False
+
+        if content is not None:
+            logger.info(f"추출 캐시 적중: {url}")
+            yield {
+                'type': 'metadata',
+                'title': content['title'],
+                'thumbnail': content['thumbnail'],
+                'source_name': content['source_name'],
+            }
+            matcher = await matcher_task
+            for ingredient in matcher.match_ingredients(content['raw_ingredients']):
+                ai_extracted_ingredients.append(ingredient)
+                yield {'type': 'ingredient', 'ingredient': ingredient}
+        else:
+            metadata = await _fetch_metadata(url, timer, budget)
+            description = metadata.pop('description')
+            cacheable = metadata.pop('cacheable')
+            ingredients_pending = metadata.pop('pending')
+            yield {'type': 'metadata', **metadata}
+
+            raw_ingredients: List[Dict[str, Any]] = []
+            # 스트리밍은 재료가 닫힐 때마다 매칭하므로 어차피 catalog 적재를 기다려야 함:
+            # 적재가 끝난 뒤 같은 인덱스로 규칙 기반 추출을 시도
+            matcher = await matcher_task if description else None
+            local_ingredients = (
+                _extract_local_ingredients(description, matcher, timer) if description else None
+            )
+            caption = (
+                _prepare_caption(description, timer) if description and local_ingredients is None else ''
+            )
+            if local_ingredients is not None:
+                raw_ingredients = local_ingredients
+                for ingredient in matcher.match_ingredients(raw_ingredients):
+                    ai_extracted_ingredients.append(ingredient)
+                    yield {'type': 'ingredient', 'ingredient': ingredient}
+            elif caption:
+                parser = IncrementalJsonArrayParser()
+                with timer.span('gemini'):
+                    async for raw in stream_raw_ingredients_with_gemini(caption, parser, budget):
+                        raw_ingredients.append(raw)
+                        for ingredient in matcher.match_ingredients([raw]):
+                            ai_extracted_ingredients.append(ingredient)
+                            yield {'type': 'ingredient', 'ingredient': ingredient}
+                logger.info(
+                    f"스트리밍 재료 추출 완료: {len(raw_ingredients)}개 재료, 응답 완결 여부={parser.finished}"
+                )
+                # 응답이 끊긴 경우 완성된 재료까지만 사용하고 캐시에는 저장하지 않음
+                cacheable = cacheable and parser.finished
+                ingredients_pending = not parser.finished and budget is not None and budget.expired()
+            elif not ingredients_pending:
+                logger.warning("description이 없거나 전처리 후 남은 본문이 없어 재료 추출을 건너뜁니다.")
+
+            content = {**metadata, 'raw_ingredients': raw_ingredients}
+            if cacheable:
+                await extraction_cache.set(url, content)
+
+        with timer.span('save'):
+            doc_id = await save_recipe_to_firestore_async(
+                uid=uid,
+                original_url=url,
+                title=content['title'],
+                thumbnail=content['thumbnail'],
+                source_name=content['source_name'],
+                ai_extracted_ingredients=ai_extracted_ingredients,
+                final_ingredients=None,  # 초기값은 ai_extracted_ingredients와 동일
+                ingredients_status='pending' if ingredients_pending else 'complete',
+            )
+        logger.info(f"Firestore 저장 완료: document_id={doc_id}, 단계별 소요 시간: {timer.format()}")
+
+        yield {
+            'type': 'done',
+            'success': True,
+            'document_id': doc_id,
+            'ingredients': ai_extracted_ingredients,
+            'ingredients_pending': ingredients_pending,
+            'timings': timer.summary(),
+        }
+
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        logger.error(f"레시피 스트리밍 추출 중 오류 발생:\n{error_trace}")
+        yield {'type': 'error', 'success': False, 'error': str(e)}
+    finally:
+        if not matcher_task.done():
+            matcher_task.cancel()
+
+
+async def extract_recipes_batch(urls: List[str], uid: str) -> Dict[str, Any]:
+    """
+    여러 레시피 URL을 한 번에 추출하고 users/{uid}/recipeLog에 일괄 저장
+
+    - 콘텐츠 추출은 BATCH_EXTRACT_CONCURRENCY개까지 동시에 진행 (같은 게시물은 하나로 합류)
+    - foodData 카탈로그 스냅샷과 매칭 인덱스는 배치 전체에서 한 번만 준비
+    - Firestore 저장은 WriteBatch로 묶어 커밋
+
+    Args:
+        urls: 레시피 URL 리스트
+        uid: 사용자 ID
+
+    Returns:
+        항목별 결과 리스트(results)와 단계별 소요 시간(timings)을 포함한 딕셔너리
+    """
+    timer = StageTimer()
+    try:
+        graph = StageGraph(timer)
+        semaphore = asyncio.Semaphore(settings.BATCH_EXTRACT_CONCURRENCY)
+
+        async def _content_for(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await _load_content(url)
+
+        # 1~2. 항목별 콘텐츠 추출 (항목 단위 실패는 결과에만 기록)
+        async def _contents() -> List[Any]:
+            return await asyncio.gather(*[_content_for(url) for url in urls], return_exceptions=True)
+
+        graph.add('content', _contents)
+
+        # 3. 배치 전체가 공유할 카탈로그 스냅샷 및 매칭 인덱스
+        graph.add('catalog', _load_matcher)
+
+        # 4. 재료 표준화
+        async def _match(contents: List[Any], matcher: IngredientMatcher) -> List[Optional[List[Dict[str, Any]]]]:
+            return [
+                None if isinstance(content, BaseException) else matcher.match_ingredients(content['raw_ingredients'])
+                for content in contents
+            ]
+
+        graph.add('match', _match, deps=('content', 'catalog'))
+
+        # 5. 성공한 항목만 WriteBatch로 일괄 저장
+        async def _save(contents: List[Any], matched: List[Optional[List[Dict[str, Any]]]]) -> List[Optional[str]]:
+            indexes = [i for i, ingredients in enumerate(matched) if ingredients is not None]
+            if not indexes:
+                return [None] * len(urls)
+            doc_ids = await save_recipes_batch_to_firestore_async(uid, [
+                {
+                    'original_url': urls[i],
+                    'title': contents[i]['title'],
+                    'thumbnail': contents[i]['thumbnail'],
+                    'source_name': contents[i]['source_name'],
+                    'ai_extracted_ingredients': matched[i],
+                }
+                for i in indexes
+            ])
+            result: List[Optional[str]] = [None] * len(urls)
+            for i, doc_id in zip(indexes, doc_ids):
+                result[i] = doc_id
+            return result
+
+        graph.add('save', _save, deps=('content', 'match'))
+
+        stage_results = await graph.run()
+
+        results = []
+        for url, content, ingredients, doc_id in zip(
+            urls, stage_results['content'], stage_results['match'], stage_results['save']
+        ):
+            if isinstance(content, BaseException):
+                logger.warning(f"배치 항목 추출 실패: url={url}, error={content}")
+                results.append({'url': url, 'success': False, 'error': str(content)})
+                continue
+            results.append({
+                'url': url,
+                'success': True,
+                'document_id': doc_id,
+                'title': content['title'],
+                'thumbnail': content['thumbnail'],
+                'source_name': content['source_name'],
+                'ingredients': ingredients,
+            })
+
+        logger.info(
+            f"배치 추출 완료: {sum(1 for r in results if r['success'])}/{len(urls)}개 성공, "
+            f"단계별 소요 시간: {timer.format()}"
+        )
+        return {
+            'success': True,
+            'results': results,
+            'timings': timer.summary(),
+        }
+
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        logger.error(f"배치 레시피 추출 중 오류 발생:\n{error_trace}")
+        return {
+            'success': False,
+            'error': str(e),
+        }
@@ -0,0 +1,98 @@
+"""요청 ID를 contextvar로 전파해 모든 로그 줄에 붙이는 로깅 설정과 요청 단위 ASGI 미들웨어"""
+import contextvars
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from services.metrics import HTTP_REQUEST_SECONDS
+
+# 요청 밖(서버 시작, 백그라운드 정리 등)에서 남긴 로그는 '-'
+_request_id: contextvars.ContextVar[str] = contextvars.ContextVar('request_id', default='-')
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s'
+
+REQUEST_ID_HEADER = 'x-request-id'
+# 클라이언트가 보낸 요청 ID는 이 길이까지만 사용
+_MAX_REQUEST_ID_LENGTH = 64
+
+
+def new_request_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def get_request_id() -> str:
+    return _request_id.get()
+
+
+def set_request_id(request_id: Optional[str] = None) -> contextvars.Token:
+    """
+    현재 컨텍스트의 요청 ID 설정 (없으면 새로 생성)
+
+    asyncio Task는 생성 시점의 컨텍스트를 복사하므로 요청 처리 중에 만든 스테이지 Task에도 같은 ID가 붙습니다.
+    """
+    return _request_id.set(request_id or new_request_id())
+
+
+def reset_request_id(token: contextvars.Token) -> None:
+    _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """로그 레코드에 request_id 속성 추가"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return True
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    """루트 로거 설정: 모든 핸들러가 요청 ID를 포함한 형식으로 출력"""
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+    request_filter = RequestIdFilter()
+    for handler in logging.getLogger().handlers:
+        if not any(isinstance(f, RequestIdFilter) for f in handler.filters):
+            handler.addFilter(request_filter)
+
+
+class RequestContextMiddleware:
+    """
+    요청마다 요청 ID를 정하고(X-Request-ID 헤더가 있으면 그대로 사용) 응답 헤더로 돌려주며,
+    스트리밍 응답 본문이 끝날 때까지의 처리 시간을 경로별 히스토그램에 기록하는 ASGI 미들웨어.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]]):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get('headers') or []:
+            if name == REQUEST_ID_HEADER.encode():
+                request_id = value.decode('latin-1').strip()[:_MAX_REQUEST_ID_LENGTH] or None
+                break
+        token = set_request_id(request_id)
+        header_value = get_request_id().encode('latin-1')
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                message.setdefault('headers', [])
+                message['headers'] = list(message['headers']) + [(REQUEST_ID_HEADER.encode(), header_value)]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            # 라우터가 매칭한 요청에만 scope['endpoint']가 채워짐. 404 경로는 레이블 수가 늘지 않도록 'other'로 묶음
+            path = scope.get('path', '') if 'endpoint' in scope else 'other'
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=scope.get('method', ''), path=path, status=str(status)
+            )
+            reset_request_id(token)
@@ -0,0 +1,126 @@
+"""여러 워커 프로세스가 함께 쓰는 로컬 SQLite 기반 공유 캐시 계층"""
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from config import settings
+from services.extraction_cache import resolve_cache_path
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCacheStore:
+    """
+    키별로 (revision, 값)을 저장하는 프로세스 간 공유 저장소.
+
+    값은 pickle로 직렬화합니다. 이 서버가 직접 쓴 로컬 파일만 읽으므로 외부 입력을
+    역직렬화하지 않습니다. revision은 set()마다 1씩 증가하므로, 읽는 쪽은 revision만 조회해
+    (값을 읽지 않고) 다른 프로세스가 갱신했는지 확인할 수 있습니다.
+
+    WAL 모드라 읽기는 쓰기와 동시에 진행되며, try_lock()은 여러 프로세스 중 하나만
+    Firestore 조회 같은 비싼 갱신을 하도록 만료 시간이 있는 잠금을 제공합니다.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._owner = f"{os.getpid()}:{id(self)}"
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY,'
+            ' revision INTEGER NOT NULL,'
+            ' value BLOB NOT NULL,'
+            ' updated_at REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS locks ('
+            ' name TEXT PRIMARY KEY,'
+            ' owner TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL)'
+        )
+        self._conn.commit()
+
+    def revision(self, key: str) -> Optional[Tuple[int, float]]:
+        """(revision, 저장 시각(time.time)) 반환 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT revision, updated_at FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def get(self, key: str) -> Optional[Tuple[int, Any]]:
+        """(revision, 값) 반환 (없거나 읽을 수 없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT revision, value FROM entries WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return row[0], pickle.loads(row[1])
+        except Exception as e:
+            # 코드 버전이 바뀌어 예전 값을 읽을 수 없는 경우 등은 미스로 처리
+            logger.warning(f"공유 캐시 값 역직렬화 실패: key={key}, error={e}")
+            return None
+
+    def set(self, key: str, value: Any, revision: Optional[int] = None) -> int:
+        """
+        값을 저장하고 새 revision 반환
+
+        revision을 주면 그 값으로 저장하고(다른 키의 revision에 맞출 때), 없으면 기존 값 + 1
+        """
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if revision is None:
+                row = self._conn.execute('SELECT revision FROM entries WHERE key = ?', (key,)).fetchone()
+                revision = (row[0] if row else 0) + 1
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries (key, revision, value, updated_at) VALUES (?, ?, ?, ?)',
+                (key, revision, payload, time.time()),
+            )
+            self._conn.commit()
+        return revision
+
+    def try_lock(self, name: str, ttl_seconds: float) -> bool:
+        """잠금을 얻으면 True (이미 다른 프로세스가 잡고 있고 만료 전이면 False)"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT INTO locks (name, owner, expires_at) VALUES (?, ?, ?)'
+                ' ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at'
+                ' WHERE locks.owner = excluded.owner OR locks.expires_at <= ?',
+                (name, self._owner, now + ttl_seconds, now),
+            )
+            self._conn.commit()
+            return cursor.rowcount > 0
+
+    def unlock(self, name: str) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM locks WHERE name = ? AND owner = ?', (name, self._owner))
+            self._conn.commit()
+
+
+_shared_cache: Optional[SharedCacheStore] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> Optional[SharedCacheStore]:
+    """프로세스 전역 공유 캐시 반환 (SHARED_CACHE_ENABLED=false면 None)"""
+    global _shared_cache
+
+    if not settings.SHARED_CACHE_ENABLED:
+        return None
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SharedCacheStore(resolve_cache_path(settings.SHARED_CACHE_PATH))
+    return _shared_cache
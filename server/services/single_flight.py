@@ -0,0 +1,55 @@
+"""동일 키에 대한 동시 요청을 하나의 upstream 호출로 합치는 single-flight 유틸리티"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar('T')
+
+
+class SingleFlight:
+    """
+    같은 키로 동시에 들어온 호출을 하나의 작업에 합류시킵니다.
+
+    처음 들어온 호출이 작업(Task)을 만들고, 작업이 끝나기 전에 같은 키로 들어온 호출은
+    새 upstream 호출 없이 같은 결과(또는 예외)를 받습니다.
+    작업은 호출자와 분리된 Task로 실행되므로, 먼저 들어온 호출자의 연결이 끊겨 취소되더라도
+    합류한 다른 호출자들의 작업은 계속 진행됩니다.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.leaders = 0
+        self.joined = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        key에 대한 작업이 진행 중이면 합류하고, 없으면 func()로 새 작업을 시작
+
+        반환값은 합류한 모든 호출자가 공유하므로 수정하지 마세요.
+        """
+        task = self._in_flight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(func())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t, key=key: self._on_done(key, t))
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        leaders: 실제로 실행된 upstream 작업 수
+        joined: 진행 중인 작업에 합류해 절약된 upstream 호출 수
+        """
+        return {
+            'in_flight': len(self._in_flight),
+            'leaders': self.leaders,
+            'joined': self.joined,
+        }
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # 모든 호출자가 먼저 취소된 경우에도 "예외가 회수되지 않음" 경고가 남지 않도록 확인
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,206 @@
+"""
+서버 시작 직후 Firebase, 외부 HTTP 커넥션, foodData 카탈로그를 미리 준비하고 준비 상태를 관리
+
+lifespan에서 백그라운드로 시작하므로 서버는 곧바로 요청을 받을 수 있고(/ 헬스 체크는 바로 200),
+모든 단계가 끝나야 /ready가 200을 반환합니다. 로드 밸런서는 /ready만 보고 트래픽을 보내므로
+첫 사용자 요청이 Firebase 초기화, TLS 핸드셰이크, 카탈로그 적재를 떠안지 않습니다.
+실패한 단계는 STARTUP_WARMUP_RETRY_SECONDS마다 다시 시도하고, 그동안 /ready는 503입니다.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+import firebase_config
+from config import settings
+from services.http_clients import warm_up_http_clients
+from services.metrics import record_startup_step
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WarmupStep:
+    """준비 단계 하나 (depends_on의 단계가 모두 끝난 뒤 실행)"""
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    depends_on: Sequence[str] = ()
+    status: str = 'pending'  # pending, running, done, failed
+    attempts: int = 0
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    result: Any = field(default=None, repr=False)
+
+
+class StartupWarmup:
+    """준비 단계를 의존 관계 순서대로(독립 단계는 동시에) 실행하고 준비 완료 여부를 보관"""
+
+    def __init__(self, steps: Sequence[WarmupStep], retry_seconds: float, import_seconds: Optional[float] = None):
+        self._steps: Dict[str, WarmupStep] = {step.name: step for step in steps}
+        self._retry_seconds = retry_seconds
+        self._import_seconds = import_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._started_at: Optional[float] = None
+        self._ready_after: Optional[float] = None
+        self._ready = False
+        self._stopping = False
+
+    @property
+    def ready(self) -> bool:
+        return self._ready and not self._stopping
+
+    def start(self) -> None:
+        """준비 단계를 백그라운드 작업으로 시작 (서버 lifespan에서 호출)"""
+        self._started_at = time.perf_counter()
+        if not self._steps:
+            self._mark_ready()
+            return
+        self._task = asyncio.create_task(self._run(), name="startup-warmup")
+
+    async def stop(self) -> None:
+        """
+        종료 시작 시 호출: /ready를 즉시 503으로 바꿔 로드 밸런서가 새 트래픽을 보내지 않게 하고,
+        아직 진행 중인 준비 작업은 취소
+        """
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def status(self) -> Dict[str, Any]:
+        """/ready 응답 본문 (단계별 상태, 소요 시간, 시도 횟수, 마지막 오류)"""
+        return {
+            "ready": self.ready,
+            "stopping": self._stopping,
+            "import_ms": round(self._import_seconds * 1000, 1) if self._import_seconds is not None else None,
+            "ready_after_ms": round(self._ready_after * 1000, 1) if self._ready_after is not None else None,
+            "steps": {
+                step.name: {
+                    "status": step.status,
+                    "attempts": step.attempts,
+                    "duration_ms": step.duration_ms,
+                    "error": step.error,
+                }
+                for step in self._steps.values()
+            },
+        }
+
+    # ---------- 내부 구현 ----------
+
+    async def _run(self) -> None:
+        while True:
+            # 의존 단계가 끝난 대기 단계를 더 실행할 게 없을 때까지 동시에 실행
+            while True:
+                runnable = self._runnable()
+                if not runnable:
+                    break
+                await asyncio.gather(*(self._run_step(step) for step in runnable))
+
+            unfinished = [step for step in self._steps.values() if step.status != 'done']
+            if not unfinished:
+                self._mark_ready()
+                return
+            logger.warning(
+                f"서버 준비 미완료: {', '.join(f'{step.name}({step.status})' for step in unfinished)} "
+                f"- {self._retry_seconds}초 후 다시 시도"
+            )
+            await asyncio.sleep(self._retry_seconds)
+            for step in unfinished:
+                if step.status == 'failed':
+                    step.status = 'pending'
+
+    def _runnable(self) -> List[WarmupStep]:
+        return [
+            step for step in self._steps.values()
+            if step.status == 'pending'
+            and all(self._steps[name].status == 'done' for name in step.depends_on if name in self._steps)
+        ]
+
+    async def _run_step(self, step: WarmupStep) -> None:
+        step.status = 'running'
+        step.attempts += 1
+        started = time.perf_counter()
+        try:
+            step.result = await step.run()
+            step.status = 'done'
+            step.error = None
+        except Exception as e:
+            step.status = 'failed'
+            step.error = str(e)
+            logger.warning(f"서버 준비 단계 실패: step={step.name}, attempt={step.attempts}, error={e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            step.duration_ms = round(elapsed * 1000, 1)
+        if step.status == 'done':
+            record_startup_step(step.name, elapsed)
+            logger.info(f"서버 준비 단계 완료: step={step.name}, {step.duration_ms}ms")
+
+    def _mark_ready(self) -> None:
+        self._ready = True
+        self._ready_after = time.perf_counter() - self._started_at
+        record_startup_step('ready', self._ready_after)
+        logger.info(f"서버 준비 완료: {self._ready_after * 1000:.0f}ms (import {self._format_import_ms()})")
+
+    def _format_import_ms(self) -> str:
+        return f"{self._import_seconds * 1000:.0f}ms" if self._import_seconds is not None else "측정 안 함"
+
+
+def _default_steps() -> List[WarmupStep]:
+    """Firebase 초기화 -> foodData 카탈로그/매칭 인덱스 적재, 그와 동시에 외부 API 사전 연결"""
+    # 순환 import 방지 (recipe_extractor가 여러 서비스 모듈을 import)
+    from services.recipe_extractor import warm_up_ingredient_matcher
+
+    async def _firebase() -> Any:
+        # Firebase Admin SDK와 gRPC 모듈 import, 인증 정보 읽기, Firestore 클라이언트 생성
+        return await asyncio.to_thread(firebase_config.get_firestore_client)
+
+    async def _http() -> Any:
+        return await warm_up_http_clients()
+
+    async def _catalog() -> Any:
+        # 첫 Firestore 조회로 gRPC 채널도 함께 연결됨 (공유 캐시 모드에서는 공유 스냅샷을 읽음)
+        matcher = await asyncio.to_thread(warm_up_ingredient_matcher)
+        return len(matcher)
+
+    steps = [WarmupStep('firebase', _firebase), WarmupStep('catalog', _catalog, depends_on=('firebase',))]
+    if settings.STARTUP_PRECONNECT_ENABLED:
+        steps.append(WarmupStep('http', _http))
+    return steps
+
+
+_startup_warmup: Optional[StartupWarmup] = None
+_import_seconds: Optional[float] = None
+
+
+def record_import_time(seconds: float) -> None:
+    """
+    main 모듈 import에 걸린 시간 기록
+
+    `python main.py`로 실행하면 uvicorn이 "main:app"을 한 번 더 import하는데, 이때는 의존 모듈이
+    이미 적재되어 있어 시간이 거의 0이므로 처음 기록한 값만 사용합니다.
+    """
+    global _import_seconds
+
+    if _import_seconds is None:
+        _import_seconds = seconds
+        record_startup_step('import', seconds)
+
+
+def init_startup_warmup() -> StartupWarmup:
+    """
+    프로세스 전역 준비 작업 생성 (서버 lifespan에서 start()와 함께 호출)
+
+    STARTUP_WARMUP_ENABLED=false면 준비 단계 없이 바로 준비 완료로 표시합니다.
+    """
+    global _startup_warmup
+
+    steps = _default_steps() if settings.STARTUP_WARMUP_ENABLED else []
+    _startup_warmup = StartupWarmup(steps, settings.STARTUP_WARMUP_RETRY_SECONDS, _import_seconds)
+    return _startup_warmup
+
+
+def get_startup_warmup() -> Optional[StartupWarmup]:
+    """프로세스 전역 준비 작업 반환 (init_startup_warmup 전이면 None)"""
+    return _startup_warmup
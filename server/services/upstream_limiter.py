@@ -0,0 +1,302 @@
+"""외부 API(upstream)별 적응형 동시성 제한 및 토큰 버킷 요청률 제한"""
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from config import settings
+from services.metrics import record_upstream_status
+
+logger = logging.getLogger(__name__)
+
+# 요청률 초과/과부하로 보고 동시성 한도를 줄이는 응답 상태 코드
+THROTTLE_STATUS_CODES = (429, 503)
+
+# Retry-After 정보가 없을 때 재시도 전 기본 대기 시간(초)
+_DEFAULT_RETRY_AFTER_SECONDS = 1.0
+# 동시에 돌아온 여러 429 응답으로 한도가 연달아 줄지 않도록, 한 번 줄인 뒤 이 시간 동안은 다시 줄이지 않음
+_DECREASE_COOLDOWN_SECONDS = 1.0
+
+
+class UpstreamQueueTimeout(Exception):
+    """대기열에서 기한(deadline) 안에 호출 슬롯을 얻지 못한 경우"""
+
+
+def retry_after_seconds(resp: httpx.Response) -> Optional[float]:
+    """
+    응답에서 재시도까지 기다려야 할 시간(초) 추출
+
+    Retry-After 헤더(초 또는 HTTP 날짜)를 우선 사용하고, 없으면 Gemini 오류 본문의
+    RetryInfo.retryDelay("27s" 형식)를 사용합니다.
+    """
+    header = resp.headers.get("retry-after")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(header).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    try:
+        details = (resp.json().get("error") or {}).get("details") or []
+    except (ValueError, json.JSONDecodeError, AttributeError):
+        return None
+    for detail in details:
+        delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+        if isinstance(delay, str) and delay.endswith("s"):
+            try:
+                return max(0.0, float(delay[:-1]))
+            except ValueError:
+                continue
+    return None
+
+
+class _Permit:
+    """획득한 호출 슬롯. 응답을 observe()로 알려주면 반납 시 한도 조정에 반영됩니다."""
+
+    def __init__(self, upstream: str):
+        self.upstream = upstream
+        self.status_code: Optional[int] = None
+        self.retry_after: Optional[float] = None
+
+    def observe(self, resp: httpx.Response) -> None:
+        self.status_code = resp.status_code
+        record_upstream_status(self.upstream, resp.status_code)
+        if resp.status_code in THROTTLE_STATUS_CODES:
+            self.retry_after = retry_after_seconds(resp)
+
+
+class UpstreamLimiter:
+    """
+    upstream 하나에 대한 AIMD 동시성 제한 + 토큰 버킷 요청률 제한.
+
+    - 동시성 한도는 성공 응답마다 조금씩 늘리고(additive increase),
+      429/503을 받으면 절반으로 줄입니다(multiplicative decrease).
+    - Retry-After가 있으면 그 시각까지 새 호출을 내보내지 않습니다.
+    - rate_per_second가 0보다 크면 토큰 버킷으로 초당 호출 수도 제한합니다.
+    - 슬롯을 바로 얻지 못한 호출은 실패하지 않고 기한(deadline)까지 대기열에서 기다립니다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        min_concurrency: int,
+        max_concurrency: int,
+        rate_per_second: float,
+        burst: int,
+        queue_timeout: float,
+        throttle_retries: int,
+    ):
+        self.name = name
+        self._min_limit = max(1, min_concurrency)
+        self._max_limit = max(self._min_limit, max_concurrency)
+        self._limit = float(self._max_limit)
+        self._rate = rate_per_second
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._refilled_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self.queue_timeout = queue_timeout
+        self.throttle_retries = throttle_retries
+
+        self._cond: Optional[asyncio.Condition] = None
+        self._in_flight = 0
+        self._waiting = 0
+        self.throttled = 0
+        self.retries = 0
+        self.queue_timeouts = 0
+
+    def deadline(self) -> float:
+        """지금부터 queue_timeout 뒤의 기한 (time.monotonic 기준)"""
+        return time.monotonic() + self.queue_timeout
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None) -> AsyncIterator[_Permit]:
+        """
+        호출 슬롯을 얻을 때까지 대기한 뒤 반환하고, 블록을 벗어나면 반납
+
+        Raises:
+            UpstreamQueueTimeout: deadline까지 슬롯을 얻지 못한 경우
+        """
+        await self._acquire(deadline)
+        permit = _Permit(self.name)
+        try:
+            yield permit
+        except Exception:
+            # 응답을 받기 전에 실패한 호출(타임아웃, 연결 오류)도 상태 코드 통계에 반영
+            if permit.status_code is None:
+                record_upstream_status(self.name, 'error')
+            raise
+        finally:
+            await self._release(permit)
+
+    async def call(
+        self,
+        send: Callable[[], Awaitable[httpx.Response]],
+        deadline: Optional[float] = None,
+    ) -> httpx.Response:
+        """
+        슬롯을 얻어 send()를 실행하고 응답을 반환
+
+        429/503 응답은 Retry-After만큼 기다렸다가 기한 안에서 throttle_retries번까지 다시 시도하며,
+        그래도 실패하면 마지막 응답을 그대로 반환합니다. (상태 코드 처리는 호출자 몫)
+        """
+        deadline = deadline if deadline is not None else self.deadline()
+        attempt = 0
+        while True:
+            async with self.slot(deadline) as permit:
+                resp = await send()
+                permit.observe(resp)
+
+            if resp.status_code not in THROTTLE_STATUS_CODES or attempt >= self.throttle_retries:
+                return resp
+            wait = permit.retry_after if permit.retry_after is not None else _DEFAULT_RETRY_AFTER_SECONDS
+            if time.monotonic() + wait >= deadline:
+                # 기한 안에 재시도할 수 없으면 기다리지 않고 바로 반환
+                return resp
+            attempt += 1
+            self.retries += 1
+            logger.warning(
+                f"[{self.name}] status={resp.status_code}, {wait:.1f}초 후 재시도 ({attempt}/{self.throttle_retries})"
+            )
+            # 대기는 _acquire에서 Retry-After 차단 시각까지 기다리는 것으로 처리됨
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "concurrency_limit": round(self._limit, 2),
+            "min_concurrency": self._min_limit,
+            "max_concurrency": self._max_limit,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "rate_per_second": self._rate,
+            "tokens": round(self._tokens, 2) if self._rate > 0 else None,
+            "blocked_for_seconds": round(max(0.0, self._blocked_until - now), 2),
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "queue_timeouts": self.queue_timeouts,
+        }
+
+    # ---------- 내부 구현 ----------
+
+    def _condition(self) -> asyncio.Condition:
+        # 이벤트 루프가 실행 중일 때 처음 사용하는 시점에 생성
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _refill(self, now: float) -> None:
+        if self._rate > 0:
+            self._tokens = min(self._burst, self._tokens + (now - self._refilled_at) * self._rate)
+        self._refilled_at = now
+
+    async def _acquire(self, deadline: Optional[float]) -> None:
+        cond = self._condition()
+        async with cond:
+            self._waiting += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+
+                    # 다음 확인까지 기다릴 시간 (None이면 다른 호출이 슬롯을 반납할 때까지)
+                    wait: Optional[float]
+                    if now < self._blocked_until:
+                        wait = self._blocked_until - now
+                    elif self._in_flight >= int(self._limit):
+                        wait = None
+                    elif self._rate > 0 and self._tokens < 1:
+                        wait = (1 - self._tokens) / self._rate
+                    else:
+                        if self._rate > 0:
+                            self._tokens -= 1
+                        self._in_flight += 1
+                        return
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self.queue_timeouts += 1
+                            raise UpstreamQueueTimeout(
+                                f"{self.name} 호출 대기 시간 초과 (in_flight={self._in_flight}, "
+                                f"limit={int(self._limit)})"
+                            )
+                        wait = remaining if wait is None else min(wait, remaining)
+
+                    try:
+                        await asyncio.wait_for(cond.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiting -= 1
+
+    async def _release(self, permit: _Permit) -> None:
+        cond = self._condition()
+        async with cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if permit.status_code in THROTTLE_STATUS_CODES:
+                self.throttled += 1
+                if now - self._last_decrease >= _DECREASE_COOLDOWN_SECONDS:
+                    self._limit = max(self._min_limit, self._limit / 2)
+                    self._last_decrease = now
+                    logger.warning(
+                        f"[{self.name}] status={permit.status_code}, 동시성 한도 감소: {self._limit:.1f}"
+                    )
+                retry_after = (
+                    permit.retry_after if permit.retry_after is not None else _DEFAULT_RETRY_AFTER_SECONDS
+                )
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            elif permit.status_code is not None and permit.status_code < 500:
+                # 한도만큼 성공하면 한도가 1 늘어나는 속도로 증가
+                self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+            cond.notify_all()
+
+
+def _limiter_options(name: str) -> Dict[str, Any]:
+    """upstream 이름별 제한 설정"""
+    if name == "gemini":
+        return {
+            "min_concurrency": settings.GEMINI_MIN_CONCURRENCY,
+            "max_concurrency": settings.GEMINI_MAX_CONCURRENCY,
+            "rate_per_second": settings.GEMINI_RATE_LIMIT_PER_SECOND,
+            "burst": settings.GEMINI_RATE_LIMIT_BURST,
+            "queue_timeout": settings.GEMINI_QUEUE_TIMEOUT_SECONDS,
+            "throttle_retries": settings.GEMINI_THROTTLE_RETRIES,
+        }
+    if name == "opengraph":
+        return {
+            "min_concurrency": settings.OPENGRAPH_MIN_CONCURRENCY,
+            "max_concurrency": settings.OPENGRAPH_MAX_CONCURRENCY,
+            "rate_per_second": settings.OPENGRAPH_RATE_LIMIT_PER_SECOND,
+            "burst": settings.OPENGRAPH_RATE_LIMIT_BURST,
+            "queue_timeout": settings.OPENGRAPH_QUEUE_TIMEOUT_SECONDS,
+            "throttle_retries": settings.OPENGRAPH_THROTTLE_RETRIES,
+        }
+    raise KeyError(f"알 수 없는 upstream: {name}")
+
+
+_limiters: Dict[str, UpstreamLimiter] = {}
+
+
+def get_upstream_limiter(name: str) -> UpstreamLimiter:
+    """upstream 이름에 해당하는 프로세스 전역 제한기 반환"""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        limiter = _limiters[name] = UpstreamLimiter(name, **_limiter_options(name))
+    return limiter
+
+
+def get_upstream_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """생성된 모든 upstream 제한기의 상태"""
+    return {name: limiter.stats() for name, limiter in _limiters.items()}